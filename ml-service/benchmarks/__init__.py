@@ -0,0 +1,19 @@
+"""
+Inference Benchmarks for the FSLSM ML Service (app.py)
+
+stages.py   per-call latency of each /predict stage (extract_features,
+            engineer_features, scaler.transform, every model's predict and
+            calculate_confidence_from_model) plus the whole pipeline
+load.py     end-to-end load generator: POSTs realistic feature dicts to
+            /predict at several concurrency levels
+baselines.py shared helpers: synthetic feature dicts, p50/p95/p99
+            summaries, and JSON results compared against a saved baseline
+
+Results are written to logs/benchmarks/<suite>_<timestamp>.json and
+<suite>_latest.json. --save-baseline also stores them as
+<suite>_baseline.json, which later runs are compared against.
+
+Usage:
+    python ml-service/benchmarks/stages.py --iterations 2000 --save-baseline
+    python ml-service/benchmarks/load.py --concurrency 1,4,16 --requests 500
+"""
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Shared Helpers for the ML Service Benchmarks
+Synthetic request payloads, latency percentiles and JSON baselines
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SERVICE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+sys.path.insert(0, str(SERVICE_DIR / 'training'))
+
+from generate_synthetic_data import generate_shard, FEATURE_COLS
+
+BENCH_DIR = SERVICE_DIR / 'logs' / 'benchmarks'
+TOLERANCE = 0.10  # slowdown (or throughput loss) that counts as a regression
+LATENCY_KEYS = ['p50_us', 'p95_us', 'p99_us']
+
+def feature_dicts(n, seed=7):
+    """n realistic /predict feature dicts (JSON-ready) from the synthetic data generator"""
+    rows = generate_shard(n, seed, 0)[FEATURE_COLS]
+    return rows.astype(float).to_dict('records')
+
+def latency_summary(samples_ns):
+    """Count, mean and p50/p95/p99/max of per-call latencies, in microseconds"""
+    us = np.asarray(samples_ns, dtype=np.float64) / 1000
+    if len(us) == 0:
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(us, [50, 95, 99])
+    return {
+        'count': int(len(us)),
+        'mean_us': round(float(us.mean()), 2),
+        'p50_us': round(float(p50), 2),
+        'p95_us': round(float(p95), 2),
+        'p99_us': round(float(p99), 2),
+        'max_us': round(float(us.max()), 2)
+    }
+
+def environment():
+    """Machine facts stored with every result, so baselines from other hosts are recognisable"""
+    return {
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__
+    }
+
+def save_results(suite, results, settings, save_baseline=False, bench_dir=BENCH_DIR):
+    """Write <suite>_<timestamp>.json and <suite>_latest.json (and <suite>_baseline.json if asked)"""
+    data = {
+        'suite': suite,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment(),
+        'settings': settings,
+        'results': results
+    }
+    bench_dir.mkdir(parents=True, exist_ok=True)
+    paths = [bench_dir / f"{suite}_{time.strftime('%Y%m%d-%H%M%S')}.json", bench_dir / f'{suite}_latest.json']
+    if save_baseline:
+        paths.append(baseline_path(suite, bench_dir))
+    for path in paths:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+    print(f"\n[REPORT] Results saved to: {paths[0]}")
+    if save_baseline:
+        print(f"[REPORT] Baseline saved to: {paths[-1]}")
+    return data
+
+def baseline_path(suite, bench_dir=BENCH_DIR):
+    return bench_dir / f'{suite}_baseline.json'
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def compare_to_baseline(current, baseline, tolerance=TOLERANCE):
+    """Print current vs baseline latencies (and req/s); returns the names that regressed"""
+    if baseline is None:
+        print("\n[BASELINE] No earlier baseline to compare with (--save-baseline stores one)")
+        return []
+    print(f"\n[BASELINE] Compared with {baseline['created']} ({baseline['environment'].get('host')}, "
+          f"{baseline['environment'].get('cpus')} CPUs)")
+    if baseline['environment'] != current['environment']:
+        print("   ⚠️  Different environment - differences may not be regressions")
+    changed = sorted(key for key in set(baseline['settings']) | set(current['settings'])
+                     if baseline['settings'].get(key) != current['settings'].get(key))
+    for key in changed:
+        print(f"   ⚠️  Different settings - {key}: {baseline['settings'].get(key)} -> {current['settings'].get(key)}")
+    print(f"\n{'Benchmark':<32} {'Metric':<8} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    print("-" * 78)
+    regressions = []
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        metrics = [(key, False) for key in LATENCY_KEYS] + [('requests_per_sec', True)]
+        for key, higher_is_better in metrics:
+            if key not in result or key not in reference or not reference[key]:
+                continue
+            change = (result[key] - reference[key]) / reference[key]
+            worse = -change if higher_is_better else change
+            flag = ' ⚠️' if worse > tolerance else ''
+            if flag and name not in regressions:
+                regressions.append(name)
+            label = 'req/s' if higher_is_better else key.replace('_us', ' (us)')
+            print(f"{name:<32} {label:<8} {reference[key]:>12,.1f} {result[key]:>12,.1f} "
+                  f"{change * 100:>+8.1f}%{flag}")
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} benchmark(s) regressed by more than {tolerance * 100:.0f}%: "
+              f"{', '.join(regressions)}")
+    else:
+        print(f"\n✅ No regressions beyond {tolerance * 100:.0f}%")
+    return regressions
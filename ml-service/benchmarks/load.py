@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-End Load Generator for the ML Service
+Latency percentiles and throughput of /predict at several concurrency levels
+
+Every request POSTs {"features": <dict>} built from the synthetic data
+generator, so payloads look like real behaviour vectors. For each
+concurrency level, that many client threads share --requests requests.
+Each level reports p50/p95/p99 latency and requests/sec of the successful
+requests, and the errors (non-200 responses or success=false).
+--fail-on-regression also fails on any error.
+
+Without --url, app.py is started in this process on a free local port
+(threaded werkzeug server, models loaded once). The client threads then
+share the server's GIL. Point --url at a separately started service
+(python app.py, gunicorn, ...) for numbers that include the real server.
+
+app.py has no batch prediction route. Other single-payload routes can be
+driven with --route.
+
+Usage:
+    python ml-service/benchmarks/load.py [--concurrency 1,4,16] [--requests 500] [--save-baseline]
+    python ml-service/benchmarks/load.py --url http://localhost:5000
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from baselines import (feature_dicts, latency_summary, save_results, load_baseline, baseline_path,
+                       compare_to_baseline, TOLERANCE)
+
+WARMUP_REQUESTS = 20
+TIMEOUT_SECONDS = 30
+
+def start_local_service():
+    """Serve app.py from a background thread on a free port; returns (base url, server)"""
+    from werkzeug.serving import make_server
+    import app
+    app.load_models()
+    if not app.models_loaded:
+        print("❌ Models not loaded - train them first")
+        sys.exit(1)
+    batch_routes = [rule.rule for rule in app.app.url_map.iter_rules() if 'batch' in rule.rule]
+    if batch_routes:
+        print(f"[INFO] Batch route(s) in app.py: {', '.join(batch_routes)} (drive them with --route)")
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no access log line per request
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}', server
+
+def post(url, body):
+    """One request; returns (latency ns, ok)"""
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter_ns()
+    try:
+        with urllib.request.urlopen(request, timeout=TIMEOUT_SECONDS) as response:
+            payload = response.read()
+            ok = response.status == 200 and json.loads(payload).get('success', False)
+    except (urllib.error.URLError, OSError, ValueError):
+        ok = False
+    return time.perf_counter_ns() - start, ok
+
+def run_level(url, bodies, concurrency, n_requests):
+    """Latency and requests/sec of the successful requests, and the errors, over `concurrency` threads"""
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def client():
+        local = []
+        while True:
+            i = next(counter)  # itertools.count is atomic under the GIL
+            if i >= n_requests:
+                break
+            latency, ok = post(url, bodies[i % len(bodies)])
+            if ok:
+                local.append(latency)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - start
+
+    # A failing service must not look fast: only successful requests count
+    summary = latency_summary(latencies)
+    summary['requests_per_sec'] = round(len(latencies) / elapsed, 1)
+    summary['errors'] = errors[0]
+    summary['seconds'] = round(elapsed, 3)
+    return summary
+
+def print_results(results):
+    print(f"\n{'Level':<14} {'req/s':>9} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10} {'errors':>7}")
+    print("-" * 76)
+    for name, summary in results.items():
+        if not summary['count']:
+            print(f"{name:<14} {0:>9,.1f} {'-':>10} {'-':>10} {'-':>10} {'-':>10} {summary['errors']:>7}")
+            continue
+        print(f"{name:<14} {summary['requests_per_sec']:>9,.1f} {summary['p50_us'] / 1000:>8.2f}ms "
+              f"{summary['p95_us'] / 1000:>8.2f}ms {summary['p99_us'] / 1000:>8.2f}ms "
+              f"{summary['max_us'] / 1000:>8.2f}ms {summary['errors']:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end load generator for the ML service')
+    parser.add_argument('--url', default=None, help='Base URL of a running service (default: start app.py here)')
+    parser.add_argument('--route', default='/predict')
+    parser.add_argument('--concurrency', default='1,4,16', help='Comma-separated client thread counts')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per concurrency level')
+    parser.add_argument('--dicts', type=int, default=1000, help='Distinct synthetic feature dicts to cycle through')
+    parser.add_argument('--baseline', default=None, help='Baseline JSON to compare with (default: logs/benchmarks/)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='Slowdown that counts as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit with code 1 on a regression or any failed request')
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    server = None
+    base_url = args.url.rstrip('/') if args.url else None
+    if base_url is None:
+        base_url, server = start_local_service()
+        print(f"[LOAD] Started app.py in-process at {base_url}")
+    url = base_url + args.route
+    bodies = [json.dumps({'features': d}).encode() for d in feature_dicts(args.dicts)]
+
+    for i in range(WARMUP_REQUESTS):
+        post(url, bodies[i % len(bodies)])
+    print(f"\n[LOAD] {args.requests:,} requests per level to {url} ({len(bodies):,} distinct payloads)")
+    results = {}
+    for concurrency in levels:
+        results[f'concurrency={concurrency}'] = run_level(url, bodies, concurrency, args.requests)
+        summary = results[f'concurrency={concurrency}']
+        p99 = f"{summary['p99_us'] / 1000:.2f} ms" if summary['count'] else 'n/a'
+        print(f"   concurrency {concurrency:>3}: {summary['requests_per_sec']:,.1f} req/s, "
+              f"p99 {p99}, {summary['errors']} error(s)")
+    if server is not None:
+        server.shutdown()
+    print_results(results)
+
+    suite = 'load' if args.route == '/predict' else f"load{args.route.replace('/', '_')}"
+    baseline = load_baseline(args.baseline or baseline_path(suite))
+    settings = {'url': 'in-process' if server is not None else base_url, 'route': args.route,
+                'requests': args.requests, 'dicts': args.dicts, 'concurrency': levels}
+    current = save_results(suite, results, settings, save_baseline=args.save_baseline)
+    regressions = compare_to_baseline(current, baseline, args.tolerance)
+    errors = sum(summary['errors'] for summary in results.values())
+    if errors:
+        print(f"\n⚠️  {errors} failed request(s) - latencies and req/s cover successful requests only")
+    if (regressions or errors) and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
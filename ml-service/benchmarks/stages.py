@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Stage-Level Microbenchmarks of the /predict Pipeline
+Per-call latency of every step app.predict() runs, with the models app.py serves
+
+Each stage is timed on its own, on inputs prepared in advance from
+--dicts distinct synthetic feature dicts (cycled), after a warm-up:
+    extract_features, engineer_features, scaler.transform,
+    predict[<dimension>], confidence[<dimension>] (calculate_confidence_from_model)
+and 'pipeline' runs them all for one request, without Flask.
+
+Usage:
+    python ml-service/benchmarks/stages.py [--iterations 2000] [--save-baseline] [--fail-on-regression]
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from baselines import (feature_dicts, latency_summary, save_results, load_baseline, baseline_path,
+                       compare_to_baseline, TOLERANCE)
+import app
+
+WARMUP = 50
+
+def time_calls(fn, inputs, iterations, warmup=WARMUP):
+    """Per-call latencies (ns) of fn(*inputs[i % len(inputs)])"""
+    for i in range(warmup):
+        fn(*inputs[i % len(inputs)])
+    samples = np.empty(iterations, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        args = inputs[i % len(inputs)]
+        start = clock()
+        fn(*args)
+        samples[i] = clock() - start
+    return samples
+
+def predict_pipeline(feature_dict):
+    """Everything app.predict() does for one request, minus Flask and JSON"""
+    features = app.extract_features(feature_dict)
+    features_scaled = app.scaler.transform(app.engineer_features(features, feature_dict))
+    for dim_name, model in app.models.items():
+        pred = np.clip(model.predict(features_scaled)[0], -11, 11)
+        app.calculate_confidence_from_model(model, features_scaled, pred)
+        app.interpret_score(int(round(pred)), dim_name)
+
+def run_stages(n_dicts, iterations):
+    """{stage: latency summary} of every stage"""
+    dicts = feature_dicts(n_dicts)
+    extracted = [app.extract_features(d) for d in dicts]
+    engineered = [app.engineer_features(x, d) for x, d in zip(extracted, dicts)]
+    scaled = [app.scaler.transform(x) for x in engineered]
+
+    stages = [
+        ('extract_features', app.extract_features, [(d,) for d in dicts]),
+        ('engineer_features', app.engineer_features, list(zip(extracted, dicts))),
+        ('scaler.transform', app.scaler.transform, [(x,) for x in engineered]),
+    ]
+    for dim_name, model in app.models.items():
+        preds = [model.predict(x)[0] for x in scaled]
+        stages.append((f'predict[{dim_name}]', model.predict, [(x,) for x in scaled]))
+        stages.append((f'confidence[{dim_name}]', app.calculate_confidence_from_model,
+                       [(model, x, p) for x, p in zip(scaled, preds)]))
+    stages.append(('pipeline', predict_pipeline, [(d,) for d in dicts]))
+
+    results = {}
+    for name, fn, inputs in stages:
+        results[name] = latency_summary(time_calls(fn, inputs, iterations))
+        results[name]['calls_per_sec'] = round(1e6 / results[name]['mean_us'], 1)
+    return results
+
+def print_results(results):
+    print(f"\n{'Stage':<32} {'mean':>10} {'p50':>10} {'p95':>10} {'p99':>10} {'calls/s':>10}")
+    print("-" * 86)
+    for name, summary in results.items():
+        print(f"{name:<32} {summary['mean_us']:>8.1f}us {summary['p50_us']:>8.1f}us {summary['p95_us']:>8.1f}us "
+              f"{summary['p99_us']:>8.1f}us {summary['calls_per_sec']:>10,.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Stage-level microbenchmarks of the /predict pipeline')
+    parser.add_argument('--iterations', type=int, default=2000, help='Timed calls per stage')
+    parser.add_argument('--dicts', type=int, default=500, help='Distinct synthetic feature dicts to cycle through')
+    parser.add_argument('--baseline', default=None, help='Baseline JSON to compare with (default: logs/benchmarks/)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='Slowdown that counts as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with code 1 on a regression')
+    args = parser.parse_args()
+
+    app.load_models()
+    if not app.models_loaded:
+        print("❌ Models not loaded - train them first")
+        sys.exit(1)
+
+    print(f"\n[BENCH] {args.iterations:,} calls per stage over {args.dicts:,} synthetic feature dicts")
+    results = run_stages(args.dicts, args.iterations)
+    print_results(results)
+
+    baseline = load_baseline(args.baseline or baseline_path('stages'))
+    current = save_results('stages', results, {'iterations': args.iterations, 'dicts': args.dicts,
+                                               'scaler_features': int(app.scaler.n_features_in_)},
+                           save_baseline=args.save_baseline)
+    regressions = compare_to_baseline(current, baseline, args.tolerance)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
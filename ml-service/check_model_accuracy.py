@@ -4,43 +4,11 @@ Tests improved models with 46 engineered features
 """
 
 import numpy as np
-import pandas as pd
 from pathlib import Path
-import joblib
-from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
-from sklearn.preprocessing import StandardScaler
+import sys
 
-def engineer_features(X, feature_cols):
-    """Add engineered features (same as training script)"""
-    df_features = pd.DataFrame(X, columns=feature_cols)
-    
-    # Add interaction features (ratio features)
-    df_features['active_reflective_ratio'] = df_features['activeModeRatio'] / (df_features['reflectiveModeRatio'] + 0.001)
-    df_features['sensing_intuitive_ratio'] = df_features['sensingModeRatio'] / (df_features['intuitiveModeRatio'] + 0.001)
-    df_features['visual_verbal_ratio'] = df_features['visualModeRatio'] / (df_features['verbalModeRatio'] + 0.001)
-    df_features['sequential_global_ratio'] = df_features['sequentialModeRatio'] / (df_features['globalModeRatio'] + 0.001)
-    
-    # Add activity intensity features
-    df_features['active_intensity'] = df_features['questionsGenerated'] + df_features['debatesParticipated']
-    df_features['reflective_intensity'] = df_features['reflectionsWritten'] + df_features['journalEntries']
-    df_features['sensing_intensity'] = df_features['simulationsCompleted'] + df_features['challengesCompleted']
-    df_features['intuitive_intensity'] = df_features['conceptsExplored'] + df_features['patternsDiscovered']
-    df_features['visual_intensity'] = df_features['diagramsViewed'] + df_features['wireframesExplored']
-    df_features['verbal_intensity'] = df_features['textRead'] + df_features['summariesCreated']
-    df_features['sequential_intensity'] = df_features['stepsCompleted'] + df_features['linearNavigation']
-    df_features['global_intensity'] = df_features['overviewsViewed'] + df_features['navigationJumps']
-    
-    # Add squared features for non-linear relationships
-    for col in ['activeModeRatio', 'sensingModeRatio', 'visualModeRatio', 'sequentialModeRatio']:
-        df_features[f'{col}_squared'] = df_features[col] ** 2
-    
-    # Add AI Assistant interaction features
-    if 'aiAskModeRatio' in df_features.columns:
-        df_features['ai_active_interaction'] = df_features['aiAskModeRatio'] * df_features['activeModeRatio']
-        df_features['ai_reflective_interaction'] = df_features['aiResearchModeRatio'] * df_features['reflectiveModeRatio']
-        df_features['ai_sensing_interaction'] = df_features['aiTextToDocsRatio'] * df_features['sensingModeRatio']
-    
-    return df_features.values, list(df_features.columns)
+sys.path.insert(0, str(Path(__file__).parent / 'training'))
+from evaluation_engine import load_predictions, split_view, regression_metrics, bundle_files
 
 def check_models():
     """Check accuracy of improved models with ZERO CIRCULAR LOGIC data"""
@@ -76,75 +44,25 @@ def check_models():
         return
     
     print(f"\n📂 Loading data from: {data_path}")
-    df = pd.read_csv(data_path)
-    print(f"✅ Loaded {len(df)} samples")
-    
-    # Prepare features (27 base features)
-    feature_cols = [
-        'activeModeRatio', 'questionsGenerated', 'debatesParticipated',
-        'reflectiveModeRatio', 'reflectionsWritten', 'journalEntries',
-        'aiAskModeRatio', 'aiResearchModeRatio',
-        'sensingModeRatio', 'simulationsCompleted', 'challengesCompleted',
-        'intuitiveModeRatio', 'conceptsExplored', 'patternsDiscovered',
-        'aiTextToDocsRatio',
-        'visualModeRatio', 'diagramsViewed', 'wireframesExplored',
-        'verbalModeRatio', 'textRead', 'summariesCreated',
-        'sequentialModeRatio', 'stepsCompleted', 'linearNavigation',
-        'globalModeRatio', 'overviewsViewed', 'navigationJumps'
-    ]
-    
-    X = df[feature_cols].values
-    y_labels = {
-        'activeReflective': df['activeReflective'].values,
-        'sensingIntuitive': df['sensingIntuitive'].values,
-        'visualVerbal': df['visualVerbal'].values,
-        'sequentialGlobal': df['sequentialGlobal'].values
-    }
+    predictions = load_predictions(data_path, 'improved', models_dir)
+    print(f"✅ Loaded {predictions['rows']} samples with {predictions['n_features']} engineered features")
+    print(f"✅ Predictions of {predictions['scaler']} + models come from the shared prediction cache")
     
-    print(f"\n🔧 Engineering features...")
-    X_engineered, engineered_cols = engineer_features(X, feature_cols)
-    print(f"✅ Engineered {X_engineered.shape[1]} features")
-    
-    # Load scaler
-    print(f"\n📦 Loading scaler...")
-    scaler = joblib.load(scaler_path)
-    print(f"✅ Scaler loaded (expects {scaler.n_features_in_} features)")
-    
-    # Scale features
-    X_scaled = scaler.transform(X_engineered)
-    
-    # Test each dimension model
+    # Test each dimension model (on every row, as before)
     print(f"\n{'=' * 70}")
     print(f"🎯 Testing IMPROVED Models (ZERO CIRCULAR LOGIC)")
     print(f"{'=' * 70}")
     
-    dimensions = {
-        'activeReflective': 'active_reflective_improved.pkl',
-        'sensingIntuitive': 'sensing_intuitive_improved.pkl',
-        'visualVerbal': 'visual_verbal_improved.pkl',
-        'sequentialGlobal': 'sequential_global_improved.pkl'
-    }
-    
+    y_true_all, y_pred_all = split_view(predictions, 'all')
     results = []
     
-    for dim_name, model_file in dimensions.items():
-        model_path = models_dir / model_file
-        
-        if not model_path.exists():
-            print(f"\n⚠️ {dim_name}: Model not found ({model_file})")
+    for dim_name, model_path in bundle_files('improved', models_dir)[1].items():
+        if dim_name not in y_pred_all:
+            print(f"\n⚠️ {dim_name}: Model not found ({model_path.name})")
             continue
         
-        # Load model
-        model = joblib.load(model_path)
-        
-        # Predict
-        y_true = y_labels[dim_name]
-        y_pred = model.predict(X_scaled)
-        
-        # Calculate metrics
-        mae = mean_absolute_error(y_true, y_pred)
-        rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-        r2 = r2_score(y_true, y_pred)
+        metrics = regression_metrics(y_true_all[dim_name], y_pred_all[dim_name])
+        mae, rmse, r2 = metrics['mae'], metrics['rmse'], metrics['r2']
         
         results.append({
             'dimension': dim_name,
@@ -1,23 +1,73 @@
 """
 Combine Multiple Training Datasets
 Merges synthetic, eye-tracking, and real user data with appropriate weighting
+
+Streaming: inputs are read in chunks and hash-partitioned by row content
+into bucket files on disk, so identical rows always meet in the same
+bucket. Each bucket is then deduplicated (weights summed), shuffled and
+appended to the output, with buckets visited in random order - a chunked
+external shuffle whose memory use is bounded by the bucket size.
+
+Inputs are always read from CSV (full float64 precision, so duplicate
+detection is exact); the output also gets a typed Parquet sibling.
 """
 
+import argparse
+import math
+import shutil
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / 'training'))
+from dataset_io import ColumnarWriter, partitioned_path, partition_files, part_columns, part_rows, iter_part
+
+DATA_DIR = Path(__file__).parent / 'data'
+LABEL_COLS = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
+META_COLS = ['source', 'sample_weight']
+
+def dataset_files(filename):
+    """Files of a dataset: a CSV, or the part-* files of a directory (shards, or newer export partitions)"""
+    path = DATA_DIR / filename
+    directory = partitioned_path(path)
+    if directory is not None:
+        return partition_files(directory)
+    return [path] if path.is_file() else []
+
 def load_dataset(filename, dataset_name):
-    """Load a dataset if it exists"""
-    data_path = Path(__file__).parent / 'data' / filename
+    """Locate a dataset (file or shard directory) and count its rows without loading it"""
+    files = dataset_files(filename)
     
-    if not data_path.exists():
+    if not files:
         print(f"⚠️  {dataset_name} not found: {filename}")
         return None
     
-    df = pd.read_csv(data_path)
-    print(f"✅ Loaded {dataset_name}: {len(df)} samples")
-    return df
+    n_rows = sum(part_rows(f) for f in files)
+    shards = f" in {len(files)} shards" if len(files) > 1 else ""
+    print(f"✅ Found {dataset_name}: {n_rows} samples{shards}")
+    return {'files': files, 'rows': n_rows}
+
+def partition_to_buckets(inputs, value_cols, bucket_dir, n_buckets, chunk_size):
+    """Pass 1: stream every input in chunks into content-hash buckets on disk"""
+    missing_count = 0
+    for dataset, weight, source, keep_meta in inputs:
+        for path in dataset['files']:
+            for chunk in iter_part(path, chunk_size=chunk_size):
+                if keep_meta:
+                    meta = chunk[META_COLS]
+                else:
+                    meta = pd.DataFrame({'source': source, 'sample_weight': float(weight)}, index=chunk.index)
+                values = chunk.reindex(columns=value_cols)
+                missing_count += int(values.isnull().sum().sum())
+                values = values.fillna(0)
+                
+                buckets = pd.util.hash_pandas_object(values, index=False).values % n_buckets
+                tagged = pd.concat([values, meta], axis=1)
+                for bucket in np.unique(buckets):
+                    bucket_path = bucket_dir / f'bucket-{bucket:05d}.csv'
+                    tagged[buckets == bucket].to_csv(bucket_path, mode='a', header=not bucket_path.exists(), index=False)
+    return missing_count
 
 def combine_datasets(
     synthetic_file='training_data.csv',
@@ -26,11 +76,23 @@ def combine_datasets(
     output_file='combined_training_data_NO_CIRCULAR.csv',  # NEW OUTPUT FILE
     synthetic_weight=1.0,
     eye_tracking_weight=3.0,
-    real_user_weight=5.0
+    real_user_weight=5.0,
+    append_files=None,
+    chunk_size=500_000,
+    bucket_mb=256,
+    seed=42
 ):
     """
     Combine multiple datasets with different weights
     
+    Each row is written once with `source` and `sample_weight` columns;
+    training scripts pass sample_weight to XGBoost instead of seeing
+    duplicated rows. Fractional weights are supported.
+    
+    append_files: synthetic shards (files or shard directories) to merge into
+    the existing output instead of rebuilding it from the three sources; the
+    existing rows keep their source and sample_weight.
+    
     Weighting rationale:
     - Synthetic data (1x): Baseline, covers full distribution
     - Eye-tracking data (3x): Real behavioral patterns from research study
@@ -43,30 +105,57 @@ def combine_datasets(
     print("=" * 70)
     print()
     
+    output_path = DATA_DIR / output_file
     datasets = []
     weights = []
     names = []
+    sources = []
+    keep_meta = []
     
-    # Load synthetic data
-    df_synthetic = load_dataset(synthetic_file, "Synthetic Data")
-    if df_synthetic is not None:
-        datasets.append(df_synthetic)
-        weights.append(synthetic_weight)
-        names.append("Synthetic")
-    
-    # Load eye-tracking data
-    df_eye_tracking = load_dataset(eye_tracking_file, "Eye-Tracking Data")
-    if df_eye_tracking is not None:
-        datasets.append(df_eye_tracking)
-        weights.append(eye_tracking_weight)
-        names.append("Eye-Tracking")
-    
-    # Load real user data
-    df_real_user = load_dataset(real_user_file, "Real User Data")
-    if df_real_user is not None:
-        datasets.append(df_real_user)
-        weights.append(real_user_weight)
-        names.append("Real User")
+    if append_files:
+        existing = load_dataset(output_file, "Existing Combined Data")
+        if existing is None:
+            return None
+        datasets.append(existing)
+        weights.append(None)
+        names.append("Existing Combined")
+        sources.append(None)
+        keep_meta.append(True)
+        for filename in append_files:
+            df_shard = load_dataset(filename, f"Synthetic Shard {filename}")
+            if df_shard is not None:
+                datasets.append(df_shard)
+                weights.append(synthetic_weight)
+                names.append(f"Synthetic ({filename})")
+                sources.append("synthetic")
+                keep_meta.append(False)
+    else:
+        # Load synthetic data
+        df_synthetic = load_dataset(synthetic_file, "Synthetic Data")
+        if df_synthetic is not None:
+            datasets.append(df_synthetic)
+            weights.append(synthetic_weight)
+            names.append("Synthetic")
+            sources.append("synthetic")
+            keep_meta.append(False)
+        
+        # Load eye-tracking data
+        df_eye_tracking = load_dataset(eye_tracking_file, "Eye-Tracking Data")
+        if df_eye_tracking is not None:
+            datasets.append(df_eye_tracking)
+            weights.append(eye_tracking_weight)
+            names.append("Eye-Tracking")
+            sources.append("eye_tracking")
+            keep_meta.append(False)
+        
+        # Load real user data
+        df_real_user = load_dataset(real_user_file, "Real User Data")
+        if df_real_user is not None:
+            datasets.append(df_real_user)
+            weights.append(real_user_weight)
+            names.append("Real User")
+            sources.append("real_user")
+            keep_meta.append(False)
     
     print()
     
@@ -80,90 +169,141 @@ def combine_datasets(
         print()
         return None
     
-    if len(datasets) == 1:
-        print(f"⚠️  Only one dataset available: {names[0]}")
-        print("   Using it without combination")
-        combined_df = datasets[0]
-    else:
-        # Apply weights by duplicating datasets
-        print("⚖️  APPLYING WEIGHTS")
-        print("=" * 70)
-        
-        weighted_datasets = []
-        for df, weight, name in zip(datasets, weights, names):
-            if weight > 1.0:
-                df_weighted = pd.concat([df] * int(weight), ignore_index=True)
-                print(f"   {name}: {len(df)} → {len(df_weighted)} samples ({weight}x weight)")
-            else:
-                df_weighted = df
-                print(f"   {name}: {len(df)} samples (1x weight)")
-            weighted_datasets.append(df_weighted)
-        
-        print()
+    # Apply weights as a sample_weight column (no row duplication)
+    print("⚖️  APPLYING WEIGHTS")
+    print("=" * 70)
+    for dataset, weight, name in zip(datasets, weights, names):
+        weight_label = 'kept per row' if weight is None else f'{weight:g}'
+        print(f"   {name}: {dataset['rows']} samples (sample_weight={weight_label})")
+    print()
+    
+    # Union of the input columns (in first-seen order), minus the metadata columns
+    value_cols = []
+    for dataset in datasets:
+        for path in dataset['files']:
+            for col in part_columns(path):
+                if col not in value_cols and col not in META_COLS:
+                    value_cols.append(col)
+    
+    # Pass 1: hash-partition rows into buckets small enough to fit in memory
+    input_bytes = sum(f.stat().st_size for d in datasets for f in d['files'])
+    n_buckets = max(1, math.ceil(input_bytes / (bucket_mb * 1024 * 1024)))
+    bucket_dir = DATA_DIR / 'combine_buckets'
+    if bucket_dir.exists():
+        shutil.rmtree(bucket_dir)
+    bucket_dir.mkdir(parents=True)
+    
+    print("🔄 COMBINING DATASETS")
+    print("=" * 70)
+    print(f"   Partitioning {input_bytes / 1024 / 1024:.1f} MB into {n_buckets} bucket(s) "
+          f"({chunk_size:,}-row chunks)...")
+    inputs = list(zip(datasets, weights, sources, keep_meta))
+    missing_count = partition_to_buckets(inputs, value_cols, bucket_dir, n_buckets, chunk_size)
+    
+    # Pass 2: per bucket, deduplicate identical rows (keeping their total weight),
+    # shuffle, and append to the output; buckets are visited in random order
+    print("🔀 Deduplicating and shuffling bucket by bucket...")
+    rng = np.random.default_rng(seed)
+    write_path = output_path.with_suffix('.csv.tmp')
+    write_path.unlink(missing_ok=True)
+    columnar = ColumnarWriter(output_path)
+    
+    rows_before = 0
+    rows_written = 0
+    source_weights = {}
+    label_sums = {dim: [0.0, 0.0, np.inf, -np.inf] for dim in LABEL_COLS}
+    
+    for bucket in rng.permutation(n_buckets):
+        bucket_path = bucket_dir / f'bucket-{bucket:05d}.csv'
+        if not bucket_path.exists():
+            continue
+        bucket_df = pd.read_csv(bucket_path, float_precision='round_trip')
+        rows_before += len(bucket_df)
+        bucket_df = (
+            bucket_df
+            .groupby(value_cols, sort=False, dropna=False)
+            .agg(source=('source', 'first'), sample_weight=('sample_weight', 'sum'))
+            .reset_index()
+        )
+        bucket_df = bucket_df.sample(frac=1, random_state=seed + int(bucket)).reset_index(drop=True)
+        bucket_df.to_csv(write_path, mode='a', header=rows_written == 0, index=False)
+        columnar.write(bucket_df)
+        rows_written += len(bucket_df)
         
-        # Combine all datasets
-        print("🔄 COMBINING DATASETS")
-        print("=" * 70)
-        combined_df = pd.concat(weighted_datasets, ignore_index=True)
-        print(f"✅ Combined: {len(combined_df)} total samples")
-        print()
+        w = bucket_df['sample_weight']
+        for source, weight in w.groupby(bucket_df['source']).sum().items():
+            source_weights[source] = source_weights.get(source, 0.0) + weight
+        for dimension in LABEL_COLS:
+            if dimension in bucket_df:
+                sums = label_sums[dimension]
+                sums[0] += (w * bucket_df[dimension]).sum()
+                sums[1] += (w * bucket_df[dimension] ** 2).sum()
+                sums[2] = min(sums[2], bucket_df[dimension].min())
+                sums[3] = max(sums[3], bucket_df[dimension].max())
     
-    # Shuffle the combined dataset
-    print("🔀 Shuffling combined dataset...")
-    combined_df = combined_df.sample(frac=1, random_state=42).reset_index(drop=True)
+    write_path.replace(output_path)
+    columnar.close()
+    shutil.rmtree(bucket_dir)
+    
+    total_weight = sum(source_weights.values())
+    if rows_written < rows_before:
+        print(f"   Merged {rows_before - rows_written} duplicate rows (weights summed)")
+    print(f"✅ Combined: {rows_written} unique samples (total weight {total_weight:g})")
     
     # Validate data quality
     print()
     print("🔍 DATA QUALITY CHECK")
     print("=" * 70)
     
-    # Check for missing values
-    missing_count = combined_df.isnull().sum().sum()
+    # Check for missing values (filled with zeros while partitioning)
     if missing_count > 0:
         print(f"⚠️  Found {missing_count} missing values")
-        print("   Filling with zeros...")
-        combined_df = combined_df.fillna(0)
+        print("   Filled with zeros")
     else:
         print("✅ No missing values")
     
-    # Check label distributions
+    # Check label distributions (weighted, as the models see them)
     print()
-    print("📊 LABEL DISTRIBUTIONS")
+    print("📊 LABEL DISTRIBUTIONS (weighted)")
     print("=" * 70)
     
-    for dimension in ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']:
-        mean_val = combined_df[dimension].mean()
-        std_val = combined_df[dimension].std()
-        min_val = combined_df[dimension].min()
-        max_val = combined_df[dimension].max()
+    for dimension in LABEL_COLS:
+        sum_wy, sum_wy2, min_val, max_val = label_sums[dimension]
+        mean_val = sum_wy / total_weight
+        std_val = np.sqrt(max(sum_wy2 / total_weight - mean_val ** 2, 0))
         
         print(f"   {dimension}:")
         print(f"      Range: [{min_val:.1f}, {max_val:.1f}]")
         print(f"      Mean: {mean_val:.2f} ± {std_val:.2f}")
     
     print()
-    
-    # Save combined dataset
-    output_path = Path(__file__).parent / 'data' / output_file
-    combined_df.to_csv(output_path, index=False)
-    
     print("=" * 70)
     print("✅ COMBINATION COMPLETE")
     print("=" * 70)
     print(f"📁 Saved to: {output_path}")
-    print(f"📊 Total samples: {len(combined_df)}")
+    print(f"📊 Total samples: {rows_written}")
     print()
     
-    # Show composition breakdown
+    # Show composition breakdown (share of total weight)
     if len(datasets) > 1:
         print("📈 DATASET COMPOSITION")
         print("=" * 70)
-        total_samples = len(combined_df)
         
-        for df, weight, name in zip(datasets, weights, names):
-            weighted_count = len(df) * int(weight) if weight > 1.0 else len(df)
-            percentage = (weighted_count / total_samples) * 100
-            print(f"   {name}: {weighted_count} samples ({percentage:.1f}%)")
+        if append_files:
+            for source, weight in source_weights.items():
+                print(f"   {source}: {weight:g} weight ({weight / total_weight * 100:.1f}%)")
+        else:
+            for dataset, weight, name in zip(datasets, weights, names):
+                weighted_count = dataset['rows'] * weight
+                percentage = (weighted_count / total_weight) * 100
+                print(f"   {name}: {dataset['rows']} rows x {weight:g} = {weighted_count:g} weight ({percentage:.1f}%)")
+            
+            # Size versus the old duplicate-rows approach
+            duplicated_rows = sum(d['rows'] * max(int(weight), 1) for d, weight in zip(datasets, weights))
+            saved = (1 - rows_written / duplicated_rows) * 100
+            print()
+            print(f"   Rows written: {rows_written} (row duplication would write {duplicated_rows}, -{saved:.1f}%)")
+        print(f"   File size: {output_path.stat().st_size / 1024:.0f} KB")
         
         print()
     
@@ -171,6 +311,20 @@ def combine_datasets(
 
 def main():
     """Main combination function"""
+    parser = argparse.ArgumentParser(description='Combine synthetic, eye-tracking and real-user training data')
+    parser.add_argument('--synthetic', default='training_data.csv',
+                        help='Synthetic dataset in data/: a CSV or a directory of part-*.csv shards')
+    parser.add_argument('--append', nargs='+', default=None, metavar='SHARDS',
+                        help='Merge these synthetic shards into the existing combined dataset instead of rebuilding it')
+    parser.add_argument('--chunk-size', type=int, default=500_000,
+                        help='Rows per streamed input chunk')
+    parser.add_argument('--bucket-mb', type=int, default=256,
+                        help='Approximate input MB per shuffle/dedup bucket (bounds peak memory)')
+    args = parser.parse_args()
+    if args.bucket_mb <= 0:
+        parser.error('--bucket-mb must be positive')
+    if args.chunk_size <= 0:
+        parser.error('--chunk-size must be positive')
     
     print("\n")
     print("=" * 70)
@@ -181,9 +335,13 @@ def main():
     try:
         # Combine datasets with appropriate weights
         combined_path = combine_datasets(
+            synthetic_file=args.synthetic,
             synthetic_weight=1.0,      # Baseline coverage
             eye_tracking_weight=3.0,   # Real behavioral patterns
-            real_user_weight=5.0       # Most valuable
+            real_user_weight=5.0,      # Most valuable
+            append_files=args.append,
+            chunk_size=args.chunk_size,
+            bucket_mb=args.bucket_mb
         )
         
         if combined_path:
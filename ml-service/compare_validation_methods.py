@@ -1,184 +1,206 @@
 """
 Compare Fast vs Thorough Validation Methods
-Tests both approaches and shows accuracy differences
+Trains both approaches concurrently and compares their run reports
+
+Both training scripts run at the same time, each with half of the CPU
+budget (--n-jobs plus thread-count environment variables). Each writes its
+models, JSON run report and console log to its own directory under
+logs/comparison_runs/<timestamp>/, so models/ is left untouched. Wall time,
+CPU time, peak memory and per-dimension test R² all come from the run
+reports.
+
+Usage:
+    python compare_validation_methods.py [--cpus 8] [--yes]
 """
 
+import argparse
+import os
 import time
 import subprocess
 import sys
 from pathlib import Path
 
-def run_training(script_name, method_name):
-    """Run training script and measure time"""
-    print("\n" + "=" * 70)
-    print(f"🚀 TESTING: {method_name}")
-    print("=" * 70)
-    
+sys.path.insert(0, str(Path(__file__).parent / 'training'))
+from run_report import load_report, compare_reports, format_mb
+
+RUNS_DIR = Path(__file__).parent / 'logs' / 'comparison_runs'
+TIMEOUT_SECONDS = 1800  # 30 minutes per training run
+DIMENSIONS = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']
+
+# key -> (training script, display name)
+METHODS = {
+    'fast': ('train_models_fast.py', 'FAST METHOD'),
+    'thorough': ('train_models_improved.py', 'THOROUGH METHOD')
+}
+
+def split_cpu_budget(total_cpus, n_runs):
+    """Threads per concurrent run: an even share of the budget, at least 1"""
+    return max(1, total_cpus // n_runs)
+
+def start_training(script_name, run_dir, n_jobs):
+    """Launch a training script into its own models/report directory, logging to output.log"""
+    run_dir.mkdir(parents=True, exist_ok=True)
     script_path = Path(__file__).parent / 'training' / script_name
-    
-    start_time = time.time()
-    
-    try:
-        # Run training script
-        result = subprocess.run(
-            [sys.executable, str(script_path)],
-            capture_output=True,
-            text=True,
-            timeout=1800  # 30 minute timeout
-        )
-        
-        elapsed_time = time.time() - start_time
-        
-        # Print output
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:", result.stderr)
-        
-        # Extract accuracy from output
-        accuracy = extract_accuracy(result.stdout)
-        
-        return {
-            'success': result.returncode == 0,
-            'time': elapsed_time,
-            'accuracy': accuracy,
-            'output': result.stdout
-        }
-        
-    except subprocess.TimeoutExpired:
-        elapsed_time = time.time() - start_time
-        print(f"❌ Training timed out after {elapsed_time:.1f} seconds")
-        return {
-            'success': False,
-            'time': elapsed_time,
-            'accuracy': None,
-            'output': 'Timeout'
-        }
-    except Exception as e:
-        elapsed_time = time.time() - start_time
-        print(f"❌ Error: {e}")
-        return {
-            'success': False,
-            'time': elapsed_time,
-            'accuracy': None,
-            'output': str(e)
-        }
-
-def extract_accuracy(output):
-    """Extract average R² from training output"""
-    try:
-        # Look for "Average Test R²: 0.XXX (XX.X%)"
-        for line in output.split('\n'):
-            if 'Average Test R²' in line or 'Average R2' in line:
-                # Extract percentage
-                if '(' in line and '%' in line:
-                    percent_str = line.split('(')[1].split('%')[0]
-                    return float(percent_str)
-    except:
-        pass
-    return None
+    env = dict(os.environ, **{var: str(n_jobs) for var in THREAD_ENV_VARS})
+    log_file = open(run_dir / 'output.log', 'w')
+    process = subprocess.Popen(
+        [sys.executable, str(script_path), '--models-dir', str(run_dir / 'models'),
+         '--reports-dir', str(run_dir / 'reports'), '--n-jobs', str(n_jobs)],
+        stdout=log_file, stderr=subprocess.STDOUT, env=env
+    )
+    return {'process': process, 'log_file': log_file, 'start': time.time(), 'run_dir': run_dir,
+            'script': script_name}
+
+def wait_for_trainings(runs, timeout=TIMEOUT_SECONDS):
+    """Wait for every run; kill the ones that exceed the timeout. Returns {key: result}"""
+    results = {}
+    while len(results) < len(runs):
+        for key, run in runs.items():
+            if key in results:
+                continue
+            elapsed = time.time() - run['start']
+            returncode = run['process'].poll()
+            if returncode is None and elapsed > timeout:
+                run['process'].kill()
+                returncode = run['process'].wait()
+                print(f"❌ {METHODS[key][1]} timed out after {elapsed:.1f} seconds")
+            if returncode is not None:
+                run['log_file'].close()
+                results[key] = collect_result(run, returncode, elapsed)
+                state = '✅ finished' if results[key]['success'] else f'❌ failed (exit code {returncode})'
+                print(f"   {METHODS[key][1]} {state} after {elapsed / 60:.1f} minutes")
+        time.sleep(0.5)
+    return results
+
+def collect_result(run, returncode, elapsed):
+    """Result of one run, read from the JSON run report it wrote"""
+    report = load_run_report(run['script'], run['run_dir'] / 'reports')
+    return {
+        'success': returncode == 0 and report is not None,
+        'time': elapsed,
+        'accuracy': report['metrics']['average_test_r2'] * 100 if report else None,
+        'report': report,
+        'log': run['run_dir'] / 'output.log'
+    }
+
+def load_run_report(script_name, reports_dir):
+    """The run report a training script wrote into its own reports directory, if any"""
+    report_path = reports_dir / f'{Path(script_name).stem}_latest.json'
+    return load_report(report_path) if report_path.exists() else None
+
+def print_log_tail(log_path, lines=20):
+    if log_path.exists():
+        print(f"\n--- last {lines} lines of {log_path} ---")
+        print(''.join(log_path.read_text(errors='replace').splitlines(keepends=True)[-lines:]))
+
+def print_results_table(results):
+    """Wall time, CPU time, peak memory and per-dimension test R² of every run"""
+    short = {'activeReflective': 'AR R²', 'sensingIntuitive': 'SI R²', 'visualVerbal': 'VV R²',
+             'sequentialGlobal': 'SG R²'}
+    header = f"{'Method':<10} {'Wall':>9} {'CPU':>9} {'Peak RSS':>9}"
+    header += ''.join(f" {short[dim]:>7}" for dim in DIMENSIONS) + f" {'Avg R²':>7}"
+    print(header)
+    print("-" * len(header))
+    for key, result in results.items():
+        report = result['report']
+        if report is None:
+            print(f"{key:<10} {'FAILED':>9}")
+            continue
+        metrics = report['metrics']
+        cpu = report.get('cpu_seconds')
+        row = f"{key:<10} {report['wall_seconds']:>8.1f}s "
+        row += f"{cpu:>8.1f}s " if cpu is not None else f"{'n/a':>9} "
+        row += f"{format_mb(report.get('peak_rss_mb')):>9}"
+        row += ''.join(f" {metrics[dim]['test_r2']:>7.4f}" if dim in metrics else f" {'-':>7}" for dim in DIMENSIONS)
+        row += f" {metrics.get('average_test_r2', float('nan')):>7.4f}"
+        print(row)
 
 def main():
     """Main comparison function"""
+    parser = argparse.ArgumentParser(description='Train the fast and thorough models concurrently and compare them')
+    parser.add_argument('--cpus', type=int, default=os.cpu_count(),
+                        help='Total CPU budget, split evenly between the two trainings (default: all CPUs)')
+    parser.add_argument('--yes', action='store_true', help='Start without waiting for ENTER')
+    args = parser.parse_args()
+    n_jobs = split_cpu_budget(args.cpus, len(METHODS))
+
     print("\n")
     print("=" * 70)
     print("🔬 VALIDATION METHOD COMPARISON")
     print("=" * 70)
-    print("\nThis script will train models using BOTH methods:")
-    print("  1. FAST: Simple train/val/test split (2-3 min)")
-    print("  2. THOROUGH: GridSearchCV + 5-Fold CV (10-20 min)")
-    print("\nNote: This will take 15-25 minutes total")
+    print("\nThis script will train models using BOTH methods, concurrently:")
+    print("  1. FAST: Simple train/val/test split, pre-optimized hyperparameters")
+    print("  2. THOROUGH: GridSearchCV + 5-Fold CV (324 combinations)")
+    print(f"\nCPU budget: {args.cpus} CPU(s) -> {n_jobs} thread(s) per training")
+    print("Note: Total time is about that of the thorough run (10-20+ min)")
     print("=" * 70)
-    
-    input("\nPress ENTER to start comparison...")
-    
-    results = {}
-    
-    # Test 1: Fast method
-    print("\n\n📊 TEST 1/2: Fast Validation Method")
-    print("   - Simple train/val/test split")
-    print("   - Pre-optimized hyperparameters")
-    print("   - No cross-validation")
-    results['fast'] = run_training('train_models_fast.py', 'FAST METHOD')
-    
-    # Test 2: Thorough method
-    print("\n\n📊 TEST 2/2: Thorough Validation Method")
-    print("   - GridSearchCV with 324 combinations")
-    print("   - 5-Fold cross-validation")
-    print("   - Comprehensive hyperparameter tuning")
-    results['thorough'] = run_training('train_models_improved.py', 'THOROUGH METHOD')
-    
+
+    if not args.yes:
+        input("\nPress ENTER to start comparison...")
+
+    run_root = RUNS_DIR / time.strftime('%Y%m%d-%H%M%S')
+    print(f"\n🚀 Starting both trainings (output in {run_root})")
+    start_time = time.time()
+    runs = {key: start_training(script, run_root / key, n_jobs) for key, (script, _) in METHODS.items()}
+    results = wait_for_trainings(runs)
+    total_time = time.time() - start_time
+
+    for key, result in results.items():
+        if not result['success']:
+            print_log_tail(result['log'])
+
     # Comparison summary
     print("\n\n" + "=" * 70)
     print("📊 COMPARISON RESULTS")
     print("=" * 70)
-    
-    print("\n┌─────────────────────────────────────────────────────────────┐")
-    print("│                    VALIDATION METHOD COMPARISON              │")
-    print("├─────────────────────────────────────────────────────────────┤")
-    
-    # Fast method
-    if results['fast']['success']:
-        print(f"│ FAST METHOD (Simple Split)                                  │")
-        print(f"│   Training Time:  {results['fast']['time']/60:.1f} minutes                              │")
-        if results['fast']['accuracy']:
-            print(f"│   Accuracy:       {results['fast']['accuracy']:.1f}%                                  │")
-        print(f"│   Status:         ✅ SUCCESS                                 │")
-    else:
-        print(f"│ FAST METHOD (Simple Split)                                  │")
-        print(f"│   Status:         ❌ FAILED                                  │")
-    
-    print("├─────────────────────────────────────────────────────────────┤")
-    
-    # Thorough method
-    if results['thorough']['success']:
-        print(f"│ THOROUGH METHOD (GridSearchCV + 5-Fold CV)                  │")
-        print(f"│   Training Time:  {results['thorough']['time']/60:.1f} minutes                             │")
-        if results['thorough']['accuracy']:
-            print(f"│   Accuracy:       {results['thorough']['accuracy']:.1f}%                                  │")
-        print(f"│   Status:         ✅ SUCCESS                                 │")
-    else:
-        print(f"│ THOROUGH METHOD (GridSearchCV + 5-Fold CV)                  │")
-        print(f"│   Status:         ❌ FAILED                                  │")
-    
-    print("└─────────────────────────────────────────────────────────────┘")
-    
+    print()
+    print_results_table(results)
+    print(f"\n⏱️  Both runs finished in {total_time / 60:.1f} minutes ({n_jobs} thread(s) each)")
+
     # Analysis
     if results['fast']['success'] and results['thorough']['success']:
+        fast_report, thorough_report = results['fast']['report'], results['thorough']['report']
         print("\n📈 ANALYSIS:")
-        
+
         # Time comparison
-        time_diff = results['thorough']['time'] - results['fast']['time']
-        time_ratio = results['thorough']['time'] / results['fast']['time']
+        time_diff = thorough_report['wall_seconds'] - fast_report['wall_seconds']
+        time_ratio = thorough_report['wall_seconds'] / fast_report['wall_seconds']
         print(f"\n⏱️  Time Difference:")
-        print(f"   - Fast: {results['fast']['time']/60:.1f} minutes")
-        print(f"   - Thorough: {results['thorough']['time']/60:.1f} minutes")
+        print(f"   - Fast: {fast_report['wall_seconds']/60:.1f} minutes")
+        print(f"   - Thorough: {thorough_report['wall_seconds']/60:.1f} minutes")
         print(f"   - Difference: +{time_diff/60:.1f} minutes ({time_ratio:.1f}x slower)")
-        
+
         # Accuracy comparison
-        if results['fast']['accuracy'] and results['thorough']['accuracy']:
-            acc_diff = results['thorough']['accuracy'] - results['fast']['accuracy']
-            print(f"\n🎯 Accuracy Difference:")
-            print(f"   - Fast: {results['fast']['accuracy']:.2f}%")
-            print(f"   - Thorough: {results['thorough']['accuracy']:.2f}%")
-            print(f"   - Difference: {acc_diff:+.2f}%")
-            
-            if abs(acc_diff) < 1:
-                print(f"\n💡 CONCLUSION: Accuracy difference is minimal (<1%)")
-                print(f"   - Fast method is sufficient for development")
-                print(f"   - Thorough method recommended for final thesis models")
-            elif acc_diff > 0:
-                print(f"\n💡 CONCLUSION: Thorough method is {acc_diff:.1f}% more accurate")
-                print(f"   - Worth the extra time for thesis defense")
-                print(f"   - Shows rigorous validation approach")
-            else:
-                print(f"\n💡 CONCLUSION: Fast method performed better (unusual)")
-                print(f"   - May indicate overfitting in thorough method")
-                print(f"   - Consider using fast method")
-    
+        acc_diff = results['thorough']['accuracy'] - results['fast']['accuracy']
+        print(f"\n🎯 Accuracy Difference:")
+        print(f"   - Fast: {results['fast']['accuracy']:.2f}%")
+        print(f"   - Thorough: {results['thorough']['accuracy']:.2f}%")
+        print(f"   - Difference: {acc_diff:+.2f}%")
+
+        if abs(acc_diff) < 1:
+            print(f"\n💡 CONCLUSION: Accuracy difference is minimal (<1%)")
+            print(f"   - Fast method is sufficient for development")
+            print(f"   - Thorough method recommended for final thesis models")
+        elif acc_diff > 0:
+            print(f"\n💡 CONCLUSION: Thorough method is {acc_diff:.1f}% more accurate")
+            print(f"   - Worth the extra time for thesis defense")
+            print(f"   - Shows rigorous validation approach")
+        else:
+            print(f"\n💡 CONCLUSION: Fast method performed better (unusual)")
+            print(f"   - May indicate overfitting in thorough method")
+            print(f"   - Consider using fast method")
+
+        # Training cost side by side (from the JSON run reports)
+        print(f"\n📋 Run Reports (A = fast, B = thorough):")
+        compare_reports(fast_report, thorough_report)
+
     print("\n" + "=" * 70)
     print("✅ COMPARISON COMPLETE")
     print("=" * 70)
-    
+    print(f"\n📁 Models, run reports and logs: {run_root}")
+    print("   (models/ was not modified - copy a run's models there to deploy them)")
+
     print("\n📝 RECOMMENDATION FOR YOUR THESIS:")
     print("   - Use THOROUGH method for final models (more defensible)")
     print("   - Use FAST method for quick experiments")
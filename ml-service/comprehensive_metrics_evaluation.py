@@ -7,13 +7,16 @@ This script provides:
 2. Classification metrics (Accuracy, Precision, Recall, F1, ROC-AUC) - for thresholded predictions
 3. Clustering metrics (Silhouette Score) - for learning style grouping
 4. Custom FSLSM-specific metrics
+5. 95% bootstrap confidence intervals for R², MAE, RMSE, Accuracy and F1
+
+Usage:
+    python comprehensive_metrics_evaluation.py [--bootstrap 10000] [--workers 4]
 """
 
+import argparse
 import numpy as np
-import pandas as pd
 from pathlib import Path
 import joblib
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import (
     # Regression metrics
@@ -23,55 +26,18 @@ from sklearn.metrics import (
     mean_absolute_percentage_error,
     explained_variance_score,
     max_error,
-    median_absolute_error,
-    
-    # Classification metrics (for thresholded predictions)
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
-    roc_auc_score,
-    confusion_matrix,
-    classification_report,
-    
-    # Clustering metrics
-    silhouette_score
+    median_absolute_error
 )
 import warnings
+import sys
+import time
 warnings.filterwarnings('ignore')
 
-
-def engineer_features(X, feature_cols):
-    """Add engineered features (same as training script)"""
-    df_features = pd.DataFrame(X, columns=feature_cols)
-    
-    # Ratio features
-    df_features['active_reflective_ratio'] = df_features['activeModeRatio'] / (df_features['reflectiveModeRatio'] + 0.001)
-    df_features['sensing_intuitive_ratio'] = df_features['sensingModeRatio'] / (df_features['intuitiveModeRatio'] + 0.001)
-    df_features['visual_verbal_ratio'] = df_features['visualModeRatio'] / (df_features['verbalModeRatio'] + 0.001)
-    df_features['sequential_global_ratio'] = df_features['sequentialModeRatio'] / (df_features['globalModeRatio'] + 0.001)
-    
-    # Intensity features
-    df_features['active_intensity'] = df_features['questionsGenerated'] + df_features['debatesParticipated']
-    df_features['reflective_intensity'] = df_features['reflectionsWritten'] + df_features['journalEntries']
-    df_features['sensing_intensity'] = df_features['simulationsCompleted'] + df_features['challengesCompleted']
-    df_features['intuitive_intensity'] = df_features['conceptsExplored'] + df_features['patternsDiscovered']
-    df_features['visual_intensity'] = df_features['diagramsViewed'] + df_features['wireframesExplored']
-    df_features['verbal_intensity'] = df_features['textRead'] + df_features['summariesCreated']
-    df_features['sequential_intensity'] = df_features['stepsCompleted'] + df_features['linearNavigation']
-    df_features['global_intensity'] = df_features['overviewsViewed'] + df_features['navigationJumps']
-    
-    # Squared features
-    for col in ['activeModeRatio', 'sensingModeRatio', 'visualModeRatio', 'sequentialModeRatio']:
-        df_features[f'{col}_squared'] = df_features[col] ** 2
-    
-    # AI interaction features
-    if 'aiAskModeRatio' in df_features.columns:
-        df_features['ai_active_interaction'] = df_features['aiAskModeRatio'] * df_features['activeModeRatio']
-        df_features['ai_reflective_interaction'] = df_features['aiResearchModeRatio'] * df_features['reflectiveModeRatio']
-        df_features['ai_sensing_interaction'] = df_features['aiTextToDocsRatio'] * df_features['sensingModeRatio']
-    
-    return df_features.values
+sys.path.insert(0, str(Path(__file__).parent / 'training'))
+from evaluation_engine import load_predictions, split_view
+from score_bins import categorize, confusion, classification_summary, classification_report, binary_auc, profile_codes
+from silhouette import silhouette
+from bootstrap_ci import bootstrap_ci, print_intervals, N_RESAMPLES
 
 
 def calculate_regression_metrics(y_true, y_pred):
@@ -113,46 +79,30 @@ def calculate_classification_metrics(y_true, y_pred):
     FSLSM Categories: Strong (-11 to -7), Moderate (-6 to -3), Balanced (-2 to +2), 
                       Moderate (+3 to +6), Strong (+7 to +11)
     """
-    def to_category(score):
-        """Convert FSLSM score to category"""
-        if score <= -7:
-            return 'Strong_Negative'
-        elif score <= -3:
-            return 'Moderate_Negative'
-        elif score <= 2:
-            return 'Balanced'
-        elif score <= 6:
-            return 'Moderate_Positive'
-        else:
-            return 'Strong_Positive'
-    
-    # Convert to categories
-    y_true_cat = np.array([to_category(s) for s in y_true])
-    y_pred_cat = np.array([to_category(s) for s in y_pred])
+    # Convert to integer category codes (vectorized) and count them into a confusion matrix
+    cm = confusion(categorize(y_true), categorize(y_pred))
+    summary = classification_summary(cm)
     
     metrics = {}
     
     # Accuracy
-    metrics['Accuracy'] = accuracy_score(y_true_cat, y_pred_cat)
+    metrics['Accuracy'] = summary['accuracy']
     
     # Precision, Recall, F1 (weighted average across categories)
-    metrics['Precision'] = precision_score(y_true_cat, y_pred_cat, average='weighted', zero_division=0)
-    metrics['Recall'] = recall_score(y_true_cat, y_pred_cat, average='weighted', zero_division=0)
-    metrics['F1_Score'] = f1_score(y_true_cat, y_pred_cat, average='weighted', zero_division=0)
+    metrics['Precision'] = summary['precision']
+    metrics['Recall'] = summary['recall']
+    metrics['F1_Score'] = summary['f1']
     
-    # Confusion Matrix
-    metrics['Confusion_Matrix'] = confusion_matrix(y_true_cat, y_pred_cat)
+    # Confusion Matrix (rows/columns in CATEGORY_NAMES order)
+    metrics['Confusion_Matrix'] = cm
     
     # Classification Report
-    metrics['Classification_Report'] = classification_report(y_true_cat, y_pred_cat, zero_division=0)
+    metrics['Classification_Report'] = classification_report(cm)
     
     # ROC-AUC (for binary classification: Balanced vs Not Balanced)
-    try:
-        y_true_binary = (np.abs(y_true) <= 2).astype(int)  # 1 if balanced, 0 otherwise
-        y_pred_binary = (np.abs(y_pred) <= 2).astype(int)
-        metrics['ROC_AUC'] = roc_auc_score(y_true_binary, y_pred_binary)
-    except:
-        metrics['ROC_AUC'] = np.nan
+    y_true_binary = np.abs(y_true) <= 2  # True if balanced
+    y_pred_binary = np.abs(y_pred) <= 2
+    metrics['ROC_AUC'] = binary_auc(y_true_binary, y_pred_binary)
     
     return metrics
 
@@ -166,34 +116,32 @@ def calculate_clustering_metrics(X_scaled, y_pred_all):
     
     try:
         # Create cluster labels based on learning style profile
-        # Each unique combination of dimension categories is a cluster
-        cluster_labels = []
-        for i in range(len(y_pred_all['activeReflective'])):
-            profile = (
-                int(y_pred_all['activeReflective'][i] / 4),  # Bin into clusters
-                int(y_pred_all['sensingIntuitive'][i] / 4),
-                int(y_pred_all['visualVerbal'][i] / 4),
-                int(y_pred_all['sequentialGlobal'][i] / 4)
-            )
-            cluster_labels.append(hash(profile) % 100)  # Create cluster ID
-        
-        cluster_labels = np.array(cluster_labels)
+        # Each unique combination of binned dimension scores (score / 4) is a cluster
+        cluster_labels = profile_codes([y_pred_all[dim] for dim in
+                                        ('activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal')])
         
-        # Silhouette Score (measures how well-separated clusters are)
+        # Silhouette Score (measures how well-separated clusters are):
+        # exact in bounded-memory blocks, or a stratified-sample estimate with a 95% CI on large sets
+        metrics['Silhouette_Method'] = None
         if len(np.unique(cluster_labels)) > 1:  # Need at least 2 clusters
-            metrics['Silhouette_Score'] = silhouette_score(X_scaled, cluster_labels)
+            result = silhouette(X_scaled, cluster_labels)
+            metrics['Silhouette_Score'] = result['score']
+            metrics['Silhouette_Method'] = result['method']
+            metrics['Silhouette_CI'] = result['ci']
+            metrics['Silhouette_Rows'] = result['rows']
         else:
             metrics['Silhouette_Score'] = np.nan
             
     except Exception as e:
         print(f"⚠️  Clustering metrics error: {e}")
         metrics['Silhouette_Score'] = np.nan
+        metrics['Silhouette_Method'] = None
     
     return metrics
 
 
-def evaluate_comprehensive():
-    """Comprehensive evaluation with ALL metrics"""
+def evaluate_comprehensive(n_resamples=N_RESAMPLES, workers=None):
+    """Comprehensive evaluation with ALL metrics (n_resamples=0 skips the bootstrap intervals)"""
     
     print("=" * 80)
     print("🔍 COMPREHENSIVE MODEL EVALUATION - ALL METRICS")
@@ -210,58 +158,29 @@ def evaluate_comprehensive():
         print("❌ Dataset not found!")
         return
     
+    # Load scaler and models
+    scaler_path = models_dir / 'scaler_improved.pkl'
+    if not scaler_path.exists():
+        print("❌ Models not found! Run training first.")
+        return
+    
     print(f"📂 Loading: {no_circular_path.name}")
-    df = pd.read_csv(no_circular_path)
-    print(f"✅ Loaded {len(df):,} samples\n")
-    
-    # Prepare features
-    feature_cols = [
-        'activeModeRatio', 'questionsGenerated', 'debatesParticipated',
-        'reflectiveModeRatio', 'reflectionsWritten', 'journalEntries',
-        'aiAskModeRatio', 'aiResearchModeRatio',
-        'sensingModeRatio', 'simulationsCompleted', 'challengesCompleted',
-        'intuitiveModeRatio', 'conceptsExplored', 'patternsDiscovered',
-        'aiTextToDocsRatio',
-        'visualModeRatio', 'diagramsViewed', 'wireframesExplored',
-        'verbalModeRatio', 'textRead', 'summariesCreated',
-        'sequentialModeRatio', 'stepsCompleted', 'linearNavigation',
-        'globalModeRatio', 'overviewsViewed', 'navigationJumps'
-    ]
+    predictions = load_predictions(no_circular_path, 'improved', models_dir)
+    print(f"✅ Loaded {predictions['rows']:,} samples\n")
     
     label_cols = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
     
-    X = df[feature_cols].values
-    X_engineered = engineer_features(X, feature_cols)
-    
-    # Split data (same as training: 70/15/15)
+    # Split data (same as training: 70/15/15, indices stored in the feature cache)
     print("🔪 Splitting data (70% train, 15% val, 15% test, random_state=42)")
-    X_temp, X_test = train_test_split(X_engineered, test_size=0.15, random_state=42)
-    X_train, X_val = train_test_split(X_temp, test_size=0.176, random_state=42)
+    test_idx = predictions['split']['test']
+    X_test = predictions['features']['X'][test_idx]
     
     print(f"   Test samples: {len(X_test):,}\n")
     
-    # Load scaler and models
-    scaler_path = models_dir / 'scaler_improved.pkl'
-    if not scaler_path.exists():
-        print("❌ Models not found! Run training first.")
-        return
-    
+    # Scaled test features for the clustering metrics; predictions come from the shared cache
     scaler = joblib.load(scaler_path)
     X_test_scaled = scaler.transform(X_test)
-    
-    # Load models
-    dimensions = {
-        'activeReflective': 'active_reflective_improved.pkl',
-        'sensingIntuitive': 'sensing_intuitive_improved.pkl',
-        'visualVerbal': 'visual_verbal_improved.pkl',
-        'sequentialGlobal': 'sequential_global_improved.pkl'
-    }
-    
-    models = {}
-    for dim_name, model_file in dimensions.items():
-        model_path = models_dir / model_file
-        if model_path.exists():
-            models[dim_name] = joblib.load(model_path)
+    y_labels, y_pred_cached = split_view(predictions, 'test')
     
     # Evaluate each dimension
     print("=" * 80)
@@ -273,15 +192,8 @@ def evaluate_comprehensive():
     all_classification_metrics = {}
     y_pred_all = {}
     
-    # Split labels once for all dimensions (to match X split)
-    y_labels = {}
-    for dim_name in label_cols:
-        y_temp, y_test_full = train_test_split(df[dim_name].values, test_size=0.15, random_state=42)
-        _, y_val = train_test_split(y_temp, test_size=0.176, random_state=42)
-        y_labels[dim_name] = y_test_full  # Use test set, not validation
-    
     for dim_name in label_cols:
-        if dim_name not in models:
+        if dim_name not in y_pred_cached:
             continue
         
         print(f"{'=' * 80}")
@@ -291,9 +203,8 @@ def evaluate_comprehensive():
         # Get test labels for this dimension
         y_test_dim = y_labels[dim_name]
         
-        # Predict
-        model = models[dim_name]
-        y_pred = model.predict(X_test_scaled)
+        # Cached test-set predictions
+        y_pred = y_pred_cached[dim_name]
         y_pred_all[dim_name] = y_pred
         
         # Calculate regression metrics
@@ -339,6 +250,12 @@ def evaluate_comprehensive():
     
     if not np.isnan(cluster_metrics['Silhouette_Score']):
         print(f"   Silhouette Score:      {cluster_metrics['Silhouette_Score']:.4f}")
+        if cluster_metrics['Silhouette_Method'] == 'sampled':
+            low, high = cluster_metrics['Silhouette_CI']
+            print(f"   Method:                stratified sample of {cluster_metrics['Silhouette_Rows']:,} rows "
+                  f"(95% CI {low:.4f} to {high:.4f})")
+        else:
+            print(f"   Method:                exact ({cluster_metrics['Silhouette_Rows']:,} rows, chunked)")
         print(f"   Interpretation:        ", end="")
         if cluster_metrics['Silhouette_Score'] > 0.5:
             print("Strong cluster separation")
@@ -381,6 +298,17 @@ def evaluate_comprehensive():
     print(f"   Recall:                {avg_recall:.4f}")
     print(f"   F1-Score:              {avg_f1:.4f}")
     
+    # Bootstrap confidence intervals (all resamples vectorized, blocks split across worker processes)
+    if n_resamples > 0:
+        print("\n" + "=" * 80)
+        print("📏 95% BOOTSTRAP CONFIDENCE INTERVALS (TEST SET)")
+        print("=" * 80)
+        print()
+        start = time.time()
+        intervals = bootstrap_ci(y_labels, y_pred_all, n_resamples, workers=workers)
+        print_intervals(intervals, n_resamples)
+        print(f"\n   ({n_resamples:,} resamples in {time.time() - start:.2f}s)")
+    
     # Metrics summary table
     print("\n" + "=" * 80)
     print("📋 METRICS SUMMARY TABLE")
@@ -432,4 +360,10 @@ def evaluate_comprehensive():
 
 
 if __name__ == '__main__':
-    evaluate_comprehensive()
+    parser = argparse.ArgumentParser(description='Comprehensive FSLSM model evaluation')
+    parser.add_argument('--bootstrap', type=int, default=N_RESAMPLES,
+                        help='Bootstrap resamples for the 95%% confidence intervals (0 to skip)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for the bootstrap (default: all CPUs)')
+    args = parser.parse_args()
+    evaluate_comprehensive(args.bootstrap, args.workers)
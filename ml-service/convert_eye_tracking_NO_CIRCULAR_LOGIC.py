@@ -9,60 +9,58 @@ KEY DIFFERENCE: Labels derived from OBSERVED BEHAVIOR, not programmed rules
 - Pure observation of authentic behavior
 """
 
+import sys
+import argparse
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
-def load_eye_tracking_data():
-    """Load the eye-tracking dataset"""
+sys.path.insert(0, str(Path(__file__).parent / 'training'))
+from dataset_io import save_dataset
+from eye_tracking_engine import (
+    CONVERTER_COLUMNS, TIME_COL, aggregate_table, load_eye_tracking_table,
+    map_reduce_eye_tracking, participant_table, content_type_times
+)
+
+def load_eye_tracking_data(tsv_paths=None, workers=None):
+    """Load the eye-tracking dataset as per-participant aggregates"""
     data_path = Path(__file__).parent / 'data' / 'eye_tracking_data.tsv'
     
     print("=" * 70)
     print("📊 LOADING EYE-TRACKING DATA - ZERO CIRCULAR LOGIC APPROACH")
     print("=" * 70)
-    print(f"📁 Loading from: {data_path}")
-    
-    # Load TSV file
-    df = pd.read_csv(data_path, sep='\t')
-    
-    print(f"✅ Loaded {len(df)} rows")
-    print(f"📊 Participants: {df['Participant ID'].nunique()}")
-    print(f"📊 Slides: {df['Slide Nr.'].nunique()}")
-    print()
-    
-    # Convert European decimal format (comma) to standard format (dot)
-    print("🔧 Converting numeric formats...")
-    numeric_columns = [
-        'Total_duration_of_fixations', 'Average_duration_of_fixations',
-        'Minimum_duration_of_fixations', 'Maximum_duration_of_fixations',
-        'Number_of_fixations', 'Time_to_first_fixation', 'Duration_of_first_fixation',
-        'Average_pupil_diameter', 'Total_duration_of_whole_fixations',
-        'Average_duration_of_whole_fixations', 'Minimum_duration_of_whole_fixations',
-        'Maximum_duration_of_whole_fixations', 'Number_of_whole_fixations',
-        'Time_to_first_whole_fixation', 'Duration_of_first_whole_fixation',
-        'Average_whole-fixation_pupil_diameter', 'Total_duration_of_Visit',
-        'Average_duration_of_Visit', 'Minimum_duration_of_Visit',
-        'Maximum_duration_of_Visit', 'Number_of_Visits', 'Time_to_first_Visit',
-        'Duration_of_first_Visit', 'Total_duration_of_Glances',
-        'Average_duration_of_Glances', 'Minimum_duration_of_Glances',
-        'Maximum_duration_of_Glances', 'Number_of_Glances',
-        'Time_to_first_Glance', 'Duration_of_first_Glance',
-        'Number_of_mouse_clicks', 'Number_of_saccades_in_AOI',
-        'Time_to_entry_saccade', 'Time_to_exit_saccade',
-        'Peak_velocity_of_entry_saccade', 'Peak_velocity_of_exit_saccade'
-    ]
-    
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.replace(',', '.').replace('', '0')
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
     
-    print("✅ Numeric conversion complete")
+    if tsv_paths or workers:
+        # Map-reduce: row blocks aggregated in worker processes, partials merged
+        tsv_paths = tsv_paths or [data_path]
+        print(f"📁 Loading {len(tsv_paths)} file(s): {', '.join(Path(path).name for path in tsv_paths)}")
+        aggregates = map_reduce_eye_tracking(tsv_paths, workers)
+    else:
+        print(f"📁 Loading from: {data_path}")
+        # Typed parse (native comma decimals), cached by file hash after the first run
+        df = load_eye_tracking_table(data_path, columns=CONVERTER_COLUMNS)
+        aggregates = aggregate_table(df)
+    
+    print(f"✅ Loaded {aggregates.rows} rows")
+    print(f"📊 Participants: {len(aggregates.participants)}")
+    print(f"📊 Slides: {len(aggregates.slides)}")
     print()
     
-    return df
+    return aggregates
 
-def calculate_dimension_preferences(df):
+# Per dimension: (first pole content, second pole content, score column)
+# score = (second - first) / (first + second) on that dimension's slides
+DIMENSION_CONTENT = {
+    'Understanding': ('Table of contents', 'Summary', 'active_reflective_score'),
+    'Input': ('Illustrations', 'Key words', 'sensing_intuitive_score'),
+    'Perception': (('additional material', False), ('Supporting text|Multiple choice', False), 'visual_verbal_score'),
+    'Process': ('Example|Exercise', 'Theory', 'sequential_global_score'),
+}
+
+CONTENT_TYPES = ['Illustrations', 'Key words', 'Theory', 'Example', 'Exercise',
+                 'Summary', 'Table of contents', 'Multiple choice', 'Supporting text']
+
+def calculate_dimension_preferences(aggregates):
     """
     Calculate learning preferences from OBSERVED BEHAVIOR on dimension-specific slides
     NO RULES - just measuring what students actually did
@@ -73,92 +71,21 @@ def calculate_dimension_preferences(df):
     print("Key: Using research study's slide design - NO programmed rules!")
     print()
     
-    participants = []
-    
-    for participant_id in df['Participant ID'].unique():
-        participant_data = df[df['Participant ID'] == participant_id]
-        
-        preferences = {
-            'participant_id': participant_id,
-            'active_reflective_score': 0,
-            'sensing_intuitive_score': 0,
-            'visual_verbal_score': 0,
-            'sequential_global_score': 0
-        }
-        
-        # Process each dimension based on research study design
-        
-        # 1. UNDERSTANDING dimension → Active vs Reflective
-        understanding_slides = participant_data[participant_data['Learning Style Dimension'] == 'Understanding']
-        if len(understanding_slides) > 0:
-            # Observe: What did they actually look at?
-            active_content_time = understanding_slides[
-                understanding_slides['Content per AOI'].str.contains('Table of contents', na=False)
-            ]['Total_duration_of_fixations'].sum()
-            
-            reflective_content_time = understanding_slides[
-                understanding_slides['Content per AOI'].str.contains('Summary', na=False)
-            ]['Total_duration_of_fixations'].sum()
-            
-            total_time = active_content_time + reflective_content_time
-            if total_time > 0:
-                # Preference = What they actually spent more time on (OBSERVED, not programmed!)
-                preferences['active_reflective_score'] = (reflective_content_time - active_content_time) / total_time
-        
-        # 2. INPUT dimension → Sensing vs Intuitive  
-        input_slides = participant_data[participant_data['Learning Style Dimension'] == 'Input']
-        if len(input_slides) > 0:
-            # Observe: Did they prefer concrete (illustrations) or abstract (keywords)?
-            sensing_content_time = input_slides[
-                input_slides['Content per AOI'].str.contains('Illustrations', na=False)
-            ]['Total_duration_of_fixations'].sum()
-            
-            intuitive_content_time = input_slides[
-                input_slides['Content per AOI'].str.contains('Key words', na=False)
-            ]['Total_duration_of_fixations'].sum()
-            
-            total_time = sensing_content_time + intuitive_content_time
-            if total_time > 0:
-                # Preference = Actual behavior (OBSERVED!)
-                preferences['sensing_intuitive_score'] = (intuitive_content_time - sensing_content_time) / total_time
-        
-        # 3. PERCEPTION dimension → Visual vs Verbal
-        perception_slides = participant_data[participant_data['Learning Style Dimension'] == 'Perception']
-        if len(perception_slides) > 0:
-            # Observe: Images or text?
-            visual_content_time = perception_slides[
-                perception_slides['Content per AOI'].str.contains('additional material', case=False, na=False)
-            ]['Total_duration_of_fixations'].sum()
-            
-            verbal_content_time = perception_slides[
-                perception_slides['Content per AOI'].str.contains('Supporting text|Multiple choice', case=False, na=False)
-            ]['Total_duration_of_fixations'].sum()
-            
-            total_time = visual_content_time + verbal_content_time
-            if total_time > 0:
-                # Preference = What they looked at more (OBSERVED!)
-                preferences['visual_verbal_score'] = (verbal_content_time - visual_content_time) / total_time
-        
-        # 4. PROCESS dimension → Sequential vs Global
-        process_slides = participant_data[participant_data['Learning Style Dimension'] == 'Process']
-        if len(process_slides) > 0:
-            # Observe: Step-by-step (examples/exercises) or big picture (theory)?
-            sequential_content_time = process_slides[
-                process_slides['Content per AOI'].str.contains('Example|Exercise', na=False)
-            ]['Total_duration_of_fixations'].sum()
-            
-            global_content_time = process_slides[
-                process_slides['Content per AOI'].str.contains('Theory', na=False)
-            ]['Total_duration_of_fixations'].sum()
-            
-            total_time = sequential_content_time + global_content_time
-            if total_time > 0:
-                # Preference = Actual navigation pattern (OBSERVED!)
-                preferences['sequential_global_score'] = (global_content_time - sequential_content_time) / total_time
-        
-        participants.append(preferences)
-    
-    df_preferences = pd.DataFrame(participants)
+    participants = aggregates.participants
+    # Fixation time per (participant, dimension) x content
+    table = aggregates.dimension_content
+    
+    df_preferences = pd.DataFrame({'participant_id': participants})
+    for dimension, (first_pole, second_pole, score_col) in DIMENSION_CONTENT.items():
+        # Observe: how long did they actually look at each pole's content?
+        times = content_type_times(
+            participant_table(table, participants, dimension),
+            {'first': first_pole, 'second': second_pole}
+        )
+        total_time = times['first'] + times['second']
+        # Preference = What they actually spent more time on (OBSERVED, not programmed!)
+        score = (times['second'] - times['first']) / total_time.where(total_time > 0)
+        df_preferences[score_col] = score.fillna(0).values
     
     print(f"✅ Calculated preferences for {len(df_preferences)} participants")
     print()
@@ -171,72 +98,68 @@ def calculate_dimension_preferences(df):
     
     return df_preferences
 
-def aggregate_behavioral_features(df):
+def aggregate_behavioral_features(aggregates):
     """Aggregate behavioral features from eye-tracking metrics"""
     
     print("🔧 AGGREGATING BEHAVIORAL FEATURES")
     print("=" * 70)
     
-    participants = []
-    
-    for participant_id in df['Participant ID'].unique():
-        participant_data = df[df['Participant ID'] == participant_id]
+    participants = aggregates.participants
+    stats = aggregates.stats(
+        total_fixation_time=(TIME_COL, 'sum'),
+        avg_fixation_duration=('Average_duration_of_fixations', 'mean'),
+        total_saccades=('Number_of_saccades_in_AOI', 'sum')
+    )
+    
+    # Aggregate content-specific times
+    content_times = content_type_times(
+        participant_table(aggregates.content, participants),
+        {content_type: content_type for content_type in CONTENT_TYPES}
+    )
+    
+    # Skip participants without any fixation time
+    keep = (stats['total_fixation_time'] != 0).values
+    stats = stats[keep]
+    content_times = content_times[keep]
+    total_fixation_time = stats['total_fixation_time']
+    
+    # Calculate behavioral features (ratios and counts)
+    df_features = pd.DataFrame({
+        'participant_id': stats.index,
         
-        # Calculate total fixation time for normalization
-        total_fixation_time = participant_data['Total_duration_of_fixations'].sum()
+        # Mode ratios (time spent on different content types)
+        'activeModeRatio': (content_times['Exercise'] + content_times['Example']) / total_fixation_time,
+        'reflectiveModeRatio': (content_times['Theory'] + content_times['Summary']) / total_fixation_time,
+        'sensingModeRatio': (content_times['Example'] + content_times['Exercise']) / total_fixation_time,
+        'intuitiveModeRatio': content_times['Theory'] / total_fixation_time,
+        'visualModeRatio': content_times['Illustrations'] / total_fixation_time,
+        'verbalModeRatio': (content_times['Key words'] + content_times['Supporting text']) / total_fixation_time,
+        'sequentialModeRatio': (content_times['Example'] + content_times['Exercise']) / total_fixation_time,
+        'globalModeRatio': (content_times['Table of contents'] + content_times['Summary']) / total_fixation_time,
         
-        if total_fixation_time == 0:
-            continue
+        # Interaction counts (normalized)
+        'questionsGenerated': content_times['Multiple choice'] / 1000,
+        'debatesParticipated': content_times['Exercise'] / 2000,
+        'reflectionsWritten': content_times['Summary'] / 1000,
+        'journalEntries': content_times['Supporting text'] / 2000,
+        'simulationsCompleted': content_times['Example'] / 1000,
+        'challengesCompleted': content_times['Exercise'] / 1500,
+        'conceptsExplored': content_times['Theory'] / 1000,
+        'patternsDiscovered': content_times['Theory'] / 1500,
+        'diagramsViewed': content_times['Illustrations'] / 1000,
+        'wireframesExplored': content_times['Illustrations'] / 1500,
+        'textRead': (content_times['Key words'] + content_times['Supporting text']) / 1000,
+        'summariesCreated': content_times['Summary'] / 2000,
+        'stepsCompleted': content_times['Exercise'] / 1000,
+        'linearNavigation': stats['avg_fixation_duration'] / 10,
+        'overviewsViewed': content_times['Table of contents'] / 1000,
+        'navigationJumps': stats['total_saccades'] / 10,
         
-        # Aggregate content-specific times
-        content_times = {}
-        for content_type in ['Illustrations', 'Key words', 'Theory', 'Example', 'Exercise', 
-                            'Summary', 'Table of contents', 'Multiple choice', 'Supporting text']:
-            content_times[content_type] = participant_data[
-                participant_data['Content per AOI'].str.contains(content_type, na=False)
-            ]['Total_duration_of_fixations'].sum()
-        
-        # Calculate behavioral features (ratios and counts)
-        features = {
-            'participant_id': participant_id,
-            
-            # Mode ratios (time spent on different content types)
-            'activeModeRatio': (content_times['Exercise'] + content_times['Example']) / total_fixation_time,
-            'reflectiveModeRatio': (content_times['Theory'] + content_times['Summary']) / total_fixation_time,
-            'sensingModeRatio': (content_times['Example'] + content_times['Exercise']) / total_fixation_time,
-            'intuitiveModeRatio': content_times['Theory'] / total_fixation_time,
-            'visualModeRatio': content_times['Illustrations'] / total_fixation_time,
-            'verbalModeRatio': (content_times['Key words'] + content_times['Supporting text']) / total_fixation_time,
-            'sequentialModeRatio': (content_times['Example'] + content_times['Exercise']) / total_fixation_time,
-            'globalModeRatio': (content_times['Table of contents'] + content_times['Summary']) / total_fixation_time,
-            
-            # Interaction counts (normalized)
-            'questionsGenerated': content_times['Multiple choice'] / 1000,
-            'debatesParticipated': content_times['Exercise'] / 2000,
-            'reflectionsWritten': content_times['Summary'] / 1000,
-            'journalEntries': content_times['Supporting text'] / 2000,
-            'simulationsCompleted': content_times['Example'] / 1000,
-            'challengesCompleted': content_times['Exercise'] / 1500,
-            'conceptsExplored': content_times['Theory'] / 1000,
-            'patternsDiscovered': content_times['Theory'] / 1500,
-            'diagramsViewed': content_times['Illustrations'] / 1000,
-            'wireframesExplored': content_times['Illustrations'] / 1500,
-            'textRead': (content_times['Key words'] + content_times['Supporting text']) / 1000,
-            'summariesCreated': content_times['Summary'] / 2000,
-            'stepsCompleted': content_times['Exercise'] / 1000,
-            'linearNavigation': participant_data['Average_duration_of_fixations'].mean() / 10,
-            'overviewsViewed': content_times['Table of contents'] / 1000,
-            'navigationJumps': participant_data['Number_of_saccades_in_AOI'].sum() / 10,
-            
-            # AI mode estimates
-            'aiAskModeRatio': content_times['Multiple choice'] / total_fixation_time,
-            'aiResearchModeRatio': content_times['Theory'] / total_fixation_time,
-            'aiTextToDocsRatio': content_times['Supporting text'] / total_fixation_time,
-        }
-        
-        participants.append(features)
-    
-    df_features = pd.DataFrame(participants)
+        # AI mode estimates
+        'aiAskModeRatio': content_times['Multiple choice'] / total_fixation_time,
+        'aiResearchModeRatio': content_times['Theory'] / total_fixation_time,
+        'aiTextToDocsRatio': content_times['Supporting text'] / total_fixation_time,
+    }).reset_index(drop=True)
     
     print(f"✅ Aggregated features for {len(df_features)} participants")
     print()
@@ -254,21 +177,15 @@ def convert_preferences_to_fslsm_labels(df_preferences):
     print("Note: This is just scaling observed scores, NOT applying rules!")
     print()
     
-    labels = []
-    
-    for _, row in df_preferences.iterrows():
-        # Scale observed preferences to FSLSM range (-11 to +11)
-        # The preference scores are already relative (-1 to +1 range)
-        # We just scale them to match FSLSM convention
-        
-        labels.append({
-            'activeReflective': int(np.clip(row['active_reflective_score'] * 11, -11, 11)),
-            'sensingIntuitive': int(np.clip(row['sensing_intuitive_score'] * 11, -11, 11)),
-            'visualVerbal': int(np.clip(row['visual_verbal_score'] * 11, -11, 11)),
-            'sequentialGlobal': int(np.clip(row['sequential_global_score'] * 11, -11, 11))
-        })
-    
-    df_labels = pd.DataFrame(labels)
+    # Scale observed preferences to FSLSM range (-11 to +11)
+    # The preference scores are already relative (-1 to +1 range)
+    # We just scale them to match FSLSM convention (truncated like int())
+    df_labels = pd.DataFrame({
+        'activeReflective': np.clip(df_preferences['active_reflective_score'] * 11, -11, 11).astype(int),
+        'sensingIntuitive': np.clip(df_preferences['sensing_intuitive_score'] * 11, -11, 11).astype(int),
+        'visualVerbal': np.clip(df_preferences['visual_verbal_score'] * 11, -11, 11).astype(int),
+        'sequentialGlobal': np.clip(df_preferences['sequential_global_score'] * 11, -11, 11).astype(int)
+    })
     
     print(f"✅ Scaled {len(df_labels)} preference scores to FSLSM range")
     print()
@@ -310,9 +227,9 @@ def save_training_data(df_features, df_labels, output_file='eye_tracking_trainin
     
     df_combined = df_combined[column_order]
     
-    # Save to CSV
+    # Save to CSV (+ typed Parquet sibling)
     output_path = Path(__file__).parent / 'data' / output_file
-    df_combined.to_csv(output_path, index=False)
+    save_dataset(df_combined, output_path)
     
     print(f"✅ Saved to: {output_path}")
     print(f"📊 Total samples: {len(df_combined)}")
@@ -323,6 +240,12 @@ def save_training_data(df_features, df_labels, output_file='eye_tracking_trainin
 
 def main():
     """Main conversion pipeline - ZERO CIRCULAR LOGIC"""
+    parser = argparse.ArgumentParser(description='Convert eye-tracking exports to training data (zero circular logic)')
+    parser.add_argument('tsv', nargs='*',
+                        help='Eye-tracking TSV exports to combine (default: data/eye_tracking_data.tsv)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Map-reduce the TSVs across this many worker processes (default with files: all cores)')
+    args = parser.parse_args()
     
     print("\n")
     print("=" * 70)
@@ -334,14 +257,14 @@ def main():
     print()
     
     try:
-        # Step 1: Load eye-tracking data
-        df_raw = load_eye_tracking_data()
+        # Step 1: Load eye-tracking data (per-participant aggregates)
+        aggregates = load_eye_tracking_data(args.tsv, args.workers)
         
         # Step 2: Calculate preferences from OBSERVED BEHAVIOR
-        df_preferences = calculate_dimension_preferences(df_raw)
+        df_preferences = calculate_dimension_preferences(aggregates)
         
         # Step 3: Aggregate behavioral features
-        df_features = aggregate_behavioral_features(df_raw)
+        df_features = aggregate_behavioral_features(aggregates)
         
         # Step 4: Scale observed preferences to FSLSM range
         df_labels = convert_preferences_to_fslsm_labels(df_preferences)
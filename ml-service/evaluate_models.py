@@ -4,104 +4,17 @@ Loads existing models and displays their performance metrics
 """
 
 import numpy as np
-import pandas as pd
 from pathlib import Path
-import joblib
-from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
-from sklearn.model_selection import train_test_split
+import sys
 
-def load_data():
-    """Load training data"""
-    project_root = Path(__file__).parent
-    data_path = project_root / 'data' / 'training_data.csv'
-    
-    print("📂 Loading training data...")
-    df = pd.read_csv(data_path)
-    print(f"✅ Loaded {len(df)} samples\n")
-    
-    return df
-
-def engineer_features(X, feature_cols):
-    """Add engineered features (MUST match train_models_improved.py exactly)"""
-    df_features = pd.DataFrame(X, columns=feature_cols)
-    
-    # Add interaction features (ratio features)
-    df_features['active_reflective_ratio'] = df_features['activeModeRatio'] / (df_features['reflectiveModeRatio'] + 0.001)
-    df_features['sensing_intuitive_ratio'] = df_features['sensingModeRatio'] / (df_features['intuitiveModeRatio'] + 0.001)
-    df_features['visual_verbal_ratio'] = df_features['visualModeRatio'] / (df_features['verbalModeRatio'] + 0.001)
-    df_features['sequential_global_ratio'] = df_features['sequentialModeRatio'] / (df_features['globalModeRatio'] + 0.001)
-    
-    # Add activity intensity features
-    df_features['active_intensity'] = df_features['questionsGenerated'] + df_features['debatesParticipated']
-    df_features['reflective_intensity'] = df_features['reflectionsWritten'] + df_features['journalEntries']
-    df_features['sensing_intensity'] = df_features['simulationsCompleted'] + df_features['challengesCompleted']
-    df_features['intuitive_intensity'] = df_features['conceptsExplored'] + df_features['patternsDiscovered']
-    df_features['visual_intensity'] = df_features['diagramsViewed'] + df_features['wireframesExplored']
-    df_features['verbal_intensity'] = df_features['textRead'] + df_features['summariesCreated']
-    df_features['sequential_intensity'] = df_features['stepsCompleted'] + df_features['linearNavigation']
-    df_features['global_intensity'] = df_features['overviewsViewed'] + df_features['navigationJumps']
-    
-    # Add squared features for non-linear relationships
-    for col in ['activeModeRatio', 'sensingModeRatio', 'visualModeRatio', 'sequentialModeRatio']:
-        df_features[f'{col}_squared'] = df_features[col] ** 2
-    
-    # Add AI Assistant interaction features (if columns exist)
-    if 'aiAskModeRatio' in df_features.columns:
-        df_features['ai_active_interaction'] = df_features['aiAskModeRatio'] * df_features['activeModeRatio']
-        df_features['ai_reflective_interaction'] = df_features['aiResearchModeRatio'] * df_features['reflectiveModeRatio']
-        df_features['ai_sensing_interaction'] = df_features['aiTextToDocsRatio'] * df_features['sensingModeRatio']
-    
-    return df_features.values, list(df_features.columns)
+sys.path.insert(0, str(Path(__file__).parent / 'training'))
+from evaluation_engine import load_predictions, split_view, regression_metrics, bundle_files, bundle_exists
 
-def prepare_features(df, use_engineered=True):
-    """Prepare features (MUST match train_models_improved.py exactly)"""
-    # Original feature columns (27 behavioral features - includes AI Assistant)
-    feature_cols = [
-        'activeModeRatio', 'questionsGenerated', 'debatesParticipated',
-        'reflectiveModeRatio', 'reflectionsWritten', 'journalEntries',
-        'aiAskModeRatio', 'aiResearchModeRatio',  # AI Assistant features
-        'sensingModeRatio', 'simulationsCompleted', 'challengesCompleted',
-        'intuitiveModeRatio', 'conceptsExplored', 'patternsDiscovered',
-        'aiTextToDocsRatio',  # AI Assistant feature
-        'visualModeRatio', 'diagramsViewed', 'wireframesExplored',
-        'verbalModeRatio', 'textRead', 'summariesCreated',
-        'sequentialModeRatio', 'stepsCompleted', 'linearNavigation',
-        'globalModeRatio', 'overviewsViewed', 'navigationJumps'
-    ]
-    
-    label_cols = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
-    
-    X = df[feature_cols].values
-    y = {col: df[col].values for col in label_cols}
-    
-    # Add engineered features if using improved models
-    if use_engineered:
-        X, feature_cols = engineer_features(X, feature_cols)
-        print(f"✅ Engineered features: {len(feature_cols)} total features")
-    
-    return X, y, feature_cols
-
-def evaluate_model(model_name, model, scaler, X_test, y_test):
-    """Evaluate a single model"""
-    # Scale features
-    X_test_scaled = scaler.transform(X_test)
-    
-    # Predict
-    y_pred = model.predict(X_test_scaled)
-    
-    # Calculate metrics
-    mae = mean_absolute_error(y_test, y_pred)
-    mse = mean_squared_error(y_test, y_pred)
-    rmse = np.sqrt(mse)
-    r2 = r2_score(y_test, y_pred)
-    
-    return {
-        'mae': mae,
-        'mse': mse,
-        'rmse': rmse,
-        'r2': r2,
-        'accuracy_percent': r2 * 100
-    }
+def evaluate_model(y_test, y_pred):
+    """Metrics of a single model from its cached test predictions"""
+    metrics = regression_metrics(y_test, y_pred)
+    metrics['accuracy_percent'] = metrics['r2'] * 100
+    return metrics
 
 def main():
     """Main evaluation function"""
@@ -117,51 +30,28 @@ def main():
     print("🔍 Checking for trained models...")
     
     # Try improved models first
-    model_files = {
-        'activeReflective': 'active_reflective_improved.pkl',
-        'sensingIntuitive': 'sensing_intuitive_improved.pkl',
-        'visualVerbal': 'visual_verbal_improved.pkl',
-        'sequentialGlobal': 'sequential_global_improved.pkl'
-    }
-    scaler_file = 'scaler_improved.pkl'
-    use_engineered = True
-    
-    # Check if improved models exist
-    improved_exist = all((models_dir / f).exists() for f in model_files.values())
-    improved_scaler_exists = (models_dir / scaler_file).exists()
-    
-    if not improved_exist or not improved_scaler_exists:
+    bundle = 'improved'
+    if not bundle_exists(bundle, models_dir):
         print("⚠️  Improved models not found, checking for regular models...")
-        model_files = {
-            'activeReflective': 'active_reflective.pkl',
-            'sensingIntuitive': 'sensing_intuitive.pkl',
-            'visualVerbal': 'visual_verbal.pkl',
-            'sequentialGlobal': 'sequential_global.pkl'
-        }
-        scaler_file = 'scaler.pkl'
-        use_engineered = False
+        bundle = 'regular'
     else:
         print("✅ Found improved models (with engineered features)")
-    
-    # Load data
-    df = load_data()
-    X, y, feature_cols = prepare_features(df, use_engineered=use_engineered)
-    
-    # Split data (same as training)
-    print("📊 Splitting data (70% train, 15% val, 15% test)...")
-    X_temp, X_test = train_test_split(X, test_size=0.15, random_state=42)
-    print(f"   Test set: {len(X_test)} samples")
-    print(f"   Features: {X_test.shape[1]}\n")
+    scaler_path, model_paths = bundle_files(bundle, models_dir)
     
     # Load scaler
-    scaler_path = models_dir / scaler_file
     if not scaler_path.exists():
         print(f"❌ Scaler not found at {scaler_path}")
         print("   Please train models first using train_models.py")
         return
     
-    print(f"✅ Loading scaler: {scaler_file}")
-    scaler = joblib.load(scaler_path)
+    # Predictions of every row come from the shared prediction cache (one inference pass)
+    data_path = project_root / 'data' / 'training_data.csv'
+    print("📊 Splitting data (70% train, 15% val, 15% test)...")
+    predictions = load_predictions(data_path, bundle, models_dir)
+    y_test, y_pred = split_view(predictions, 'test')
+    print(f"   Test set: {len(predictions['split']['test'])} samples")
+    print(f"   Features: {predictions['n_features']}\n")
+    print(f"✅ Using scaler: {predictions['scaler']}")
     
     # Load and evaluate each model
     print("\n" + "=" * 70)
@@ -171,24 +61,18 @@ def main():
     
     results = {}
     
-    for dim_name, model_file in model_files.items():
-        model_path = models_dir / model_file
+    for dim_name, model_path in model_paths.items():
+        model_file = model_path.name
         
-        if not model_path.exists():
+        if dim_name not in y_pred:
             print(f"❌ Model not found: {model_file}")
             continue
         
         print(f"🎯 Evaluating: {dim_name}")
         print(f"   Model: {model_file}")
         
-        # Load model
-        model = joblib.load(model_path)
-        
-        # Split labels
-        y_temp, y_test_dim = train_test_split(y[dim_name], test_size=0.15, random_state=42)
-        
         # Evaluate
-        metrics = evaluate_model(dim_name, model, scaler, X_test, y_test_dim)
+        metrics = evaluate_model(y_test[dim_name], y_pred[dim_name])
         results[dim_name] = metrics
         
         # Display results
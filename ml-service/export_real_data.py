@@ -1,28 +1,241 @@
 """
 Export Real User Data from MongoDB for Model Retraining
 Combines behavioral data + ILS questionnaire responses
+
+Behavior documents stream through a projected, batched cursor and features
+are derived a chunk at a time, so memory does not grow with the collection.
+--method pipeline does the questionnaire filter, the $lookup join on userId
+and the feature computation server-side (feature_pipeline()).
+
+--workers N splits learningbehaviors into _id ranges (RANGES_PER_WORKER per
+worker), each exported in its own process over its own connection with
+either method; parts are concatenated in _id order, so the CSV is
+byte-identical for any worker count.
+
+--incremental keeps (updatedAt, _id) watermarks for both collections and
+upserts only the changed users into data/real_training_data/ (N_PARTITIONS
+partitions keyed by a hash of userId), which dataset_io and
+combine_datasets.py read in place of the CSV. Deletions (the 90-day TTL)
+are not seen - run --full-refresh now and then.
+
+--benchmark N seeds N app-shaped documents into a scratch database (or
+mongomock) and compares peak memory and time of the export methods.
+
+Usage:
+    python ml-service/export_real_data.py [--method pipeline] [--workers 4]
+    python ml-service/export_real_data.py --incremental [--write-csv]
+    python ml-service/export_real_data.py --benchmark 1000000 --mongomock
 """
 
+import sys
+import json
+import time
+import zlib
+import shutil
+import argparse
+import tracemalloc
+import multiprocessing
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import os
+from bson import ObjectId
 from pymongo import MongoClient
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent / 'training'))
+from dataset_io import (save_dataset, ColumnarWriter, columnar_available, convert_to_columnar, read_dataset,
+                        dataset_exists, partitioned_path, partition_files)
+
+# The 8 learning modes, in the order their times are summed into the total
+BEHAVIOR_MODES = [
+    'activeLearning', 'reflectiveLearning', 'sensingLearning', 'intuitiveLearning',
+    'visualLearning', 'aiNarrator', 'sequentialLearning', 'globalLearning'
+]
+# Exported feature -> (mode, kind, factor): 'ratio' is the mode's share of total time,
+# 'count' its interactions (times an estimate factor)
+EXPORT_FEATURES = {
+    # Active/Reflective features
+    'activeModeRatio': ('activeLearning', 'ratio', None),
+    'questionsGenerated': ('activeLearning', 'count', None),
+    'debatesParticipated': ('activeLearning', 'count', 0.3),  # Estimate
+    'reflectiveModeRatio': ('reflectiveLearning', 'ratio', None),
+    'reflectionsWritten': ('reflectiveLearning', 'count', None),
+    'journalEntries': ('reflectiveLearning', 'count', 0.5),  # Estimate
+    
+    # Sensing/Intuitive features
+    'sensingModeRatio': ('sensingLearning', 'ratio', None),
+    'simulationsCompleted': ('sensingLearning', 'count', None),
+    'challengesCompleted': ('sensingLearning', 'count', 0.7),  # Estimate
+    'intuitiveModeRatio': ('intuitiveLearning', 'ratio', None),
+    'conceptsExplored': ('intuitiveLearning', 'count', None),
+    'patternsDiscovered': ('intuitiveLearning', 'count', 0.6),  # Estimate
+    
+    # Visual/Verbal features
+    'visualModeRatio': ('visualLearning', 'ratio', None),
+    'diagramsViewed': ('visualLearning', 'count', None),
+    'wireframesExplored': ('visualLearning', 'count', 0.8),  # Estimate
+    'verbalModeRatio': ('aiNarrator', 'ratio', None),
+    'textRead': ('aiNarrator', 'count', None),
+    'summariesCreated': ('aiNarrator', 'count', 0.4),  # Estimate
+    
+    # Sequential/Global features
+    'sequentialModeRatio': ('sequentialLearning', 'ratio', None),
+    'stepsCompleted': ('sequentialLearning', 'count', None),
+    'linearNavigation': ('sequentialLearning', 'count', 1.2),  # Estimate
+    'globalModeRatio': ('globalLearning', 'ratio', None),
+    'overviewsViewed': ('globalLearning', 'count', None),
+    'navigationJumps': ('globalLearning', 'count', 0.9),  # Estimate
+}
+LABEL_COLS = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
+EXPORT_COLUMNS = list(EXPORT_FEATURES) + LABEL_COLS
+EXPORT_METHODS = ('python', 'pipeline')
+
+# Server-side projections: only the fields the export reads cross the wire
+BEHAVIOR_PROJECTION = {
+    '_id': 0, 'userId': 1,
+    **{f'modeUsage.{mode}.{field}': 1 for mode in BEHAVIOR_MODES for field in ('totalTime', 'interactions')}
+}
+PROFILE_PROJECTION = {'_id': 0, 'userId': 1, 'dimensions': 1}
+BATCH_SIZE = 5_000  # documents per cursor round trip
+CHUNK_SIZE = 50_000  # behavior documents turned into features at a time
+
+# Incremental export: per-collection (updatedAt, _id) watermarks and a userId-partitioned dataset
+DATA_DIR = Path(__file__).parent / 'data'
+EXPORT_STATE = DATA_DIR / 'real_export_state.json'
+PARTITIONS_DIR = DATA_DIR / 'real_training_data'
+N_PARTITIONS = 64
+USERS_PER_QUERY = 10_000  # userIds per $in query
+
+# Parallel export: learningbehaviors split into _id ranges, one part file per range
+PARTS_DIR = DATA_DIR / 'real_training_data_parts'
+RANGES_PER_WORKER = 4  # more ranges than workers keeps the pool busy when ranges differ in cost
+
+_range_labels = None  # questionnaire labels, set once per worker process
+_inherited_db = None  # in-memory (mongomock) database inherited by forked benchmark workers
+
+def mongodb_uri():
+    """MongoDB URI from the environment, or the local default"""
+    return os.getenv('MONGODB_URI', 'mongodb://localhost:27017/assistive-learning')
 
 def connect_to_mongodb():
     """Connect to MongoDB"""
-    # Get MongoDB URI from environment or use default
-    mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/assistive-learning')
-    
     print(f"📡 Connecting to MongoDB...")
-    client = MongoClient(mongodb_uri)
+    client = MongoClient(mongodb_uri())
     db = client.get_database()
     print(f"✅ Connected to database: {db.name}\n")
     
     return db
 
-def export_real_data(db, output_file='real_training_data.csv'):
-    """Export real user data to CSV format matching synthetic data"""
+def load_questionnaire_labels(profiles, batch_size=BATCH_SIZE, query=None):
+    """ILS dimensions (ground truth) per userId, from questionnaire profiles only"""
+    query = {**(query or {}), 'classificationMethod': 'questionnaire'}
+    cursor = profiles.find(query, PROFILE_PROJECTION, batch_size=batch_size)
+    rows = [(str(profile['userId']), *(profile['dimensions'].get(col) for col in LABEL_COLS))
+            for profile in cursor]
+    labels = pd.DataFrame(rows, columns=['userId'] + LABEL_COLS)
+    # A user with several questionnaire profiles keeps the last one
+    return labels.drop_duplicates('userId', keep='last').set_index('userId')
+
+def iter_chunks(cursor, chunk_size=CHUNK_SIZE):
+    """Lists of up to chunk_size documents from a cursor"""
+    chunk = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def mode_usage_frame(docs, with_ids=False):
+    """userId (+ behaviorId) plus <mode>.totalTime / <mode>.interactions columns (missing values are 0)"""
+    usage = [doc.get('modeUsage') or {} for doc in docs]
+    columns = {'userId': [str(doc['userId']) for doc in docs]}
+    if with_ids:
+        columns['behaviorId'] = [str(doc['_id']) for doc in docs]
+    for mode in BEHAVIOR_MODES:
+        mode_usage = [u.get(mode) or {} for u in usage]
+        for field in ('totalTime', 'interactions'):
+            columns[f'{mode}.{field}'] = [m.get(field, 0) for m in mode_usage]
+    return pd.DataFrame(columns)
+
+def behavior_features(usage, labels):
+    """Features + ground-truth labels of the labelled, active rows of a mode-usage chunk (chunk index kept)"""
+    usage = usage[usage['userId'].isin(labels.index)]
+    total_time = 0
+    for mode in BEHAVIOR_MODES:
+        total_time = total_time + usage[f'{mode}.totalTime']
+    active = total_time != 0  # Skip users with no activity
+    usage, total_time = usage[active], total_time[active]
+
+    features = {}
+    for feature, (mode, kind, factor) in EXPORT_FEATURES.items():
+        if kind == 'ratio':
+            features[feature] = usage[f'{mode}.totalTime'] / total_time
+        else:
+            interactions = usage[f'{mode}.interactions']
+            features[feature] = interactions if factor is None else interactions * factor
+    df = pd.DataFrame(features)
+    label_values = labels.reindex(usage['userId'])
+    for col in LABEL_COLS:
+        df[col] = label_values[col].values
+    return df
+
+def python_feature_chunks(behaviors, labels, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    """Export rows joined and derived here, from projected behavior documents"""
+    cursor = behaviors.find({}, BEHAVIOR_PROJECTION, batch_size=batch_size)
+    for docs in iter_chunks(cursor, chunk_size):
+        yield behavior_features(mode_usage_frame(docs), labels)
+
+def feature_pipeline():
+    """Aggregation pipeline doing the Python path server-side: join, total time, features, labels
+
+    Uses only $lookup localField/foreignField, $filter and $arrayElemAt (MongoDB 3.4+,
+    and mongomock) - no $lookup sub-pipelines.
+    """
+    def usage(mode, field):
+        return {'$ifNull': [f'$modeUsage.{mode}.{field}', 0]}
+
+    features = {}
+    for feature, (mode, kind, factor) in EXPORT_FEATURES.items():
+        if kind == 'ratio':
+            features[feature] = {'$divide': [usage(mode, 'totalTime'), '$totalTime']}
+        else:
+            features[feature] = usage(mode, 'interactions') if factor is None \
+                else {'$multiply': [usage(mode, 'interactions'), factor]}
+
+    return [
+        {'$lookup': {'from': 'learningstyleprofiles', 'localField': 'userId',
+                     'foreignField': 'userId', 'as': 'profile'}},
+        # Only questionnaire profiles are ground truth; the last one wins, as in the Python path
+        {'$addFields': {'profile': {'$filter': {
+            'input': '$profile', 'cond': {'$eq': ['$$this.classificationMethod', 'questionnaire']}}}}},
+        {'$match': {'profile': {'$ne': []}}},
+        {'$addFields': {
+            'profile': {'$arrayElemAt': ['$profile', -1]},
+            'totalTime': {'$add': [usage(mode, 'totalTime') for mode in BEHAVIOR_MODES]}
+        }},
+        {'$match': {'totalTime': {'$ne': 0}}},  # Skip users with no activity
+        {'$project': {'_id': 0, **features, **{col: f'$profile.dimensions.{col}' for col in LABEL_COLS}}}
+    ]
+
+def pipeline_feature_chunks(behaviors, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    """Export rows from the aggregation pipeline - only finished rows cross the wire"""
+    cursor = behaviors.aggregate(feature_pipeline(), batchSize=batch_size, allowDiskUse=True)
+    for rows in iter_chunks(cursor, chunk_size):
+        yield pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+
+def export_real_data(db, output_file='real_training_data.csv', batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE,
+                     method='python', workers=None, uri=None):
+    """Export real user data to CSV format matching synthetic data
+
+    method: 'python' joins and derives features here from projected documents,
+    'pipeline' has MongoDB do it in an aggregation pipeline.
+    workers: export _id ranges of learningbehaviors in that many processes
+    (either method), each connecting to uri on its own.
+    """
     
     print("=" * 70)
     print("📊 EXPORTING REAL USER DATA")
@@ -49,137 +262,357 @@ def export_real_data(db, output_file='real_training_data.csv'):
         print()
         return None
     
-    # Fetch all data
-    print("🔄 Fetching data from MongoDB...")
-    behavior_data = list(behaviors.find({}))
-    profile_data = list(profiles.find({}))
-    
-    # Create user ID to profile mapping
-    profile_map = {}
-    for profile in profile_data:
-        if profile.get('classificationMethod') == 'questionnaire':
-            # Only use profiles with questionnaire data (ground truth)
-            user_id = str(profile['userId'])
-            profile_map[user_id] = profile['dimensions']
+    labels = None
+    if method == 'pipeline':
+        labelled_users = len(profiles.distinct('userId', {'classificationMethod': 'questionnaire'}))
+    else:
+        # Only profiles with questionnaire data (ground truth), only the fields we use
+        print("🔄 Fetching questionnaire profiles from MongoDB...")
+        labels = load_questionnaire_labels(profiles, batch_size)
+        labelled_users = len(labels)
     
-    print(f"✅ Found {len(profile_map)} users with questionnaire data")
+    print(f"✅ Found {labelled_users} users with questionnaire data")
     print()
     
-    if len(profile_map) == 0:
+    if labelled_users == 0:
         print("⚠️  No users have completed the ILS questionnaire yet!")
         print("   Need questionnaire responses for ground truth labels")
         print()
         return None
     
-    # Process behavioral data
-    print("🔧 Processing behavioral data...")
-    real_samples = []
-    
-    for behavior in behavior_data:
-        user_id = str(behavior['userId'])
-        
-        # Only include users who have questionnaire data
-        if user_id not in profile_map:
+    output_path = Path(__file__).parent / 'data' / output_file
+    if workers:
+        return export_ranges(behaviors, labels, output_path, workers, uri, batch_size, chunk_size, method)
+    
+    # Stream behavioral data: projected documents, features derived a chunk at a time
+    # (or finished rows from the server-side pipeline)
+    print(f"🔧 Processing behavioral data ({method}, batches of {batch_size:,}, chunks of {chunk_size:,})...")
+    if method == 'pipeline':
+        chunks = pipeline_feature_chunks(behaviors, batch_size, chunk_size)
+    else:
+        chunks = python_feature_chunks(behaviors, labels, batch_size, chunk_size)
+    return write_export(chunks, output_path)
+
+def write_export(chunks, output_path):
+    """Stream export chunks into the CSV (+ typed Parquet sibling) and print the summary; None if no rows"""
+    write_path = output_path.with_suffix('.csv.tmp')
+    columnar = ColumnarWriter(output_path)
+    n_samples, n_columns = 0, 0
+    label_ranges = {col: [float('inf'), float('-inf')] for col in LABEL_COLS}
+    
+    for df in chunks:
+        if len(df) == 0:
             continue
-        
-        # Extract features from behavior
-        mode_usage = behavior.get('modeUsage', {})
-        
-        # Calculate total time
-        total_time = sum([
-            mode_usage.get('activeLearning', {}).get('totalTime', 0),
-            mode_usage.get('reflectiveLearning', {}).get('totalTime', 0),
-            mode_usage.get('sensingLearning', {}).get('totalTime', 0),
-            mode_usage.get('intuitiveLearning', {}).get('totalTime', 0),
-            mode_usage.get('visualLearning', {}).get('totalTime', 0),
-            mode_usage.get('aiNarrator', {}).get('totalTime', 0),
-            mode_usage.get('sequentialLearning', {}).get('totalTime', 0),
-            mode_usage.get('globalLearning', {}).get('totalTime', 0)
-        ])
-        
-        if total_time == 0:
-            continue  # Skip users with no activity
-        
-        # Extract features (24 base features)
-        sample = {
-            # Active/Reflective features
-            'activeModeRatio': mode_usage.get('activeLearning', {}).get('totalTime', 0) / total_time,
-            'questionsGenerated': mode_usage.get('activeLearning', {}).get('interactions', 0),
-            'debatesParticipated': mode_usage.get('activeLearning', {}).get('interactions', 0) * 0.3,  # Estimate
-            'reflectiveModeRatio': mode_usage.get('reflectiveLearning', {}).get('totalTime', 0) / total_time,
-            'reflectionsWritten': mode_usage.get('reflectiveLearning', {}).get('interactions', 0),
-            'journalEntries': mode_usage.get('reflectiveLearning', {}).get('interactions', 0) * 0.5,  # Estimate
-            
-            # Sensing/Intuitive features
-            'sensingModeRatio': mode_usage.get('sensingLearning', {}).get('totalTime', 0) / total_time,
-            'simulationsCompleted': mode_usage.get('sensingLearning', {}).get('interactions', 0),
-            'challengesCompleted': mode_usage.get('sensingLearning', {}).get('interactions', 0) * 0.7,  # Estimate
-            'intuitiveModeRatio': mode_usage.get('intuitiveLearning', {}).get('totalTime', 0) / total_time,
-            'conceptsExplored': mode_usage.get('intuitiveLearning', {}).get('interactions', 0),
-            'patternsDiscovered': mode_usage.get('intuitiveLearning', {}).get('interactions', 0) * 0.6,  # Estimate
-            
-            # Visual/Verbal features
-            'visualModeRatio': mode_usage.get('visualLearning', {}).get('totalTime', 0) / total_time,
-            'diagramsViewed': mode_usage.get('visualLearning', {}).get('interactions', 0),
-            'wireframesExplored': mode_usage.get('visualLearning', {}).get('interactions', 0) * 0.8,  # Estimate
-            'verbalModeRatio': mode_usage.get('aiNarrator', {}).get('totalTime', 0) / total_time,
-            'textRead': mode_usage.get('aiNarrator', {}).get('interactions', 0),
-            'summariesCreated': mode_usage.get('aiNarrator', {}).get('interactions', 0) * 0.4,  # Estimate
-            
-            # Sequential/Global features
-            'sequentialModeRatio': mode_usage.get('sequentialLearning', {}).get('totalTime', 0) / total_time,
-            'stepsCompleted': mode_usage.get('sequentialLearning', {}).get('interactions', 0),
-            'linearNavigation': mode_usage.get('sequentialLearning', {}).get('interactions', 0) * 1.2,  # Estimate
-            'globalModeRatio': mode_usage.get('globalLearning', {}).get('totalTime', 0) / total_time,
-            'overviewsViewed': mode_usage.get('globalLearning', {}).get('interactions', 0),
-            'navigationJumps': mode_usage.get('globalLearning', {}).get('interactions', 0) * 0.9,  # Estimate
-            
-            # Labels from questionnaire (ground truth)
-            'activeReflective': profile_map[user_id]['activeReflective'],
-            'sensingIntuitive': profile_map[user_id]['sensingIntuitive'],
-            'visualVerbal': profile_map[user_id]['visualVerbal'],
-            'sequentialGlobal': profile_map[user_id]['sequentialGlobal']
-        }
-        
-        real_samples.append(sample)
-    
-    print(f"✅ Processed {len(real_samples)} valid samples")
+        df.to_csv(write_path, mode='a' if n_samples else 'w', header=n_samples == 0, index=False)
+        columnar.write(df)
+        for col in LABEL_COLS:
+            label_ranges[col] = [min(label_ranges[col][0], df[col].min()), max(label_ranges[col][1], df[col].max())]
+        n_samples += len(df)
+        n_columns = len(df.columns)
+    
+    if n_samples:
+        # Save to CSV (+ typed Parquet sibling)
+        write_path.replace(output_path)
+        columnar.close()
+    return print_export_summary(output_path, n_samples, n_columns, label_ranges)
+
+def print_export_summary(output_path, n_samples, n_columns, label_ranges):
+    """Print the row count, output path and label ranges of an export; None if it had no rows"""
+    print(f"✅ Processed {n_samples} valid samples")
     print()
     
-    if len(real_samples) == 0:
+    if n_samples == 0:
         print("⚠️  No valid samples found!")
         print("   Users need more interactions before data is useful")
         print()
         return None
     
-    # Create DataFrame
-    df = pd.DataFrame(real_samples)
-    
-    # Save to CSV
-    output_path = Path(__file__).parent / 'data' / output_file
-    df.to_csv(output_path, index=False)
-    
     print("=" * 70)
     print("✅ EXPORT COMPLETE")
     print("=" * 70)
     print(f"📁 Saved to: {output_path}")
-    print(f"📊 Total samples: {len(df)}")
-    print(f"📊 Features: {len(df.columns) - 4} (+ 4 labels)")
+    print(f"📊 Total samples: {n_samples}")
+    print(f"📊 Features: {n_columns - 4} (+ 4 labels)")
     print()
     
     # Show sample statistics
     print("📈 Sample Statistics:")
-    print(f"   Active/Reflective range: {df['activeReflective'].min():.1f} to {df['activeReflective'].max():.1f}")
-    print(f"   Sensing/Intuitive range: {df['sensingIntuitive'].min():.1f} to {df['sensingIntuitive'].max():.1f}")
-    print(f"   Visual/Verbal range: {df['visualVerbal'].min():.1f} to {df['visualVerbal'].max():.1f}")
-    print(f"   Sequential/Global range: {df['sequentialGlobal'].min():.1f} to {df['sequentialGlobal'].max():.1f}")
+    print(f"   Active/Reflective range: {label_ranges['activeReflective'][0]:.1f} to {label_ranges['activeReflective'][1]:.1f}")
+    print(f"   Sensing/Intuitive range: {label_ranges['sensingIntuitive'][0]:.1f} to {label_ranges['sensingIntuitive'][1]:.1f}")
+    print(f"   Visual/Verbal range: {label_ranges['visualVerbal'][0]:.1f} to {label_ranges['visualVerbal'][1]:.1f}")
+    print(f"   Sequential/Global range: {label_ranges['sequentialGlobal'][0]:.1f} to {label_ranges['sequentialGlobal'][1]:.1f}")
     print()
     
     return output_path
 
+def id_ranges(behaviors, n_ranges):
+    """Split learningbehaviors into about n_ranges contiguous [lower, upper) _id ranges of equal size"""
+    total = behaviors.count_documents({})
+    bounds = []
+    for i in range(1, n_ranges):
+        doc = next(behaviors.find({}, {'_id': 1}).sort('_id', 1).skip(total * i // n_ranges).limit(1), None)
+        if doc is not None and (not bounds or doc['_id'] > bounds[-1]):
+            bounds.append(doc['_id'])
+    edges = [None] + bounds + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+def _init_range_worker(labels):
+    global _range_labels
+    _range_labels = labels
+
+def range_feature_chunks(behaviors, id_query, method, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    """Export rows of the behaviors matching id_query, in _id order (python or pipeline method)"""
+    match = {'_id': id_query} if id_query else {}
+    if method == 'pipeline':
+        stages = [{'$match': match}, {'$sort': {'_id': 1}}] + feature_pipeline()
+        cursor = behaviors.aggregate(stages, batchSize=batch_size, allowDiskUse=True)
+        for rows in iter_chunks(cursor, chunk_size):
+            yield pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+    else:
+        cursor = behaviors.find(match, BEHAVIOR_PROJECTION, batch_size=batch_size).sort('_id', 1)
+        for docs in iter_chunks(cursor, chunk_size):
+            yield behavior_features(mode_usage_frame(docs), _range_labels)
+
+def export_range(task):
+    """Worker: write the export rows of one _id range, in _id order, to a part CSV over its own connection"""
+    uri, db_name, lower, upper, part_path, batch_size, chunk_size, method = task
+    client = MongoClient(uri) if uri else None
+    db = client[db_name] if client else _inherited_db
+    
+    id_query = {}
+    if lower is not None:
+        id_query['$gte'] = lower
+    if upper is not None:
+        id_query['$lt'] = upper
+    n_samples, n_columns = 0, 0
+    label_ranges = {col: [float('inf'), float('-inf')] for col in LABEL_COLS}
+    for df in range_feature_chunks(db['learningbehaviors'], id_query, method, batch_size, chunk_size):
+        if len(df) == 0:
+            continue
+        df.to_csv(part_path, mode='a' if n_samples else 'w', header=n_samples == 0, index=False)
+        for col in LABEL_COLS:
+            label_ranges[col] = [min(label_ranges[col][0], df[col].min()), max(label_ranges[col][1], df[col].max())]
+        n_samples += len(df)
+        n_columns = len(df.columns)
+    if client:
+        client.close()
+    return part_path, n_samples, n_columns, label_ranges
+
+def export_ranges(behaviors, labels, output_path, workers, uri=None, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE,
+                  method='python'):
+    """Export _id ranges of learningbehaviors in parallel, then concatenate the parts in _id order
+
+    Rows come out in _id order whatever the worker count, so the CSV is
+    byte-identical for any --workers. With method='pipeline' each range runs
+    feature_pipeline() behind a $match on _id. Without a uri the workers are
+    forked and use the parent's in-memory database (the mongomock
+    benchmark); where fork is unavailable (Windows) that runs in-process.
+    """
+    if uri is None and workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        print("⚠️  In-memory database needs fork (not available here): exporting in a single process")
+        workers = 1
+    ranges = id_ranges(behaviors, workers * RANGES_PER_WORKER)
+    print(f"🔧 Processing behavioral data ({method}, {len(ranges)} _id ranges, {workers} worker(s), "
+          f"batches of {batch_size:,}, chunks of {chunk_size:,})...")
+    if PARTS_DIR.exists():
+        shutil.rmtree(PARTS_DIR)
+    PARTS_DIR.mkdir(parents=True)
+    tasks = [(uri, behaviors.database.name, lower, upper, PARTS_DIR / f'part-{i:04d}.csv', batch_size, chunk_size,
+              method) for i, (lower, upper) in enumerate(ranges)]
+    
+    if workers == 1:
+        _init_range_worker(labels)
+        results = list(map(export_range, tasks))
+    else:
+        context = multiprocessing.get_context('fork') if uri is None else None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_range_worker,
+                                 initargs=(labels,)) as pool:
+            results = list(pool.map(export_range, tasks))
+    
+    n_samples, n_columns = 0, 0
+    label_ranges = {col: [float('inf'), float('-inf')] for col in LABEL_COLS}
+    write_path = output_path.with_suffix('.csv.tmp')
+    with open(write_path, 'wb') as out:
+        for part_path, part_samples, part_columns, part_ranges in results:
+            if not part_samples:
+                continue
+            with open(part_path, 'rb') as part:
+                header = part.readline()
+                if n_samples == 0:
+                    out.write(header)
+                shutil.copyfileobj(part, out)
+            for col in LABEL_COLS:
+                label_ranges[col] = [min(label_ranges[col][0], part_ranges[col][0]),
+                                     max(label_ranges[col][1], part_ranges[col][1])]
+            n_samples += part_samples
+            n_columns = part_columns
+    shutil.rmtree(PARTS_DIR)
+    
+    if n_samples:
+        write_path.replace(output_path)
+        if columnar_available():
+            convert_to_columnar(output_path, chunk_size)
+    else:
+        write_path.unlink()
+    return print_export_summary(output_path, n_samples, n_columns, label_ranges)
+
+def changed_users(collection, watermark=None, batch_size=BATCH_SIZE):
+    """userIds of the documents changed after an (updatedAt, _id) watermark, and the new watermark"""
+    query = {}
+    if watermark:
+        updated_at, last_id = datetime.fromisoformat(watermark['updatedAt']), ObjectId(watermark['_id'])
+        query = {'$or': [{'updatedAt': {'$gt': updated_at}},
+                         {'updatedAt': updated_at, '_id': {'$gt': last_id}}]}
+    cursor = collection.find(query, {'userId': 1, 'updatedAt': 1}, batch_size=batch_size)
+    users, last = set(), None
+    for doc in cursor.sort([('updatedAt', 1), ('_id', 1)]):
+        users.add(doc['userId'])
+        last = doc
+    if last is not None and last.get('updatedAt') is not None:
+        watermark = {'updatedAt': last['updatedAt'].isoformat(), '_id': str(last['_id'])}
+    return users, watermark
+
+def export_user_rows(db, user_ids, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    """Current export rows of the given users, keyed by userId and behaviorId"""
+    user_ids = list(user_ids)
+    frames = []
+    for start in range(0, len(user_ids), USERS_PER_QUERY):
+        batch = user_ids[start:start + USERS_PER_QUERY]
+        labels = load_questionnaire_labels(db['learningstyleprofiles'], batch_size, {'userId': {'$in': batch}})
+        labelled = [user_id for user_id in batch if str(user_id) in labels.index]
+        if not labelled:
+            continue
+        cursor = db['learningbehaviors'].find({'userId': {'$in': labelled}}, {**BEHAVIOR_PROJECTION, '_id': 1},
+                                              batch_size=batch_size)
+        for docs in iter_chunks(cursor, chunk_size):
+            usage = mode_usage_frame(docs, with_ids=True)
+            rows = behavior_features(usage, labels)
+            rows.insert(0, 'behaviorId', usage.loc[rows.index, 'behaviorId'])
+            rows.insert(0, 'userId', usage.loc[rows.index, 'userId'])
+            frames.append(rows)
+    if not frames:
+        return pd.DataFrame(columns=['userId', 'behaviorId'] + EXPORT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+def partition_of(user_id):
+    """Stable partition number of a userId string"""
+    return zlib.crc32(user_id.encode()) % N_PARTITIONS
+
+def partition_path(index):
+    return PARTITIONS_DIR / f"part-{index:03d}{'.parquet' if columnar_available() else '.csv'}"
+
+def read_partition(path):
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype={'userId': str, 'behaviorId': str})
+
+def upsert_partitions(rows, user_ids):
+    """Replace the rows of every changed user in its partition; returns the number of partitions rewritten"""
+    changed = pd.Series([str(user_id) for user_id in user_ids], dtype=object)
+    changed_partition = changed.map(partition_of)
+    row_partition = rows['userId'].map(partition_of)
+    PARTITIONS_DIR.mkdir(parents=True, exist_ok=True)
+
+    touched = sorted(set(changed_partition))
+    for index in touched:
+        path = partition_path(index)
+        parts = [rows[row_partition == index]]
+        if path.exists():
+            existing = read_partition(path)
+            parts.insert(0, existing[~existing['userId'].isin(set(changed[changed_partition == index]))])
+        merged = pd.concat(parts, ignore_index=True).sort_values(['userId', 'behaviorId'], kind='stable')
+        if len(merged) == 0:
+            path.unlink(missing_ok=True)
+            continue
+        tmp_path = path.with_name(path.name + '.tmp')
+        if path.suffix == '.parquet':
+            merged.to_parquet(tmp_path, index=False)
+        else:
+            merged.to_csv(tmp_path, index=False)
+        tmp_path.replace(path)
+    return len(touched)
+
+def partition_chunks():
+    """The partitioned dataset, one partition at a time, without its key columns"""
+    suffix = '.parquet' if columnar_available() else '.csv'
+    for path in sorted(PARTITIONS_DIR.glob(f'part-*{suffix}')):
+        yield read_partition(path).drop(columns=['userId', 'behaviorId'])
+
+def export_incremental(db, output_file='real_training_data.csv', batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE,
+                       full_refresh=False, write_csv=False):
+    """Re-export only the users whose behaviors or profiles changed since the last run
+
+    Changed users are found through (updatedAt, _id) watermarks on both
+    collections and their rows are upserted into data/real_training_data/
+    (N_PARTITIONS files keyed by a hash of userId). That directory is the
+    dataset: dataset_io and combine_datasets.py read it in place of the CSV,
+    so a run costs O(changed users). write_csv rebuilds the single CSV, only
+    if the partitions changed since it was written. Deleted documents (e.g.
+    the 90-day TTL on learningbehaviors) are not seen - run --full-refresh
+    now and then.
+    """
+    
+    print("=" * 70)
+    print("📊 INCREMENTAL EXPORT OF REAL USER DATA")
+    print("=" * 70)
+    print()
+    
+    state = {} if full_refresh else (json.loads(EXPORT_STATE.read_text()) if EXPORT_STATE.exists() else {})
+    if state and state.get('partitions') != N_PARTITIONS:
+        print(f"⚠️  Partition count changed ({state.get('partitions')} -> {N_PARTITIONS}), exporting everything again")
+        state = {}
+    if not state and PARTITIONS_DIR.exists():
+        shutil.rmtree(PARTITIONS_DIR)
+    if not state:
+        print("🔄 No watermark yet: exporting every user")
+    
+    start = time.time()
+    behavior_users, behavior_watermark = changed_users(db['learningbehaviors'], state.get('behaviors'), batch_size)
+    profile_users, profile_watermark = changed_users(db['learningstyleprofiles'], state.get('profiles'), batch_size)
+    users = behavior_users | profile_users
+    print(f"📂 Changed since last export: {len(behavior_users)} users' behaviors, "
+          f"{len(profile_users)} users' profiles ({len(users)} users)")
+    
+    if users:
+        rows = export_user_rows(db, users, batch_size, chunk_size)
+        touched = upsert_partitions(rows, users)
+        print(f"✅ Upserted {len(rows)} rows of {len(users)} changed users into {touched}/{N_PARTITIONS} partitions "
+              f"({time.time() - start:.1f}s)")
+    else:
+        print("✅ No changes since the last export")
+    print()
+    
+    output_path = DATA_DIR / output_file
+    dataset_path = PARTITIONS_DIR if partition_files(PARTITIONS_DIR) else None
+    if dataset_path is None:
+        print("⚠️  No labelled, active users exported yet")
+        print()
+    elif partitioned_path(output_path) is None:
+        print(f"✅ {output_path.name} is up to date with the {len(partition_files(PARTITIONS_DIR))} partitions")
+        print()
+        dataset_path = output_path
+    elif write_csv:
+        print(f"🔄 Rebuilding {output_path.name} from the partitions...")
+        dataset_path = write_export(partition_chunks(), output_path)
+    else:
+        print(f"📁 Dataset: {PARTITIONS_DIR} ({len(partition_files(PARTITIONS_DIR))} partitions, "
+              f"read in place of {output_path.name}; --write-csv rebuilds the CSV)")
+        print()
+    
+    EXPORT_STATE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_state = EXPORT_STATE.with_suffix('.json.tmp')
+    tmp_state.write_text(json.dumps({
+        'behaviors': behavior_watermark,
+        'profiles': profile_watermark,
+        'partitions': N_PARTITIONS,
+        'updated': datetime.now().isoformat(timespec='seconds')
+    }, indent=2))
+    tmp_state.replace(EXPORT_STATE)
+    return dataset_path
+
 def combine_datasets(synthetic_file='training_data.csv', real_file='real_training_data.csv', 
                      output_file='combined_training_data.csv', real_weight=2.0):
-    """Combine synthetic and real data, giving more weight to real data"""
+    """Combine synthetic and real data, giving more weight to real data via sample_weight"""
     
     print("=" * 70)
     print("🔗 COMBINING DATASETS")
@@ -199,47 +632,241 @@ def combine_datasets(synthetic_file='training_data.csv', real_file='real_trainin
     
     # Load real data
     real_path = data_dir / real_file
-    if not real_path.exists():
+    if not dataset_exists(real_path):
         print(f"⚠️  Real data not found: {real_path}")
         print(f"   Using synthetic data only")
         return synthetic_path
     
-    df_real = pd.read_csv(real_path)
+    # The CSV, or the incremental export's partitions when they are newer
+    df_real = read_dataset(real_path)
     print(f"📂 Loaded real data: {len(df_real)} samples")
     print()
     
-    # Give more weight to real data by duplicating it
-    if real_weight > 1.0:
-        print(f"⚖️  Applying weight {real_weight}x to real data...")
-        df_real_weighted = pd.concat([df_real] * int(real_weight), ignore_index=True)
-        print(f"   Real data expanded: {len(df_real)} → {len(df_real_weighted)} samples")
-    else:
-        df_real_weighted = df_real
-    
-    # Combine datasets
-    df_combined = pd.concat([df_synthetic, df_real_weighted], ignore_index=True)
+    # Give more weight to real data through a sample_weight column (no duplication)
+    print(f"⚖️  Applying sample_weight {real_weight:g} to real data...")
+    df_synthetic = df_synthetic.drop(columns=['source', 'sample_weight'], errors='ignore')
+    df_synthetic['source'] = 'synthetic'
+    df_synthetic['sample_weight'] = 1.0
+    df_real = df_real.drop(columns=['source', 'sample_weight'], errors='ignore')
+    df_real['source'] = 'real_user'
+    df_real['sample_weight'] = float(real_weight)
+    
+    # Combine datasets, merging identical rows into one weighted row
+    df_combined = pd.concat([df_synthetic, df_real], ignore_index=True)
+    value_cols = [c for c in df_combined.columns if c not in ('source', 'sample_weight')]
+    df_combined = (
+        df_combined
+        .groupby(value_cols, sort=False, dropna=False)
+        .agg(source=('source', 'first'), sample_weight=('sample_weight', 'sum'))
+        .reset_index()
+    )
     
     # Shuffle
     df_combined = df_combined.sample(frac=1, random_state=42).reset_index(drop=True)
     
     # Save
     output_path = data_dir / output_file
-    df_combined.to_csv(output_path, index=False)
+    save_dataset(df_combined, output_path)
+    
+    total_weight = df_combined['sample_weight'].sum()
+    real_weight_total = len(df_real) * real_weight
+    duplicated_rows = len(df_synthetic) + len(df_real) * max(int(real_weight), 1)
     
     print()
     print("=" * 70)
     print("✅ COMBINATION COMPLETE")
     print("=" * 70)
     print(f"📁 Saved to: {output_path}")
-    print(f"📊 Total samples: {len(df_combined)}")
-    print(f"   - Synthetic: {len(df_synthetic)} ({len(df_synthetic)/len(df_combined)*100:.1f}%)")
-    print(f"   - Real (weighted): {len(df_real_weighted)} ({len(df_real_weighted)/len(df_combined)*100:.1f}%)")
+    print(f"📊 Total samples: {len(df_combined)} (row duplication would write {duplicated_rows})")
+    print(f"   - Synthetic: {len(df_synthetic)} ({len(df_synthetic)/total_weight*100:.1f}% of weight)")
+    print(f"   - Real (weighted): {len(df_real)} x {real_weight:g} ({real_weight_total/total_weight*100:.1f}% of weight)")
     print()
     
     return output_path
 
+def seed_benchmark_data(db, n_behaviors, users_per_doc=0.1, seed=42):
+    """Fill a scratch database with app-shaped behavior documents and questionnaire profiles"""
+    rng = np.random.default_rng(seed)
+    n_users = max(int(n_behaviors * users_per_doc), 1)
+    user_ids = [ObjectId() for _ in range(n_users)]
+    now = datetime.now()
+    
+    db['learningstyleprofiles'].insert_many([
+        {'userId': user_id,
+         'classificationMethod': 'questionnaire' if i % 5 else 'rule-based',
+         'dimensions': {col: int(v) for col, v in zip(LABEL_COLS, rng.integers(-11, 12, 4))},
+         'confidence': {col: 0.8 for col in LABEL_COLS},
+         'recommendedModes': [{'mode': 'visualLearning', 'priority': 1, 'reason': 'benchmark'}],
+         'lastPrediction': now, 'createdAt': now, 'updatedAt': now}
+        for i, user_id in enumerate(user_ids)
+    ])
+    
+    # The app's schemas index userId on both collections ($lookup relies on it)
+    db['learningstyleprofiles'].create_index('userId')
+    db['learningbehaviors'].create_index('userId')
+    
+    modes = BEHAVIOR_MODES + ['aiAssistant']
+    for start in range(0, n_behaviors, 10_000):
+        size = min(10_000, n_behaviors - start)
+        counts = rng.integers(0, 30, (size, len(modes)))
+        times = rng.integers(0, 600_000, (size, len(modes)))
+        users = rng.integers(0, n_users, size)
+        db['learningbehaviors'].insert_many([
+            {'userId': user_ids[users[i]],
+             'sessionId': f'session-{start + i}',
+             'modeUsage': {mode: {'count': int(counts[i, j]), 'totalTime': int(times[i, j]), 'lastUsed': now}
+                           for j, mode in enumerate(BEHAVIOR_MODES)},
+             'aiAssistantUsage': {'askMode': {'count': int(counts[i, -1]), 'totalTime': int(times[i, -1])},
+                                  'totalInteractions': int(counts[i, -1]), 'averagePromptLength': 42},
+             'contentInteractions': [{'contentType': 'document', 'viewDuration': int(times[i, 0]),
+                                      'completionRate': 80, 'scrollDepth': 60, 'timestamp': now}] * 3,
+             'activityEngagement': {'quizzesCompleted': int(counts[i, 0]), 'sequentialStepsCompleted': int(counts[i, 6])},
+             'learningPace': {'averageSessionDuration': int(times[i, 1]), 'preferredTimeOfDay': 'evening'},
+             'deviceInfo': {'userAgent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)', 'platform': 'Win32',
+                            'screenSize': '1920x1080', 'timezone': 'Asia/Manila'},
+             'timestamp': now, 'createdAt': now, 'updatedAt': now}
+            for i in range(size)
+        ])
+    return n_users
+
+def traced(fn):
+    """(result, seconds, peak traced Python/NumPy memory in MB) of fn()"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def compare_exports(path_a, path_b):
+    """True if two exports hold the same rows (bytes, else values within float rounding)"""
+    if path_a.read_bytes() == path_b.read_bytes():
+        print("[VERIFY] Exports are byte-identical")
+        return True
+    a, b = pd.read_csv(path_a), pd.read_csv(path_b)
+    if a.shape != b.shape or list(a.columns) != list(b.columns):
+        print(f"[VERIFY] Exports differ: {a.shape} vs {b.shape}")
+        return False
+    max_diff = (a - b).abs().max().max()
+    same = np.allclose(a.values, b.values, rtol=1e-12, atol=0, equal_nan=True)
+    print(f"[VERIFY] Exports {'match' if same else 'DIFFER'} (max abs difference {max_diff:.3g})")
+    return same
+
+def worker_counts(max_workers):
+    """1, 2, 4, ... up to max_workers (always included)"""
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    return counts + [max_workers] if max_workers > 1 else counts
+
+def benchmark_export(db, n_behaviors, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE, workers=None, uri=None):
+    """Peak memory and time: materializing both collections (the old export) vs both streaming methods
+
+    With workers, also times the range-partitioned export at 1, 2, 4, ... workers
+    and checks that every worker count writes the same bytes.
+    """
+    print(f"[BENCH] Seeding {n_behaviors:,} behavior documents into '{db.name}'...")
+    start = time.time()
+    n_users = seed_benchmark_data(db, n_behaviors)
+    print(f"[BENCH] Seeded {n_behaviors:,} behaviors / {n_users:,} profiles in {time.time() - start:.1f}s\n")
+    
+    def materialize():
+        return len(list(db['learningbehaviors'].find({}))) + len(list(db['learningstyleprofiles'].find({})))
+    results = {'list(find({})) of both collections': traced(materialize)}
+    for method in EXPORT_METHODS:
+        results[f'Streaming export ({method})'] = traced(
+            lambda: export_real_data(db, f'real_training_data_benchmark_{method}.csv', batch_size, chunk_size, method))
+    
+    print(f"[BENCH] {n_behaviors:,} behavior documents (batch_size={batch_size:,}, chunk_size={chunk_size:,})")
+    print(f"{'Method':<40} {'Time':>10} {'Peak memory':>14}")
+    print("-" * 66)
+    for name, (_, seconds, peak) in results.items():
+        print(f"{name:<40} {seconds:>9.1f}s {peak:>11.1f} MB")
+    print("   (list(find) is only the fetch of the old export - its per-user loop came on top)")
+    if type(db).__module__.startswith('mongomock'):
+        print("   (mongomock cursors materialize every match, so here all peaks grow with N;")
+        print("    against mongod the streaming peaks are bounded by chunk_size)")
+    
+    paths = [results[f'Streaming export ({method})'][0] for method in EXPORT_METHODS]
+    if all(paths):
+        compare_exports(*paths)
+    if workers:
+        paths += benchmark_scaling(db, workers, uri, batch_size, chunk_size, serial_path=paths[0])
+    for path in filter(None, paths):
+        path.unlink()
+        path.with_suffix('.parquet').unlink(missing_ok=True)
+
+def benchmark_scaling(db, max_workers, uri=None, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE, serial_path=None):
+    """Wall time of the range-partitioned export per worker count; returns the export paths"""
+    timings, paths = {}, []
+    for workers in worker_counts(max_workers):
+        start = time.perf_counter()
+        path = export_real_data(db, f'real_training_data_benchmark_w{workers}.csv', batch_size, chunk_size,
+                                workers=workers, uri=uri)
+        timings[workers] = time.perf_counter() - start
+        paths.append(path)
+    
+    print(f"[BENCH] Range-partitioned export ({os.cpu_count()} CPUs)")
+    print(f"{'Workers':>8} {'Time':>10} {'Speedup':>9}")
+    print("-" * 30)
+    for workers, seconds in timings.items():
+        print(f"{workers:>8} {seconds:>9.1f}s {timings[1] / seconds:>8.2f}x")
+    if all(paths):
+        identical = all(path.read_bytes() == paths[0].read_bytes() for path in paths[1:])
+        print(f"[VERIFY] Exports of every worker count are {'byte-identical' if identical else 'DIFFERENT'}")
+        if serial_path:
+            compare_exports(serial_path, paths[0])
+    return paths
+
 def main():
     """Main export function"""
+    parser = argparse.ArgumentParser(description='Export real user data from MongoDB for retraining')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='Documents per MongoDB cursor round trip')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help='Behavior documents turned into features at a time')
+    parser.add_argument('--method', choices=EXPORT_METHODS, default='python',
+                        help="Join and derive features here ('python') or in a MongoDB aggregation pipeline")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Export _id ranges of learningbehaviors in N processes, each with its own '
+                             'connection (default: one cursor); with --benchmark, the largest worker count timed')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Re-export only users whose behaviors/profiles changed since the last run '
+                             '(watermarks in data/real_export_state.json, rows in data/real_training_data/)')
+    parser.add_argument('--write-csv', action='store_true',
+                        help='With --incremental: also rebuild data/real_training_data.csv from the partitions '
+                             '(skipped when they have not changed since)')
+    parser.add_argument('--full-refresh', action='store_true',
+                        help='With --incremental: drop the watermarks and partitions and export everything '
+                             '(picks up deleted documents)')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help='Seed N synthetic behavior documents into a scratch database and compare '
+                             'peak memory of the old export and both methods, and verify they agree (e.g. 1000000)')
+    parser.add_argument('--mongomock', action='store_true',
+                        help='Run --benchmark against an in-memory mongomock database instead of MONGODB_URI')
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        if args.mongomock:
+            try:
+                import mongomock
+            except ImportError:
+                print("[ERROR] mongomock is not installed: pip install mongomock")
+                return
+            global _inherited_db
+            _inherited_db = mongomock.MongoClient()['export_benchmark']
+            benchmark_export(_inherited_db, args.benchmark, args.batch_size, args.chunk_size, args.workers)
+        else:
+            db = connect_to_mongodb()
+            scratch = db.client[f'{db.name}_export_benchmark']
+            try:
+                benchmark_export(scratch, args.benchmark, args.batch_size, args.chunk_size, args.workers,
+                                 mongodb_uri())
+            finally:
+                db.client.drop_database(scratch.name)
+        return
+    
     print("\n")
     print("=" * 70)
     print("🚀 REAL DATA EXPORT & COMBINATION TOOL")
@@ -251,9 +878,21 @@ def main():
         db = connect_to_mongodb()
         
         # Export real data
-        real_data_path = export_real_data(db)
+        if args.incremental or args.full_refresh:
+            real_data_path = export_incremental(db, batch_size=args.batch_size, chunk_size=args.chunk_size,
+                                                full_refresh=args.full_refresh, write_csv=args.write_csv)
+        else:
+            real_data_path = export_real_data(db, batch_size=args.batch_size, chunk_size=args.chunk_size,
+                                              method=args.method, workers=args.workers, uri=mongodb_uri())
         
-        if real_data_path:
+        if real_data_path and (args.incremental or args.full_refresh):
+            # No full combine here - that would make every incremental run O(total users) again
+            print("🎯 NEXT STEPS:")
+            print("   1. Run: python retrain_incremental.py (from training/) - warm-start on the changed rows")
+            print("   2. Or: python combine_datasets.py, then python training/train_models_improved.py")
+            print("   Both read the partitions directly")
+            print()
+        elif real_data_path:
             # Combine with synthetic data
             combined_path = combine_datasets(real_weight=2.0)
             
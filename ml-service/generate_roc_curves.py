@@ -1,318 +1,225 @@
 """
 Generate ROC Curve Visualizations for FSLSM Learning Style Models
+
+The per-class and micro-average ROC curves of every dimension are computed
+once and saved to evaluation_results/roc_curve_data.json. The five PNGs (the
+combined 2x2 view and one per dimension) are then rendered from that data
+in parallel worker processes with the non-interactive Agg backend.
+matplotlib is imported only by the rendering workers, so --data-only never
+loads it.
+
+Usage:
+    python generate_roc_curves.py [--workers 5] [--data-only] [--output-dir evaluation_results]
 """
 
-import pandas as pd
+import argparse
+import json
 import numpy as np
-import joblib
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import label_binarize, StandardScaler
 from sklearn.metrics import roc_curve, auc
+from concurrent.futures import ProcessPoolExecutor
 from itertools import cycle
 import os
-
-def engineer_features(X, feature_cols):
-    """Add engineered features (same as training script)"""
-    df_features = pd.DataFrame(X, columns=feature_cols)
-    
-    # Ratio features
-    df_features['active_reflective_ratio'] = df_features['activeModeRatio'] / (df_features['reflectiveModeRatio'] + 0.001)
-    df_features['sensing_intuitive_ratio'] = df_features['sensingModeRatio'] / (df_features['intuitiveModeRatio'] + 0.001)
-    df_features['visual_verbal_ratio'] = df_features['visualModeRatio'] / (df_features['verbalModeRatio'] + 0.001)
-    df_features['sequential_global_ratio'] = df_features['sequentialModeRatio'] / (df_features['globalModeRatio'] + 0.001)
-    
-    # Intensity features
-    df_features['active_intensity'] = df_features['questionsGenerated'] + df_features['debatesParticipated']
-    df_features['reflective_intensity'] = df_features['reflectionsWritten'] + df_features['journalEntries']
-    df_features['sensing_intensity'] = df_features['simulationsCompleted'] + df_features['challengesCompleted']
-    df_features['intuitive_intensity'] = df_features['conceptsExplored'] + df_features['patternsDiscovered']
-    df_features['visual_intensity'] = df_features['diagramsViewed'] + df_features['wireframesExplored']
-    df_features['verbal_intensity'] = df_features['textRead'] + df_features['summariesCreated']
-    df_features['sequential_intensity'] = df_features['stepsCompleted'] + df_features['linearNavigation']
-    df_features['global_intensity'] = df_features['overviewsViewed'] + df_features['navigationJumps']
-    
-    # Squared features
-    for col in ['activeModeRatio', 'sensingModeRatio', 'visualModeRatio', 'sequentialModeRatio']:
-        df_features[f'{col}_squared'] = df_features[col] ** 2
-    
-    # AI interaction features
-    if 'aiAskModeRatio' in df_features.columns:
-        df_features['ai_active_interaction'] = df_features['aiAskModeRatio'] * df_features['activeModeRatio']
-        df_features['ai_reflective_interaction'] = df_features['aiResearchModeRatio'] * df_features['reflectiveModeRatio']
-        df_features['ai_sensing_interaction'] = df_features['aiTextToDocsRatio'] * df_features['sensingModeRatio']
-    
-    return df_features.values
-
-def categorize_score(score):
-    """Convert continuous FSLSM score to category"""
-    if score <= -7:
-        return 'Strong_Negative'
-    elif score <= -3:
-        return 'Moderate_Negative'
-    elif score <= 2:
-        return 'Balanced'
-    elif score <= 6:
-        return 'Moderate_Positive'
-    else:
-        return 'Strong_Positive'
-
-print("=" * 80)
-print("🎨 ROC CURVE VISUALIZATION GENERATOR")
-print("=" * 80)
-
-# Load data
-print("\n📂 Loading data...")
-data_path = 'data/combined_training_data_NO_CIRCULAR.csv'
-df = pd.read_csv(data_path)
-print(f"✅ Loaded {len(df)} samples")
-
-# Define feature and label columns
-feature_cols = [
-    'activeModeRatio', 'questionsGenerated', 'debatesParticipated',
-    'reflectiveModeRatio', 'reflectionsWritten', 'journalEntries',
-    'aiAskModeRatio', 'aiResearchModeRatio',
-    'sensingModeRatio', 'simulationsCompleted', 'challengesCompleted',
-    'intuitiveModeRatio', 'conceptsExplored', 'patternsDiscovered',
-    'aiTextToDocsRatio',
-    'visualModeRatio', 'diagramsViewed', 'wireframesExplored',
-    'verbalModeRatio', 'textRead', 'summariesCreated',
-    'sequentialModeRatio', 'stepsCompleted', 'linearNavigation',
-    'globalModeRatio', 'overviewsViewed', 'navigationJumps'
-]
-
-label_cols = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
-
-# Prepare features
-X = df[feature_cols].values
-X_engineered = engineer_features(X, feature_cols)
-
-# Split data (same as training: 70/15/15)
-print("\n🔪 Splitting data (70% train, 15% val, 15% test)...")
-X_temp, X_test = train_test_split(X_engineered, test_size=0.15, random_state=42)
-X_train, X_val = train_test_split(X_temp, test_size=0.176, random_state=42)
-print(f"Test samples: {len(X_test)}")
-
-# Load scaler
-scaler = joblib.load('models/scaler_improved.pkl')
-X_test_scaled = scaler.transform(X_test)
-
-# Split labels
-y_labels = {}
-for dim_name in label_cols:
-    y_temp, y_test_full = train_test_split(df[dim_name].values, test_size=0.15, random_state=42)
-    _, y_val = train_test_split(y_temp, test_size=0.176, random_state=42)
-    y_labels[dim_name] = y_test_full
-
-# Load models
-dimensions = {
-    'activeReflective': 'active_reflective_improved.pkl',
-    'sensingIntuitive': 'sensing_intuitive_improved.pkl',
-    'visualVerbal': 'visual_verbal_improved.pkl',
-    'sequentialGlobal': 'sequential_global_improved.pkl'
-}
-
-models = {}
-for dim_name, model_file in dimensions.items():
-    models[dim_name] = joblib.load(f'models/{model_file}')
-
-# Create output directory
-output_dir = 'evaluation_results'
-os.makedirs(output_dir, exist_ok=True)
-
-# Create figure with subplots
-fig, axes = plt.subplots(2, 2, figsize=(16, 14))
-fig.suptitle('ROC Curves for FSLSM Learning Style Prediction Models', 
-             fontsize=16, fontweight='bold', y=0.995)
-
-axes = axes.flatten()
-
-print("\n" + "=" * 80)
-print("📊 GENERATING ROC CURVES")
-print("=" * 80)
-
-for idx, dim_name in enumerate(label_cols):
-    print(f"\n🎯 Processing: {dim_name}")
-    
-    # Get test labels and predictions
-    y_test = y_labels[dim_name]
-    model = models[dim_name]
-    y_pred = model.predict(X_test_scaled)
-    
-    # Convert to categories
-    y_test_categories = np.array([categorize_score(s) for s in y_test])
-    y_pred_categories = np.array([categorize_score(s) for s in y_pred])
-    
-    # Get unique classes
-    classes = sorted(np.unique(y_test_categories))
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'training'))
+from evaluation_engine import load_predictions, split_view
+from score_bins import categorize, CATEGORY_NAMES
+
+LABEL_COLS = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
+CLASS_COLORS = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6']
+DATA_FILE = 'roc_curve_data.json'
+
+def category_indicators(y_test, y_pred):
+    """Class names present in y_test (sorted by name) and one-hot true/predicted category matrices"""
+    true_codes, pred_codes = categorize(y_test), categorize(y_pred)
+    classes = sorted(np.unique(true_codes), key=lambda code: CATEGORY_NAMES[code])
+    codes = np.array(classes, dtype=np.int8)
+    return ([CATEGORY_NAMES[code] for code in classes],
+            (true_codes[:, None] == codes).astype(int), (pred_codes[:, None] == codes).astype(int))
+
+def dimension_roc(y_test, y_pred):
+    """Per-class (and micro-average) ROC curves and AUCs of one dimension, as plain lists"""
+    classes, y_test_bin, y_pred_bin = category_indicators(y_test, y_pred)
     n_classes = len(classes)
-    
-    print(f"   Classes: {classes}")
-    print(f"   Number of classes: {n_classes}")
-    
-    # Binarize the output
-    y_test_bin = label_binarize(y_test_categories, classes=classes)
-    y_pred_bin = label_binarize(y_pred_categories, classes=classes)
-    
+
     # Handle single class case
     if n_classes == 2:
-        y_test_bin = y_test_bin.ravel()
-        y_pred_bin = y_pred_bin.ravel()
-    
-    # Compute ROC curve and ROC area for each class
-    fpr = dict()
-    tpr = dict()
-    roc_auc = dict()
-    
+        y_test_bin = y_test_bin[:, 1]
+        y_pred_bin = y_pred_bin[:, 1]
+
+    curves = []
     for i, class_name in enumerate(classes):
         if n_classes > 2:
-            fpr[i], tpr[i], _ = roc_curve(y_test_bin[:, i], y_pred_bin[:, i])
+            fpr, tpr, _ = roc_curve(y_test_bin[:, i], y_pred_bin[:, i])
         else:
-            fpr[i], tpr[i], _ = roc_curve(y_test_bin, y_pred_bin)
-        roc_auc[i] = auc(fpr[i], tpr[i])
-    
-    # Compute micro-average ROC curve
+            fpr, tpr, _ = roc_curve(y_test_bin, y_pred_bin)
+        curves.append({'class': class_name, 'fpr': fpr.tolist(), 'tpr': tpr.tolist(), 'auc': auc(fpr, tpr)})
+
+    micro = None
     if n_classes > 2:
-        fpr["micro"], tpr["micro"], _ = roc_curve(y_test_bin.ravel(), y_pred_bin.ravel())
-        roc_auc["micro"] = auc(fpr["micro"], tpr["micro"])
-    
-    # Plot ROC curves
-    ax = axes[idx]
-    
+        fpr, tpr, _ = roc_curve(y_test_bin.ravel(), y_pred_bin.ravel())
+        micro = {'fpr': fpr.tolist(), 'tpr': tpr.tolist(), 'auc': auc(fpr, tpr)}
+
+    return {
+        'classes': classes,
+        'curves': curves,
+        'micro': micro,
+        'overall_auc': float(np.mean([curve['auc'] for curve in curves]))
+    }
+
+def compute_roc_data(y_labels, y_preds):
+    """{dimension: ROC curves} for every dimension, computed once"""
+    roc_data = {}
+    for dim_name in LABEL_COLS:
+        print(f"\n🎯 Processing: {dim_name}")
+        roc_data[dim_name] = dimension_roc(y_labels[dim_name], y_preds[dim_name])
+        print(f"   Classes: {roc_data[dim_name]['classes']}")
+        print(f"   Number of classes: {len(roc_data[dim_name]['classes'])}")
+        print(f"   ✅ Overall AUC: {roc_data[dim_name]['overall_auc']:.4f}")
+    return roc_data
+
+def pyplot():
+    """matplotlib.pyplot on the headless Agg backend (imported on first use)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def plot_dimension(ax, dim_roc, line_width, micro_width):
+    """Diagonal, per-class curves and micro-average of one dimension on an axis"""
     # Plot diagonal line (random classifier)
     ax.plot([0, 1], [0, 1], 'k--', lw=2, label='Random Classifier (AUC = 0.50)')
-    
-    # Colors for different classes
-    colors = cycle(['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6'])
-    
+
     # Plot ROC curve for each class
-    for i, color, class_name in zip(range(n_classes), colors, classes):
-        ax.plot(fpr[i], tpr[i], color=color, lw=2.5,
-                label=f'{class_name} (AUC = {roc_auc[i]:.3f})')
-    
+    for curve, color in zip(dim_roc['curves'], cycle(CLASS_COLORS)):
+        ax.plot(curve['fpr'], curve['tpr'], color=color, lw=line_width,
+                label=f"{curve['class']} (AUC = {curve['auc']:.3f})")
+
     # Plot micro-average if multi-class
-    if n_classes > 2 and "micro" in roc_auc:
-        ax.plot(fpr["micro"], tpr["micro"], color='navy', lw=3, linestyle=':',
-                label=f'Micro-average (AUC = {roc_auc["micro"]:.3f})')
-    
-    # Formatting
+    if dim_roc['micro'] is not None:
+        ax.plot(dim_roc['micro']['fpr'], dim_roc['micro']['tpr'], color='navy', lw=micro_width, linestyle=':',
+                label=f"Micro-average (AUC = {dim_roc['micro']['auc']:.3f})")
+
     ax.set_xlim([0.0, 1.0])
     ax.set_ylim([0.0, 1.05])
-    ax.set_xlabel('False Positive Rate', fontsize=11, fontweight='bold')
-    ax.set_ylabel('True Positive Rate', fontsize=11, fontweight='bold')
-    ax.set_title(f'{dim_name}', fontsize=13, fontweight='bold', pad=10)
-    ax.legend(loc="lower right", fontsize=9, framealpha=0.95)
     ax.grid(True, alpha=0.3, linestyle='--')
     ax.set_aspect('equal')
-    
-    # Calculate overall AUC
-    overall_auc = np.mean([roc_auc[i] for i in range(n_classes)])
-    print(f"   ✅ Overall AUC: {overall_auc:.4f}")
-
-# Adjust layout
-plt.tight_layout()
-
-# Save figure
-output_path = os.path.join(output_dir, 'roc_curves_all_dimensions.png')
-plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
-print(f"\n💾 Saved combined ROC curves to: {output_path}")
-
-# Create individual plots
-print("\n" + "=" * 80)
-print("📊 GENERATING INDIVIDUAL ROC CURVES")
-print("=" * 80)
-
-for dim_name in label_cols:
-    print(f"\n🎯 Creating individual plot: {dim_name}")
-    
-    # Get test labels and predictions
-    y_test = y_labels[dim_name]
-    model = models[dim_name]
-    y_pred = model.predict(X_test_scaled)
-    
-    # Convert to categories
-    y_test_categories = np.array([categorize_score(s) for s in y_test])
-    y_pred_categories = np.array([categorize_score(s) for s in y_pred])
-    
-    classes = sorted(np.unique(y_test_categories))
-    n_classes = len(classes)
-    
-    # Binarize
-    y_test_bin = label_binarize(y_test_categories, classes=classes)
-    y_pred_bin = label_binarize(y_pred_categories, classes=classes)
-    
-    if n_classes == 2:
-        y_test_bin = y_test_bin.ravel()
-        y_pred_bin = y_pred_bin.ravel()
-    
-    # Compute ROC curves
-    fpr = dict()
-    tpr = dict()
-    roc_auc = dict()
-    
-    for i, class_name in enumerate(classes):
-        if n_classes > 2:
-            fpr[i], tpr[i], _ = roc_curve(y_test_bin[:, i], y_pred_bin[:, i])
-        else:
-            fpr[i], tpr[i], _ = roc_curve(y_test_bin, y_pred_bin)
-        roc_auc[i] = auc(fpr[i], tpr[i])
-    
-    if n_classes > 2:
-        fpr["micro"], tpr["micro"], _ = roc_curve(y_test_bin.ravel(), y_pred_bin.ravel())
-        roc_auc["micro"] = auc(fpr["micro"], tpr["micro"])
-    
-    # Create individual plot
+
+def render_combined(roc_data, output_path):
+    """2x2 figure with the ROC curves of all four dimensions"""
+    plt = pyplot()
+    fig, axes = plt.subplots(2, 2, figsize=(16, 14))
+    fig.suptitle('ROC Curves for FSLSM Learning Style Prediction Models',
+                 fontsize=16, fontweight='bold', y=0.995)
+
+    for ax, dim_name in zip(axes.flatten(), LABEL_COLS):
+        plot_dimension(ax, roc_data[dim_name], line_width=2.5, micro_width=3)
+        ax.set_xlabel('False Positive Rate', fontsize=11, fontweight='bold')
+        ax.set_ylabel('True Positive Rate', fontsize=11, fontweight='bold')
+        ax.set_title(f'{dim_name}', fontsize=13, fontweight='bold', pad=10)
+        ax.legend(loc="lower right", fontsize=9, framealpha=0.95)
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close(fig)
+
+def render_dimension(dim_name, dim_roc, output_path):
+    """Single-dimension ROC figure with an overall-AUC box"""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(10, 8))
-    
-    # Plot diagonal
-    ax.plot([0, 1], [0, 1], 'k--', lw=2, label='Random Classifier (AUC = 0.50)')
-    
-    # Colors
-    colors = cycle(['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6'])
-    
-    # Plot each class
-    for i, color, class_name in zip(range(n_classes), colors, classes):
-        ax.plot(fpr[i], tpr[i], color=color, lw=3,
-                label=f'{class_name} (AUC = {roc_auc[i]:.3f})')
-    
-    # Plot micro-average
-    if n_classes > 2 and "micro" in roc_auc:
-        ax.plot(fpr["micro"], tpr["micro"], color='navy', lw=3.5, linestyle=':',
-                label=f'Micro-average (AUC = {roc_auc["micro"]:.3f})')
-    
-    # Formatting
-    ax.set_xlim([0.0, 1.0])
-    ax.set_ylim([0.0, 1.05])
+    plot_dimension(ax, dim_roc, line_width=3, micro_width=3.5)
     ax.set_xlabel('False Positive Rate', fontsize=13, fontweight='bold')
     ax.set_ylabel('True Positive Rate', fontsize=13, fontweight='bold')
     ax.set_title(f'ROC Curve - {dim_name}', fontsize=15, fontweight='bold', pad=15)
     ax.legend(loc="lower right", fontsize=11, framealpha=0.95)
-    ax.grid(True, alpha=0.3, linestyle='--')
-    ax.set_aspect('equal')
-    
+
     # Add text box with overall AUC
-    overall_auc = np.mean([roc_auc[i] for i in range(n_classes)])
-    textstr = f'Overall AUC: {overall_auc:.4f}'
+    textstr = f"Overall AUC: {dim_roc['overall_auc']:.4f}"
     props = dict(boxstyle='round', facecolor='wheat', alpha=0.8)
     ax.text(0.65, 0.15, textstr, transform=ax.transAxes, fontsize=12,
             verticalalignment='top', bbox=props, fontweight='bold')
-    
+
     plt.tight_layout()
-    
-    # Save
-    output_path = os.path.join(output_dir, f'roc_curve_{dim_name}.png')
     plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
-    print(f"   💾 Saved to: {output_path}")
-    plt.close()
-
-print("\n" + "=" * 80)
-print("✅ ROC CURVE GENERATION COMPLETE")
-print("=" * 80)
-print(f"\n📁 All visualizations saved to: {output_dir}/")
-print("\nGenerated files:")
-print("  • roc_curves_all_dimensions.png (combined view)")
-print("  • roc_curve_activeReflective.png")
-print("  • roc_curve_sensingIntuitive.png")
-print("  • roc_curve_visualVerbal.png")
-print("  • roc_curve_sequentialGlobal.png")
-print("\n" + "=" * 80)
+    plt.close(fig)
+
+def render_task(task):
+    """Worker: render one PNG (dim_name None = the combined view) and return its path"""
+    dim_name, roc_data, output_path = task
+    if dim_name is None:
+        render_combined(roc_data, output_path)
+    else:
+        render_dimension(dim_name, roc_data[dim_name], output_path)
+    return output_path
+
+def render_all(roc_data, output_dir, workers=None):
+    """Render the five PNGs in parallel; returns their paths in a fixed order"""
+    tasks = [(None, roc_data, os.path.join(output_dir, 'roc_curves_all_dimensions.png'))]
+    tasks += [(dim_name, roc_data, os.path.join(output_dir, f'roc_curve_{dim_name}.png')) for dim_name in LABEL_COLS]
+    workers = min(workers or os.cpu_count(), len(tasks))
+    if workers == 1:
+        return [render_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_task, tasks))
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate ROC curve data and visualizations for the FSLSM models')
+    parser.add_argument('--data-only', action='store_true', help=f'Only compute and save {DATA_FILE} (no images)')
+    parser.add_argument('--workers', type=int, default=None, help='Rendering processes (default: all CPUs, at most 5)')
+    parser.add_argument('--output-dir', default='evaluation_results')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🎨 ROC CURVE VISUALIZATION GENERATOR")
+    print("=" * 80)
+
+    # Load data
+    print("\n📂 Loading data...")
+    data_path = 'data/combined_training_data_NO_CIRCULAR.csv'
+    predictions = load_predictions(data_path, 'improved', 'models')
+    print(f"✅ Loaded {predictions['rows']} samples")
+
+    # Split data (same as training: 70/15/15, indices stored in the feature cache)
+    print("\n🔪 Splitting data (70% train, 15% val, 15% test)...")
+    print(f"Test samples: {len(predictions['split']['test'])}")
+
+    # Test labels and predictions (shared prediction cache - one inference pass)
+    y_labels, y_preds = split_view(predictions, 'test')
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print("\n" + "=" * 80)
+    print("📊 COMPUTING ROC CURVES")
+    print("=" * 80)
+    roc_data = compute_roc_data(y_labels, y_preds)
+
+    data_path = os.path.join(args.output_dir, DATA_FILE)
+    with open(data_path, 'w') as f:
+        json.dump(roc_data, f, indent=2)
+    print(f"\n💾 Saved ROC curve data to: {data_path}")
+
+    if args.data_only:
+        print("\n✅ ROC CURVE DATA COMPLETE (--data-only: no images rendered)")
+        return
+
+    print("\n" + "=" * 80)
+    print("📊 RENDERING ROC CURVES")
+    print("=" * 80)
+    for output_path in render_all(roc_data, args.output_dir, args.workers):
+        print(f"   💾 Saved to: {output_path}")
+
+    print("\n" + "=" * 80)
+    print("✅ ROC CURVE GENERATION COMPLETE")
+    print("=" * 80)
+    print(f"\n📁 All visualizations saved to: {args.output_dir}/")
+    print("\nGenerated files:")
+    print(f"  • {DATA_FILE} (curve points and AUCs)")
+    print("  • roc_curves_all_dimensions.png (combined view)")
+    print("  • roc_curve_activeReflective.png")
+    print("  • roc_curve_sensingIntuitive.png")
+    print("  • roc_curve_visualVerbal.png")
+    print("  • roc_curve_sequentialGlobal.png")
+    print("\n" + "=" * 80)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Cached Pipeline Runner for the FSLSM ML Service
+generate -> convert -> combine -> train -> evaluate
+
+Each stage is fingerprinted from the content of its script and every local
+module it imports (ml-service/ and training/, followed transitively), its
+input files and its parameters. A stage only runs when that fingerprint changed or
+one of its outputs is missing/modified; otherwise it is skipped. Stage
+dependencies are derived from inputs/outputs, and stages whose dependencies
+are satisfied run in parallel (e.g. generate and convert).
+
+Usage:
+    python ml-service/run_pipeline.py                 # bring everything up to date
+    python ml-service/run_pipeline.py combine         # only combine and what it needs
+    python ml-service/run_pipeline.py --dry-run       # show what would run
+    python ml-service/run_pipeline.py --force train   # rerun a stage regardless
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent
+sys.path.insert(0, str(PROJECT_ROOT / 'training'))
+from dataset_io import file_hash as content_hash, partition_files
+
+CODE_DIRS = [PROJECT_ROOT, PROJECT_ROOT / 'training']
+STATE_FILE = PROJECT_ROOT / 'data' / 'pipeline_state.json'
+LOG_DIR = PROJECT_ROOT / 'logs'
+
+MODEL_FILES = [
+    'models/scaler_improved.pkl',
+    'models/active_reflective_improved.pkl',
+    'models/sensing_intuitive_improved.pkl',
+    'models/visual_verbal_improved.pkl',
+    'models/sequential_global_improved.pkl'
+]
+
+# Paths are relative to ml-service/. optional_inputs may be absent
+# (their absence is part of the fingerprint); optional_outputs are the typed
+# Parquet siblings, written only when pyarrow is installed.
+STAGES = {
+    'generate': {
+        'script': 'training/generate_synthetic_data.py',
+        'args': [],
+        'inputs': [],
+        'outputs': ['data/training_data.csv'],
+        'optional_outputs': ['data/training_data.parquet']
+    },
+    'convert': {
+        'script': 'convert_eye_tracking_NO_CIRCULAR_LOGIC.py',
+        'args': [],
+        'inputs': ['data/eye_tracking_data.tsv'],
+        'outputs': ['data/eye_tracking_training_data_NO_CIRCULAR.csv'],
+        'optional_outputs': ['data/eye_tracking_training_data_NO_CIRCULAR.parquet']
+    },
+    'combine': {
+        'script': 'combine_datasets.py',
+        'args': [],
+        'inputs': ['data/training_data.csv', 'data/eye_tracking_training_data_NO_CIRCULAR.csv'],
+        'optional_inputs': ['data/real_training_data.csv', 'data/real_training_data'],
+        'outputs': ['data/combined_training_data_NO_CIRCULAR.csv'],
+        'optional_outputs': ['data/combined_training_data_NO_CIRCULAR.parquet']
+    },
+    'train': {
+        'script': 'training/train_models_improved.py',
+        'args': [],
+        'inputs': ['data/combined_training_data_NO_CIRCULAR.csv'],
+        'optional_inputs': ['data/combined_training_data_NO_CIRCULAR.parquet'],
+        'outputs': MODEL_FILES
+    },
+    'evaluate': {
+        'script': 'evaluate_models.py',
+        'args': [],
+        'inputs': ['data/training_data.csv'] + MODEL_FILES,
+        'optional_inputs': ['data/training_data.parquet'],
+        'outputs': []
+    }
+}
+
+def file_hash(rel_path):
+    """SHA-256 of a file (dataset_io's memoized hash) or of a partitioned dataset's parts, None if absent"""
+    path = PROJECT_ROOT / rel_path
+    if path.is_dir():
+        parts = {part.name: content_hash(part) for part in partition_files(path)}
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest() if parts else None
+    if not path.exists():
+        return None
+    return content_hash(path)
+
+def local_modules(script):
+    """The script plus every ml-service/ or training/ module it imports, transitively"""
+    found, pending = set(), [script]
+    while pending:
+        rel_path = pending.pop()
+        if rel_path in found:
+            continue
+        found.add(rel_path)
+        path = PROJECT_ROOT / rel_path
+        for node in ast.walk(ast.parse(path.read_text(encoding='utf-8'))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                # Same lookup order as the scripts: their own directory, then the sys.path entries they add
+                for base in [path.parent] + CODE_DIRS:
+                    candidate = base / f"{name.split('.')[0]}.py"
+                    if candidate.exists():
+                        pending.append(candidate.relative_to(PROJECT_ROOT).as_posix())
+                        break
+    return sorted(found)
+
+def stage_outputs(stage):
+    return stage['outputs'] + stage.get('optional_outputs', [])
+
+def stage_fingerprint(name):
+    """Fingerprint of everything a stage's outputs depend on"""
+    stage = STAGES[name]
+    payload = {
+        'code': {p: file_hash(p) for p in local_modules(stage['script'])},
+        'inputs': {p: file_hash(p) for p in stage['inputs'] + stage.get('optional_inputs', [])},
+        'args': stage['args'],
+        'python': sys.version_info[:2]
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def stage_dependencies():
+    """Stage -> set of stages producing one of its inputs"""
+    producers = {out: name for name, stage in STAGES.items() for out in stage_outputs(stage)}
+    return {
+        name: {producers[p] for p in stage['inputs'] + stage.get('optional_inputs', [])
+               if p in producers and producers[p] != name}
+        for name, stage in STAGES.items()
+    }
+
+def select_stages(targets, deps):
+    """Requested stages plus everything upstream of them"""
+    selected = set()
+    pending = list(targets or STAGES)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(deps[name])
+    return selected
+
+def load_state():
+    if not STATE_FILE.exists():
+        return {'stages': {}}
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+def save_state(state):
+    STATE_FILE.parent.mkdir(exist_ok=True)
+    with open(STATE_FILE, 'w') as f:
+        json.dump(state, f, indent=2)
+
+def stale_reason(name, state, forced):
+    """Why a stage must run, or None if its outputs are current"""
+    if name in forced:
+        return 'forced'
+    record = state['stages'].get(name)
+    if record is None:
+        return 'never run'
+    missing = [p for p in STAGES[name]['inputs'] if not (PROJECT_ROOT / p).exists()]
+    if missing:
+        return f"missing input {missing[0]}"
+    if record['fingerprint'] != stage_fingerprint(name):
+        return 'code, inputs or parameters changed'
+    for out in stage_outputs(STAGES[name]):
+        if file_hash(out) != record['outputs'].get(out):
+            return f"output {out} missing or modified"
+    return None
+
+def run_stage(name):
+    """Run one stage script, logging to logs/<stage>.log"""
+    stage = STAGES[name]
+    LOG_DIR.mkdir(exist_ok=True)
+    log_path = LOG_DIR / f'{name}.log'
+    env = dict(os.environ, PYTHONIOENCODING='utf-8')
+
+    start = time.time()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        result = subprocess.run(
+            [sys.executable, str(PROJECT_ROOT / stage['script'])] + stage['args'],
+            cwd=PROJECT_ROOT, stdout=log, stderr=subprocess.STDOUT, env=env
+        )
+    return result.returncode, time.time() - start, log_path
+
+def print_log_tail(log_path, lines=20):
+    with open(log_path, encoding='utf-8', errors='replace') as f:
+        for line in f.readlines()[-lines:]:
+            print(f"      {line.rstrip()}")
+
+def main():
+    """Main pipeline function"""
+    parser = argparse.ArgumentParser(description='Run the FSLSM data/training pipeline with content-hash caching')
+    parser.add_argument('targets', nargs='*',
+                        help=f"Stages to bring up to date: {', '.join(STAGES)} (default: all)")
+    parser.add_argument('--force', nargs='+', default=[], choices=list(STAGES),
+                        help='Rerun these stages even if they are current')
+    parser.add_argument('--jobs', type=int, default=2,
+                        help='Maximum number of stages running at the same time')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only report which stages are stale')
+    args = parser.parse_args()
+    unknown = [t for t in args.targets if t not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    print("=" * 70)
+    print("FSLSM PIPELINE (generate -> convert -> combine -> train -> evaluate)")
+    print("=" * 70)
+
+    deps = stage_dependencies()
+    selected = select_stages(args.targets, deps)
+    order = [name for name in STAGES if name in selected]
+    state = load_state()
+    state.pop('files', None)  # file hashes used to be memoized here; dataset_io keeps them now
+    forced = set(args.force)
+
+    if args.dry_run:
+        will_run = set()
+        for name in order:
+            reason = stale_reason(name, state, forced)
+            if reason is None and deps[name] & will_run:
+                reason = 'upstream stage will run (skipped if its outputs come out identical)'
+            if reason:
+                will_run.add(name)
+            print(f"  {name:<10} {'RUN  - ' + reason if reason else 'up to date'}")
+        return
+
+    done, failed, results = set(), set(), {}
+    running, fingerprints = {}, {}
+    pipeline_start = time.time()
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        while True:
+            for name in order:
+                if name in done or name in failed or name in running:
+                    continue
+                if deps[name] & failed:
+                    failed.add(name)
+                    results[name] = ('blocked', 0.0)
+                    print(f"[SKIP] {name}: upstream stage failed")
+                    continue
+                if not deps[name] <= done:
+                    continue
+
+                reason = stale_reason(name, state, forced)
+                if reason is None:
+                    done.add(name)
+                    results[name] = ('cached', 0.0)
+                    print(f"[CACHED] {name}: up to date")
+                    continue
+
+                # Fingerprint before the run, so edits made while it runs force a rerun next time
+                fingerprints[name] = stage_fingerprint(name)
+                print(f"[RUN] {name}: {reason}")
+                running[name] = pool.submit(run_stage, name)
+
+            if not running:
+                break
+
+            finished, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+            for name in [n for n, fut in running.items() if fut in finished]:
+                returncode, elapsed, log_path = running.pop(name).result()
+                missing = [p for p in STAGES[name]['outputs'] if not (PROJECT_ROOT / p).exists()]
+
+                if returncode != 0 or missing:
+                    failed.add(name)
+                    results[name] = ('failed', elapsed)
+                    problem = f"exit code {returncode}" if returncode else f"did not produce {missing[0]}"
+                    print(f"[FAIL] {name}: {problem} ({elapsed:.1f}s) - log: {log_path}")
+                    print_log_tail(log_path)
+                    continue
+
+                state['stages'][name] = {
+                    'fingerprint': fingerprints[name],
+                    'outputs': {p: file_hash(p) for p in stage_outputs(STAGES[name])},
+                    'seconds': round(elapsed, 2),
+                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+                }
+                save_state(state)
+                done.add(name)
+                results[name] = ('ran', elapsed)
+                print(f"[OK] {name} ({elapsed:.1f}s) - log: {log_path}")
+
+    print("\n" + "=" * 70)
+    print("Pipeline Summary")
+    print("=" * 70)
+    for name in order:
+        status, elapsed = results.get(name, ('not run', 0.0))
+        print(f"  {name:<10} {status:<8} {elapsed:>7.1f}s")
+    print(f"\n[TIME] Wall time: {time.time() - pipeline_start:.1f}s")
+
+    if failed:
+        sys.exit(1)
+    print("\n[DONE] Pipeline up to date!")
+
+if __name__ == '__main__':
+    main()
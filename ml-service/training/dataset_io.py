@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Typed Columnar Dataset I/O for the FSLSM ML Service
+Parquet/Feather siblings of the training CSVs
+
+Producers keep writing the CSV (human-readable, backwards compatible) and
+also write <name>.parquet with float32 features, int8 labels, a categorical
+`source` column and float32 `sample_weight`. Loaders are given the CSV path
+and transparently read the columnar sibling (Parquet, then Feather) when it
+is at least as new as the CSV, fetching only the requested columns.
+
+Partitioned datasets: a directory of part-* files (Parquet, else CSV) can
+stand in for a CSV. Loaders read <name>/ instead of <name>.csv when its
+newest part is newer than the CSV, or when given the directory itself.
+The row-key columns (PARTITION_KEYS) are dropped unless asked for.
+
+pyarrow is optional: without it everything falls back to CSV.
+
+Usage:
+    python ml-service/training/dataset_io.py convert data/training_data.csv
+    python ml-service/training/dataset_io.py benchmark data/combined_training_data_NO_CIRCULAR.csv
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+FEATURE_COLS = [
+    'activeModeRatio', 'questionsGenerated', 'debatesParticipated',
+    'reflectiveModeRatio', 'reflectionsWritten', 'journalEntries',
+    'aiAskModeRatio', 'aiResearchModeRatio',
+    'sensingModeRatio', 'simulationsCompleted', 'challengesCompleted',
+    'intuitiveModeRatio', 'conceptsExplored', 'patternsDiscovered',
+    'aiTextToDocsRatio',
+    'visualModeRatio', 'diagramsViewed', 'wireframesExplored',
+    'verbalModeRatio', 'textRead', 'summariesCreated',
+    'sequentialModeRatio', 'stepsCompleted', 'linearNavigation',
+    'globalModeRatio', 'overviewsViewed', 'navigationJumps'
+]
+LABEL_COLS = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
+TRAINING_COLUMNS = FEATURE_COLS + LABEL_COLS + ['sample_weight']
+COLUMNAR_SUFFIXES = ('.parquet', '.feather')
+PARTITION_KEYS = ['userId', 'behaviorId']  # row keys of partitioned datasets (export_real_data.py)
+HASH_MEMO = Path(__file__).parent.parent / 'data' / 'dataset_hashes.json'
+
+def file_hash(path):
+    """SHA-256 of a file, memoized on (size, mtime) so unchanged files are not re-read"""
+    path = Path(path).resolve()
+    stat = path.stat()
+    key = f"{stat.st_size}:{stat.st_mtime_ns}"
+    memo = json.loads(HASH_MEMO.read_text()) if HASH_MEMO.exists() else {}
+    cached = memo.get(str(path))
+    if cached and cached['key'] == key:
+        return cached['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    memo[str(path)] = {'key': key, 'sha256': digest.hexdigest()}
+    HASH_MEMO.parent.mkdir(parents=True, exist_ok=True)
+    tmp_memo = HASH_MEMO.with_suffix(f'.{os.getpid()}.tmp')
+    tmp_memo.write_text(json.dumps(memo, indent=2))
+    tmp_memo.replace(HASH_MEMO)
+    return memo[str(path)]['sha256']
+
+def count_rows(csv_path):
+    """Number of data rows in a CSV without loading it"""
+    with open(csv_path, 'rb') as f:
+        lines = sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 24), b''))
+    return max(lines - 1, 0)
+
+def columnar_available():
+    return pa is not None
+
+def columnar_path(csv_path):
+    """Fresh Parquet/Feather sibling of a CSV, or None"""
+    csv_path = Path(csv_path)
+    if pa is None:
+        return None
+    for suffix in COLUMNAR_SUFFIXES:
+        candidate = csv_path.with_suffix(suffix)
+        if candidate.exists() and (not csv_path.exists() or candidate.stat().st_mtime >= csv_path.stat().st_mtime):
+            return candidate
+    return None
+
+def partition_files(directory):
+    """part-* files of a partitioned dataset directory (Parquet if any, else CSV), in order"""
+    directory = Path(directory)
+    return sorted(directory.glob('part-*.parquet')) or sorted(directory.glob('part-*.csv'))
+
+def partitioned_path(csv_path):
+    """Partition directory standing in for a CSV (the path itself, or <stem>/ if newer than the CSV), or None"""
+    csv_path = Path(csv_path)
+    directory = csv_path if csv_path.is_dir() else csv_path.with_suffix('')
+    files = partition_files(directory) if directory.is_dir() else []
+    if not files:
+        return None
+    if directory != csv_path and csv_path.exists() and \
+            max(f.stat().st_mtime for f in files) < csv_path.stat().st_mtime:
+        return None
+    return directory
+
+def part_columns(path):
+    """Column names of one CSV or Parquet file, without the partition keys"""
+    path = Path(path)
+    names = parquet_columns(path) if path.suffix == '.parquet' else list(pd.read_csv(path, nrows=0).columns)
+    return [c for c in names if c not in PARTITION_KEYS]
+
+def part_rows(path):
+    """Number of rows of one CSV or Parquet file, without reading them"""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        return pq.ParquetFile(path).metadata.num_rows
+    return count_rows(path)
+
+def iter_part(path, columns=None, chunk_size=500_000):
+    """Stream one CSV or Parquet file in chunks, without the partition keys"""
+    path = Path(path)
+    columns = columns or part_columns(path)
+    if path.suffix == '.parquet':
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+
+def dataset_exists(csv_path):
+    return Path(csv_path).is_file() or columnar_path(csv_path) is not None or partitioned_path(csv_path) is not None
+
+def to_typed(df):
+    """float32 features/weights, int8 labels, categorical source (and other text columns)"""
+    typed = {}
+    for col in df.columns:
+        if col == 'source' or not pd.api.types.is_numeric_dtype(df[col]):
+            typed[col] = df[col].astype('category')
+        elif col in LABEL_COLS:
+            typed[col] = df[col].round().astype(np.int8)
+        else:
+            typed[col] = df[col].astype(np.float32)
+    return pd.DataFrame(typed, index=df.index)
+
+def dataset_columns(csv_path):
+    """Column names of a dataset without reading its rows"""
+    directory = partitioned_path(csv_path)
+    if directory is not None:
+        return part_columns(partition_files(directory)[0])
+    path = columnar_path(csv_path)
+    if path is None:
+        return list(pd.read_csv(csv_path, nrows=0).columns)
+    if path.suffix == '.parquet':
+        return pq.read_schema(path).names
+    return feather.read_table(path, memory_map=True).column_names
+
+def parquet_columns(path):
+    return pq.read_schema(path).names
+
+def read_dataset(csv_path, columns=None):
+    """Load a dataset (columnar sibling if fresh, else CSV), only the requested columns that exist"""
+    if columns is not None:
+        available = set(dataset_columns(csv_path))
+        columns = [c for c in columns if c in available]
+
+    directory = partitioned_path(csv_path)
+    if directory is not None:
+        return pd.concat(iter_dataset(directory, columns), ignore_index=True)
+    path = columnar_path(csv_path)
+    if path is None:
+        return pd.read_csv(csv_path, usecols=columns)
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_feather(path, columns=columns)
+
+def iter_dataset(csv_path, columns=None, chunk_size=500_000):
+    """Stream a dataset in chunks of about chunk_size rows"""
+    if columns is not None:
+        available = set(dataset_columns(csv_path))
+        columns = [c for c in columns if c in available]
+
+    directory = partitioned_path(csv_path)
+    if directory is not None:
+        for path in partition_files(directory):
+            yield from iter_part(path, columns, chunk_size)
+        return
+    path = columnar_path(csv_path)
+    if path is None:
+        yield from pd.read_csv(csv_path, usecols=columns, chunksize=chunk_size)
+    elif path.suffix == '.parquet':
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            yield batch.to_pandas()
+
+class ColumnarWriter:
+    """Streams DataFrame chunks into <csv stem>.parquet (no-op without pyarrow)"""
+
+    def __init__(self, csv_path):
+        self.path = Path(csv_path).with_suffix('.parquet')
+        self._tmp_path = self.path.with_suffix('.parquet.tmp')
+        self._writer = None
+
+    def write(self, df):
+        if pa is None:
+            return
+        table = pa.Table.from_pandas(to_typed(df), preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._tmp_path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._tmp_path.replace(self.path)
+            self._writer = None
+
+def save_dataset(df, csv_path):
+    """Write the CSV and its typed Parquet sibling"""
+    df.to_csv(csv_path, index=False)
+    writer = ColumnarWriter(csv_path)
+    writer.write(df)
+    writer.close()
+
+def convert_to_columnar(csv_path, chunk_size=500_000):
+    """(Re)build the Parquet sibling of an existing CSV, streaming"""
+    writer = ColumnarWriter(csv_path)
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        writer.write(chunk)
+    writer.close()
+    return writer.path
+
+def benchmark(csv_path, repeats=3):
+    """Disk size and load time: CSV vs Parquet vs Feather, all and training columns"""
+    csv_path = Path(csv_path)
+    parquet_path = csv_path.with_suffix('.parquet')
+    feather_path = csv_path.with_suffix('.feather')
+    typed = to_typed(pd.read_csv(csv_path))
+    typed.to_parquet(parquet_path, index=False)
+    typed.reset_index(drop=True).to_feather(feather_path)
+
+    needed = [c for c in TRAINING_COLUMNS if c in typed.columns]
+    readers = {
+        'CSV (all columns)': lambda: pd.read_csv(csv_path),
+        'CSV (usecols)': lambda: pd.read_csv(csv_path, usecols=needed),
+        'Parquet (all columns)': lambda: pd.read_parquet(parquet_path),
+        'Parquet (needed columns)': lambda: pd.read_parquet(parquet_path, columns=needed),
+        'Feather (needed columns)': lambda: pd.read_feather(feather_path, columns=needed),
+    }
+
+    print(f"\n[BENCH] {csv_path.name}: {len(typed):,} rows x {typed.shape[1]} columns")
+    print(f"\n{'Format':<28} {'Disk':>10} {'Load (best of ' + str(repeats) + ')':>20} {'In memory':>12}")
+    print("-" * 74)
+    sizes = {'CSV': csv_path.stat().st_size, 'Parquet': parquet_path.stat().st_size,
+             'Feather': feather_path.stat().st_size}
+    csv_time = None
+    for name, reader in readers.items():
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            df = reader()
+            times.append(time.perf_counter() - start)
+        best = min(times)
+        csv_time = csv_time or best
+        size = sizes[name.split()[0]]
+        print(f"{name:<28} {size / 1024 / 1024:>8.2f}MB {best * 1000:>11.1f} ms ({csv_time / best:>4.1f}x)"
+              f" {df.memory_usage(deep=True).sum() / 1024 / 1024:>10.1f}MB")
+
+    feather_path.unlink()
+    print(f"\n[OK] Parquet sibling kept at: {parquet_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Typed columnar (Parquet/Feather) dataset tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    convert = sub.add_parser('convert', help='Write the typed Parquet sibling of a CSV')
+    convert.add_argument('csv', help='CSV dataset path')
+    bench = sub.add_parser('benchmark', help='Compare CSV and columnar disk size and load time')
+    bench.add_argument('csv', help='CSV dataset path')
+    bench.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    if pa is None:
+        print("[ERROR] pyarrow is not installed: pip install pyarrow")
+        return
+    if args.command == 'convert':
+        print(f"[OK] Wrote {convert_to_columnar(args.csv)}")
+    else:
+        benchmark(args.csv, args.repeats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Shared Evaluation Engine for the FSLSM Evaluation Scripts
+One inference pass per (model bundle, dataset); every report is a view over it
+
+A model bundle is a scaler plus the four dimension models (`improved`,
+`fast`, `external`, or the raw-feature `regular` models). The first
+evaluation of a bundle on a dataset scales every row and runs model.predict
+once per dimension, then saves the n x 4 prediction matrix (in the models'
+output dtype) under data/prediction_cache/<bundle sha256>_<dataset sha256>_v<spec>/.
+Later runs, from any evaluation script, memory-map it. Regression, classification, ROC
+and clustering reports then slice the train/val/test rows they need.
+
+The key changes whenever a model or scaler file, the dataset bytes or
+FEATURE_SPEC_VERSION change.
+
+Usage:
+    python ml-service/training/evaluation_engine.py build data/combined_training_data_NO_CIRCULAR.csv
+    python ml-service/training/evaluation_engine.py build data/training_data.csv --bundle regular
+    python ml-service/training/evaluation_engine.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from dataset_io import read_dataset, file_hash, TRAINING_COLUMNS
+from feature_cache import load_features
+from train_models import prepare_data as prepare_raw_features
+from train_models_improved import FEATURE_SPEC_VERSION
+
+MODELS_DIR = Path(__file__).parent.parent / 'models'
+PREDICTION_CACHE_DIR = Path(__file__).parent.parent / 'data' / 'prediction_cache'
+PREDICT_CHUNK = 500_000  # rows scaled and predicted at a time
+
+MODEL_STEMS = {
+    'activeReflective': 'active_reflective',
+    'sensingIntuitive': 'sensing_intuitive',
+    'visualVerbal': 'visual_verbal',
+    'sequentialGlobal': 'sequential_global'
+}
+# Bundle -> file suffix and whether its models take the 46 engineered features (else train_models.py's raw ones)
+MODEL_BUNDLES = {
+    'improved': ('_improved', True),
+    'fast': ('_fast', True),
+    'external': ('_external', True),
+    'regular': ('', False)
+}
+
+def bundle_files(bundle, models_dir=MODELS_DIR):
+    """Scaler path and {dimension: model path} of a bundle"""
+    suffix = MODEL_BUNDLES[bundle][0]
+    models = {dim: Path(models_dir) / f'{stem}{suffix}.pkl' for dim, stem in MODEL_STEMS.items()}
+    return Path(models_dir) / f'scaler{suffix}.pkl', models
+
+def bundle_exists(bundle, models_dir=MODELS_DIR):
+    scaler_path, models = bundle_files(bundle, models_dir)
+    return scaler_path.exists() and all(path.exists() for path in models.values())
+
+def bundle_hash(bundle, models_dir=MODELS_DIR):
+    """SHA-256 over the bundle's scaler and (present) model files"""
+    scaler_path, models = bundle_files(bundle, models_dir)
+    paths = [scaler_path] + [path for path in models.values() if path.exists()]
+    digest = hashlib.sha256(bundle.encode())
+    for path in paths:
+        digest.update(f'{path.name}:{file_hash(path)}'.encode())
+    return digest.hexdigest()
+
+def cache_dir_for(data_path, bundle, models_dir=MODELS_DIR):
+    return PREDICTION_CACHE_DIR / (f"{bundle_hash(bundle, models_dir)[:16]}_{file_hash(data_path)[:16]}"
+                                   f"_v{FEATURE_SPEC_VERSION}")
+
+def bundle_features(data_path, bundle, features):
+    """Model input of every row: the cached engineered matrix, or train_models.py's raw columns for `regular`"""
+    if MODEL_BUNDLES[bundle][1]:
+        return features['X']
+    return prepare_raw_features(read_dataset(data_path, columns=TRAINING_COLUMNS))[0]
+
+def load_bundle(bundle, models_dir=MODELS_DIR):
+    """(scaler, {dimension: model}) of a bundle, only dimensions whose model file exists"""
+    scaler_path, model_paths = bundle_files(bundle, models_dir)
+    return joblib.load(scaler_path), {dim: joblib.load(path) for dim, path in model_paths.items() if path.exists()}
+
+def build_predictions(data_path, bundle, models_dir, target_dir, features):
+    """Scale every row and predict each dimension once, then write pred.npy atomically"""
+    scaler_path, model_paths = bundle_files(bundle, models_dir)
+    scaler, models = load_bundle(bundle, models_dir)
+    X = bundle_features(data_path, bundle, features)
+
+    pred = None
+    for start in range(0, len(X), PREDICT_CHUNK):
+        X_scaled = scaler.transform(X[start:start + PREDICT_CHUNK])
+        for i, model in enumerate(models.values()):
+            chunk_pred = model.predict(X_scaled)
+            if pred is None:
+                # Keep the models' own output dtype (float32 for XGBoost) so metrics match a direct predict
+                pred = np.empty((len(X), len(models)), dtype=chunk_pred.dtype)
+            pred[start:start + PREDICT_CHUNK, i] = chunk_pred
+
+    tmp_dir = target_dir.with_name(f'{target_dir.name}.{os.getpid()}.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / 'pred.npy', pred)
+    meta = {
+        'dataset': str(data_path),
+        'bundle': bundle,
+        'models': {dim: model_paths[dim].name for dim in models},
+        'scaler': scaler_path.name,
+        'rows': len(X),
+        'n_features': X.shape[1],
+        'feature_spec_version': FEATURE_SPEC_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    (tmp_dir / 'meta.json').write_text(json.dumps(meta, indent=2))
+
+    try:
+        tmp_dir.rename(target_dir)
+    except OSError:
+        # Another process finished the same predictions first - theirs are identical
+        shutil.rmtree(tmp_dir)
+
+def load_predictions(data_path, bundle='improved', models_dir=MODELS_DIR, verbose=True):
+    """Predictions of a model bundle for every row of a dataset (memory-mapped), with labels and splits
+
+    Returns a dict with 'pred' ({dimension: predictions}, only dimensions whose
+    model exists), 'y' ({dimension: labels}), 'split', 'rows', 'n_features',
+    'bundle', 'models' ({dimension: model file}), 'scaler' and 'features'
+    (the feature-cache dict).
+    """
+    start = time.time()
+    features = load_features(data_path, verbose=verbose)
+    target_dir = cache_dir_for(data_path, bundle, models_dir)
+    hit = target_dir.exists()
+    if not hit:
+        if verbose:
+            print(f"[CACHE] Predicting {features['rows']:,} rows with the '{bundle}' models...")
+        build_predictions(data_path, bundle, models_dir, target_dir, features)
+
+    meta = json.loads((target_dir / 'meta.json').read_text())
+    pred = np.load(target_dir / 'pred.npy', mmap_mode='r')
+    predictions = {
+        'pred': {dim: pred[:, i] for i, dim in enumerate(meta['models'])},
+        'y': features['y'],
+        'split': features['split'],
+        'rows': meta['rows'],
+        'n_features': meta['n_features'],
+        'bundle': bundle,
+        'models': meta['models'],
+        'scaler': meta['scaler'],
+        'features': features
+    }
+    if verbose:
+        state = 'hit' if hit else 'built'
+        print(f"[CACHE] Prediction cache {state}: {meta['rows']:,} rows x {len(meta['models'])} models "
+              f"({time.time() - start:.2f}s, {target_dir.name})")
+    return predictions
+
+def split_view(predictions, split='test'):
+    """(y_true, y_pred) dicts of one split ('train', 'val', 'test' or 'all')"""
+    if split == 'all':
+        return ({dim: np.asarray(predictions['y'][dim]) for dim in predictions['pred']},
+                {dim: np.asarray(pred) for dim, pred in predictions['pred'].items()})
+    idx = predictions['split'][split]
+    return ({dim: predictions['y'][dim][idx] for dim in predictions['pred']},
+            {dim: pred[idx] for dim, pred in predictions['pred'].items()})
+
+def regression_metrics(y_true, y_pred):
+    """MAE, MSE, RMSE and R² of one dimension"""
+    mse = mean_squared_error(y_true, y_pred)
+    return {
+        'mae': mean_absolute_error(y_true, y_pred),
+        'mse': mse,
+        'rmse': np.sqrt(mse),
+        'r2': r2_score(y_true, y_pred)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared prediction cache for the evaluation scripts')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='Predict (or reuse) every row of a dataset with a model bundle')
+    build.add_argument('data', help='Dataset CSV path')
+    build.add_argument('--bundle', choices=list(MODEL_BUNDLES), default='improved')
+    sub.add_parser('clear', help='Delete every cached prediction matrix')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        predictions = load_predictions(args.data, args.bundle)
+        y_true, y_pred = split_view(predictions, 'test')
+        for dim in y_pred:
+            metrics = regression_metrics(y_true[dim], y_pred[dim])
+            print(f"   {dim:<20} test R²={metrics['r2']:.4f}  MAE={metrics['mae']:.3f}")
+    elif PREDICTION_CACHE_DIR.exists():
+        shutil.rmtree(PREDICTION_CACHE_DIR)
+        print(f"[OK] Removed {PREDICTION_CACHE_DIR}")
+
+if __name__ == '__main__':
+    main()
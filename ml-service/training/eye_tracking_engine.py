@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized Aggregation Engine for the Eye-Tracking Converters
+Shared by convert_eye_tracking_data.py and convert_eye_tracking_NO_CIRCULAR_LOGIC.py
+
+`Content per AOI` is factorized into a categorical once, and fixation time
+is summed per (participant[, dimension], content) in a single groupby. The
+content-type regexes are then evaluated against the few distinct content
+strings instead of every row, and per-type times are column sums of that
+table - O(N) in the number of rows instead of O(participants x N).
+
+Typed ingest: load_eye_tracking_table() parses the TSV natively with an
+explicit dtype map (comma decimals via decimal=',') and caches the typed
+table under data/eye_tracking_cache/, keyed by the TSV's SHA-256. Later
+loads - converters or notebooks - read only the columns they need.
+
+Map-reduce: map_reduce_eye_tracking() splits many TSVs into row blocks,
+folds each block into EyeTrackingAggregates (content-time sums, metric sums
+and counts) in worker processes, chunk by chunk, and merges the partials in
+block order - so the result does not depend on the number of workers.
+Participant IDs must be unique across exports.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset_io import columnar_available, file_hash, parquet_columns
+
+PARTICIPANT_COL = 'Participant ID'
+DIMENSION_COL = 'Learning Style Dimension'
+CONTENT_COL = 'Content per AOI'
+TIME_COL = 'Total_duration_of_fixations'
+
+CACHE_DIR = Path(__file__).parent.parent / 'data' / 'eye_tracking_cache'
+INGEST_VERSION = 1  # bump when the schema below changes (invalidates the cache)
+ROWS_PER_TASK = 250_000  # map-reduce: rows of one TSV handled by one worker task
+CHUNK_SIZE = 50_000  # rows a worker holds in memory at a time
+
+TEXT_COLUMNS = ['Learning Style Dimension', 'Content per AOI', 'Last_AOI_viewed']
+# Numeric metrics; missing cells become 0 (as the converters always did)
+NUMERIC_COLUMNS = [
+    'Total_duration_of_fixations', 'Average_duration_of_fixations',
+    'Minimum_duration_of_fixations', 'Maximum_duration_of_fixations',
+    'Number_of_fixations', 'Time_to_first_fixation', 'Duration_of_first_fixation',
+    'Average_pupil_diameter', 'Total_duration_of_whole_fixations',
+    'Average_duration_of_whole_fixations', 'Minimum_duration_of_whole_fixations',
+    'Maximum_duration_of_whole_fixations', 'Number_of_whole_fixations',
+    'Time_to_first_whole_fixation', 'Duration_of_first_whole_fixation',
+    'Average_whole-fixation_pupil_diameter', 'Total_duration_of_Visit',
+    'Average_duration_of_Visit', 'Minimum_duration_of_Visit',
+    'Maximum_duration_of_Visit', 'Number_of_Visits', 'Time_to_first_Visit',
+    'Duration_of_first_Visit', 'Total_duration_of_Glances',
+    'Average_duration_of_Glances', 'Minimum_duration_of_Glances',
+    'Maximum_duration_of_Glances', 'Number_of_Glances',
+    'Time_to_first_Glance', 'Duration_of_first_Glance',
+    'Number_of_mouse_clicks', 'Number_of_saccades_in_AOI',
+    'Time_to_entry_saccade', 'Time_to_exit_saccade',
+    'Peak_velocity_of_entry_saccade', 'Peak_velocity_of_exit_saccade'
+]
+# Count/total columns are whole numbers; the rest are decimals
+INTEGER_COLUMNS = [
+    'Total_duration_of_fixations', 'Number_of_fixations', 'Total_duration_of_whole_fixations',
+    'Number_of_whole_fixations', 'Total_duration_of_Visit', 'Number_of_Visits',
+    'Total_duration_of_Glances', 'Number_of_Glances', 'Number_of_mouse_clicks',
+    'Number_of_saccades_in_AOI'
+]
+# The export writes these with European decimals ("2,47853"), everything else with dots
+DECIMAL_COMMA_COLUMNS = [
+    'Average_pupil_diameter', 'Average_whole-fixation_pupil_diameter',
+    'Peak_velocity_of_entry_saccade', 'Peak_velocity_of_exit_saccade'
+]
+# Everything the converters read
+CONVERTER_COLUMNS = [
+    PARTICIPANT_COL, 'Slide Nr.', DIMENSION_COL, CONTENT_COL, TIME_COL,
+    'Average_duration_of_fixations', 'Number_of_fixations', 'Time_to_first_fixation',
+    'Average_pupil_diameter', 'Number_of_Visits', 'Average_duration_of_Visit',
+    'Number_of_saccades_in_AOI'
+]
+# Per-participant metrics the converters sum or average (kept as sum and count)
+STAT_COLUMNS = [
+    TIME_COL, 'Average_duration_of_fixations', 'Number_of_fixations', 'Time_to_first_fixation',
+    'Average_pupil_diameter', 'Number_of_Visits', 'Average_duration_of_Visit',
+    'Number_of_saccades_in_AOI'
+]
+EYE_TRACKING_DTYPES = {
+    PARTICIPANT_COL: 'int64',
+    'Slide Nr.': 'float64',
+    **{col: 'category' for col in TEXT_COLUMNS},
+    **{col: 'float64' for col in NUMERIC_COLUMNS},
+}
+
+def _read_header(tsv_path):
+    return pd.read_csv(tsv_path, sep='\t', nrows=0).columns
+
+def _column_passes(header, columns=None):
+    """read_csv kwargs per decimal style: dot columns natively, the European-decimal ones with decimal=','"""
+    known = [col for col in EYE_TRACKING_DTYPES if col in header and (columns is None or col in columns)]
+    comma_cols = [col for col in known if col in DECIMAL_COMMA_COLUMNS]
+    dot_cols = [col for col in known if col not in DECIMAL_COMMA_COLUMNS]
+    passes = [{'usecols': dot_cols, 'dtype': {col: EYE_TRACKING_DTYPES[col] for col in dot_cols}}]
+    if comma_cols:
+        passes.append({'usecols': comma_cols, 'decimal': ',',
+                       'dtype': {col: EYE_TRACKING_DTYPES[col] for col in comma_cols}})
+    return passes
+
+def _finish_typed(frames, header):
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1)
+    numeric = [col for col in NUMERIC_COLUMNS if col in df.columns]
+    df[numeric] = df[numeric].fillna(0)
+    for col in INTEGER_COLUMNS:
+        if col in df.columns and (df[col] % 1 == 0).all():
+            df[col] = df[col].astype('int64')
+    return df[[col for col in header if col in df.columns]]
+
+def parse_eye_tracking_tsv(tsv_path, columns=None):
+    """Typed parse: two native C-parser passes (dot and comma decimals), no per-cell Python strings"""
+    header = _read_header(tsv_path)
+    frames = [pd.read_csv(tsv_path, sep='\t', **kwargs) for kwargs in _column_passes(header, columns)]
+    return _finish_typed(frames, header)
+
+def iter_eye_tracking_chunks(tsv_path, columns=None, offset=None, nrows=None, chunk_size=CHUNK_SIZE):
+    """Typed chunks of nrows data rows starting at a row's byte offset (default: the first row)"""
+    header = _read_header(tsv_path)
+    with ExitStack() as stack:
+        readers = []
+        for kwargs in _column_passes(header, columns):
+            f = stack.enter_context(open(tsv_path, 'rb'))
+            if offset is None:
+                f.readline()
+            else:
+                f.seek(offset)
+            readers.append(pd.read_csv(f, sep='\t', header=None, names=list(header),
+                                       nrows=nrows, chunksize=chunk_size, **kwargs))
+        for frames in zip(*readers):
+            yield _finish_typed(frames, header)
+
+def eye_tracking_cache_path(tsv_path):
+    suffix = '.parquet' if columnar_available() else '.pkl'
+    return CACHE_DIR / f"{Path(tsv_path).stem}_{file_hash(tsv_path)[:16]}_v{INGEST_VERSION}{suffix}"
+
+def load_eye_tracking_table(tsv_path, columns=None, verbose=True):
+    """Typed eye-tracking table (only `columns` if given), parsed once and cached by file hash"""
+    start = time.time()
+    cache_path = eye_tracking_cache_path(tsv_path)
+    hit = cache_path.exists()
+    if not hit:
+        df = parse_eye_tracking_tsv(tsv_path)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.tmp')
+        if cache_path.suffix == '.parquet':
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_pickle(tmp_path)
+        tmp_path.replace(cache_path)
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+    elif cache_path.suffix == '.parquet':
+        if columns is not None:
+            available = set(parquet_columns(cache_path))
+            columns = [col for col in columns if col in available]
+        df = pd.read_parquet(cache_path, columns=columns)
+    else:
+        df = pd.read_pickle(cache_path)
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+
+    if verbose:
+        print(f"[CACHE] Eye-tracking table {'hit' if hit else 'parsed and cached'}: "
+              f"{len(df):,} rows x {df.shape[1]} columns ({(time.time() - start) * 1000:.0f} ms)")
+    return df
+
+def participant_ids(df):
+    """Participants in order of first appearance (the order the converters emit rows in)"""
+    return df[PARTICIPANT_COL].unique()
+
+def content_time_table(df, by=(PARTICIPANT_COL,)):
+    """Total fixation time per group (rows) x distinct content string (columns)"""
+    content = df[CONTENT_COL].astype('category')
+    keys = [df[col] for col in by] + [content]
+    table = df[TIME_COL].groupby(keys, sort=False, observed=True).sum()
+    return table.unstack(CONTENT_COL, fill_value=0)
+
+def participant_table(table, participants, dimension=None):
+    """Rows of a content table for every participant (zeros where a participant has none)"""
+    if dimension is not None:
+        table = table.xs(dimension, level=DIMENSION_COL) if dimension in table.index.get_level_values(DIMENSION_COL) \
+            else table.iloc[:0].droplevel(DIMENSION_COL)
+    return table.reindex(participants, fill_value=0)
+
+def matching_columns(table, pattern, case=True):
+    """Content columns whose string matches a regex (str.contains semantics)"""
+    return table.columns.astype(str).str.contains(pattern, case=case, regex=True)
+
+def content_type_times(table, patterns):
+    """Time per content type, each type summing every content it matches
+
+    patterns: {name: pattern} or {name: (pattern, case)}; a content string
+    may count towards several types, exactly like repeated str.contains.
+    """
+    times = {}
+    for name, pattern in patterns.items():
+        pattern, case = pattern if isinstance(pattern, tuple) else (pattern, True)
+        times[name] = table.loc[:, matching_columns(table, pattern, case)].sum(axis=1)
+    return pd.DataFrame(times, index=table.index)
+
+def first_match_times(table, patterns):
+    """Time per content type where each content string counts only towards the first type it matches
+
+    patterns: ordered {name: pattern} or {name: (pattern, case)}, like an
+    if/elif chain of substring tests.
+    """
+    assigned = pd.Series(False, index=table.columns)
+    times = {}
+    for name, pattern in patterns.items():
+        pattern, case = pattern if isinstance(pattern, tuple) else (pattern, True)
+        mask = matching_columns(table, pattern, case) & ~assigned.values
+        assigned |= mask
+        times[name] = table.loc[:, mask].sum(axis=1)
+    return pd.DataFrame(times, index=table.index)
+
+def _merge_tables(tables):
+    """Sum content tables over their union of content columns, keeping first-appearance row order"""
+    columns = pd.Index(sorted(set().union(*(table.columns for table in tables))), name=CONTENT_COL)
+    stacked = pd.concat([table.reindex(columns=columns, fill_value=0) for table in tables])
+    return stacked.groupby(level=list(range(stacked.index.nlevels)), sort=False).sum()
+
+class EyeTrackingAggregates:
+    """Mergeable per-participant partial aggregates of a block of eye-tracking rows
+
+    content: participant x content fixation-time sums
+    dimension_content: (participant, dimension) x content fixation-time sums
+    sums / counts: participant x STAT_COLUMNS, so means merge as sum / count
+
+    Merging is by participant ID, exactly as if the rows had been concatenated
+    into one table - exports that reuse IDs must be renumbered first.
+    """
+
+    def __init__(self, participants, content, dimension_content, sums, counts, rows, slides):
+        self.participants = participants
+        self.content = content
+        self.dimension_content = dimension_content
+        self.sums = sums
+        self.counts = counts
+        self.rows = rows
+        self.slides = slides
+
+    @classmethod
+    def from_rows(cls, df):
+        content = content_time_table(df)
+        content.columns = pd.Index(content.columns.astype(str), name=CONTENT_COL)
+        content = content[sorted(content.columns)]  # fixed summation order, whatever the category order
+        grouped = df.groupby(PARTICIPANT_COL, sort=False)[[col for col in STAT_COLUMNS if col in df.columns]]
+        return cls(
+            participants=participant_ids(df),
+            content=content,
+            dimension_content=content_time_table(df, by=(PARTICIPANT_COL, DIMENSION_COL)),
+            sums=grouped.sum(),
+            counts=grouped.count(),
+            rows=len(df),
+            slides=set(df['Slide Nr.'].dropna().unique())
+        )
+
+    @classmethod
+    def merge(cls, parts):
+        """Combine partials in the order given (row order, so participants keep first-appearance order)"""
+        parts = [part for part in parts if part is not None]
+        if len(parts) <= 1:
+            return parts[0] if parts else None
+        return cls(
+            participants=pd.unique(np.concatenate([part.participants for part in parts])),
+            content=_merge_tables([part.content for part in parts]),
+            dimension_content=_merge_tables([part.dimension_content for part in parts]),
+            sums=pd.concat([part.sums for part in parts]).groupby(level=0, sort=False).sum(),
+            counts=pd.concat([part.counts for part in parts]).groupby(level=0, sort=False).sum(),
+            rows=sum(part.rows for part in parts),
+            slides=set().union(*(part.slides for part in parts))
+        )
+
+    def stats(self, **aggregations):
+        """Named per-participant 'sum' / 'mean' / 'count' (e.g. fixations=('Number_of_fixations', 'sum'))"""
+        reducers = {
+            'sum': lambda col: self.sums[col],
+            'mean': lambda col: self.sums[col] / self.counts[col],
+            'count': lambda col: self.counts[col],
+        }
+        stats = pd.DataFrame({name: reducers[how](col) for name, (col, how) in aggregations.items()})
+        return stats.reindex(self.participants)
+
+def block_offsets(tsv_path, rows_per_task=ROWS_PER_TASK):
+    """Byte offsets of data rows 0, rows_per_task, 2 * rows_per_task, ... from one scan for newlines"""
+    offsets, lines, position = [], 0, 0
+    with open(tsv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 24), b''):
+            ends = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+            # Data row r starts right after newline number r (newline 0 ends the header)
+            first = -(-lines // rows_per_task) * rows_per_task
+            offsets.extend(position + ends[first - lines::rows_per_task] + 1)
+            lines += len(ends)
+            position += len(block)
+    return [int(offset) for offset in offsets if offset < position]
+
+def plan_tasks(tsv_paths, rows_per_task=ROWS_PER_TASK):
+    """(path, byte offset, row count) blocks in file and row order; the last block of a file reads to its end"""
+    tasks = []
+    for path in tsv_paths:
+        offsets = block_offsets(path, rows_per_task)
+        for i, offset in enumerate(offsets):
+            tasks.append((str(path), offset, rows_per_task if i < len(offsets) - 1 else None))
+    return tasks
+
+def fold_chunks(chunks):
+    aggregates = None
+    for chunk in chunks:
+        aggregates = EyeTrackingAggregates.merge([aggregates, EyeTrackingAggregates.from_rows(chunk)])
+    return aggregates
+
+def aggregate_block(task, chunk_size=CHUNK_SIZE):
+    """Map step: fold a block of rows into one partial, chunk_size rows in memory at a time"""
+    path, offset, nrows = task
+    return fold_chunks(iter_eye_tracking_chunks(path, CONVERTER_COLUMNS, offset, nrows, chunk_size))
+
+def aggregate_table(df, rows_per_task=ROWS_PER_TASK, chunk_size=CHUNK_SIZE):
+    """In-process aggregates of a loaded table, folded over the same blocks and chunks as the map-reduce
+
+    Float sums depend on how rows are grouped, so this is what makes a
+    single-file run and map_reduce_eye_tracking() agree bit for bit.
+    """
+    merged = None
+    for start in range(0, len(df), rows_per_task):
+        block = df.iloc[start:start + rows_per_task]
+        chunks = (block.iloc[i:i + chunk_size] for i in range(0, len(block), chunk_size))
+        merged = EyeTrackingAggregates.merge([merged, fold_chunks(chunks)])
+    return merged
+
+def map_reduce_eye_tracking(tsv_paths, workers=None, rows_per_task=ROWS_PER_TASK, chunk_size=CHUNK_SIZE):
+    """Aggregate many TSVs across worker processes and merge the partials
+
+    The partials are always merged in task order, so any worker count gives
+    the same result as workers=1 (which runs in this process).
+    """
+    workers = workers or os.cpu_count()
+    tasks = plan_tasks(tsv_paths, rows_per_task)
+    print(f"[MAP] {len(tasks)} block(s) from {len(tsv_paths)} file(s) with {workers} worker(s)")
+    start_time = time.time()
+
+    mapper = partial(aggregate_block, chunk_size=chunk_size)
+    merged = None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in (map if workers == 1 else pool.map)(mapper, tasks):
+            merged = EyeTrackingAggregates.merge([merged, part])
+    if merged is None:
+        raise ValueError(f"No eye-tracking rows in {', '.join(str(path) for path in tsv_paths)}")
+
+    print(f"[REDUCE] Merged {len(tasks)} partial(s): {merged.rows:,} rows, "
+          f"{len(merged.participants):,} participants ({time.time() - start_time:.2f}s)")
+    return merged
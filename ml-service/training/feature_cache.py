@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Memory-Mapped Engineered-Feature Cache for the FSLSM Evaluation Scripts
+Read, engineer and split a dataset once; every later run maps it from disk
+
+The engineered 46-column matrix, the 4 label columns, the sample weights and
+the deterministic 70/15/15 split indices (random_state=42, as in training)
+are saved as .npy files under data/feature_cache/<dataset sha256>_v<spec>/.
+Later runs open them with np.load(mmap_mode='r'), so startup is near-instant
+and concurrent evaluation processes share the same page-cache pages.
+
+The key changes whenever the dataset bytes change or FEATURE_SPEC_VERSION
+is bumped in train_models_improved.py.
+
+Usage:
+    python ml-service/training/feature_cache.py build data/combined_training_data_NO_CIRCULAR.csv
+    python ml-service/training/feature_cache.py clear
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from dataset_io import read_dataset, file_hash, TRAINING_COLUMNS
+from train_models_improved import FEATURE_COLS, LABEL_COLS, FEATURE_SPEC_VERSION, engineer_features
+
+CACHE_DIR = Path(__file__).parent.parent / 'data' / 'feature_cache'
+
+def cache_dir_for(data_path):
+    return CACHE_DIR / f"{file_hash(data_path)[:16]}_v{FEATURE_SPEC_VERSION}"
+
+def split_indices(n_rows):
+    """Row indices of the training split: 15% test, then 17.6% of the rest as validation"""
+    temp_idx, test_idx = train_test_split(np.arange(n_rows), test_size=0.15, random_state=42)
+    train_idx, val_idx = train_test_split(temp_idx, test_size=0.176, random_state=42)
+    return {'train': train_idx, 'val': val_idx, 'test': test_idx}
+
+def build_cache(data_path, target_dir):
+    """Read, engineer and split the dataset, then write the .npy files atomically"""
+    df = read_dataset(data_path, columns=TRAINING_COLUMNS)
+    X, feature_cols = engineer_features(df[FEATURE_COLS].values, FEATURE_COLS, verbose=False)
+    w = df['sample_weight'].values if 'sample_weight' in df.columns else np.ones(len(df))
+
+    tmp_dir = target_dir.with_name(f'{target_dir.name}.{os.getpid()}.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    np.save(tmp_dir / 'X.npy', np.ascontiguousarray(X))
+    np.save(tmp_dir / 'y.npy', np.ascontiguousarray(df[LABEL_COLS].values))
+    np.save(tmp_dir / 'w.npy', np.asarray(w, dtype=np.float64))
+    for split, idx in split_indices(len(df)).items():
+        np.save(tmp_dir / f'{split}_idx.npy', idx)
+    meta = {
+        'dataset': str(data_path),
+        'rows': len(df),
+        'feature_cols': feature_cols,
+        'label_cols': LABEL_COLS,
+        'feature_spec_version': FEATURE_SPEC_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    (tmp_dir / 'meta.json').write_text(json.dumps(meta, indent=2))
+
+    try:
+        tmp_dir.rename(target_dir)
+    except OSError:
+        # Another process finished the same cache first - theirs is identical
+        shutil.rmtree(tmp_dir)
+
+def load_features(data_path, verbose=True):
+    """Engineered features, labels, weights and split indices of a dataset (memory-mapped)
+
+    Returns a dict with 'X' (n x 46), 'y' ({dimension: labels}), 'w',
+    'split' ({'train', 'val', 'test': row indices}), 'feature_cols' and 'rows'.
+    """
+    start = time.time()
+    target_dir = cache_dir_for(data_path)
+    hit = target_dir.exists()
+    if not hit:
+        if verbose:
+            print(f"[CACHE] Building feature cache for {Path(data_path).name}...")
+        build_cache(data_path, target_dir)
+
+    meta = json.loads((target_dir / 'meta.json').read_text())
+    y = np.load(target_dir / 'y.npy', mmap_mode='r')
+    features = {
+        'X': np.load(target_dir / 'X.npy', mmap_mode='r'),
+        'y': {col: y[:, i] for i, col in enumerate(meta['label_cols'])},
+        'w': np.load(target_dir / 'w.npy', mmap_mode='r'),
+        'split': {split: np.load(target_dir / f'{split}_idx.npy') for split in ('train', 'val', 'test')},
+        'feature_cols': meta['feature_cols'],
+        'rows': meta['rows']
+    }
+    if verbose:
+        state = 'hit' if hit else 'built'
+        print(f"[CACHE] Feature cache {state}: {meta['rows']:,} rows x {len(meta['feature_cols'])} features "
+              f"({time.time() - start:.2f}s, {target_dir.name})")
+    return features
+
+def main():
+    parser = argparse.ArgumentParser(description='Engineered-feature cache for the evaluation scripts')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='Build (or reuse) the cache of a dataset')
+    build.add_argument('data', help='Dataset CSV path')
+    sub.add_parser('clear', help='Delete every cached feature matrix')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        load_features(args.data)
+    elif CACHE_DIR.exists():
+        shutil.rmtree(CACHE_DIR)
+        print(f"[OK] Removed {CACHE_DIR}")
+
+if __name__ == '__main__':
+    main()
@@ -1,206 +1,300 @@
 """
 Generate Synthetic Training Data for FSLSM Classification
 Creates realistic behavioral data with known learning style labels
+
+Vectorized: all profiles are drawn as one (N, 4) integer array and every
+feature column is filled at once, with per-row parameters selected by the
+branch (first pole < -3, second pole > 3, balanced) of its dimension.
+
+Sharded: rows are generated in fixed-size shards, shard i drawing from its
+own SeedSequence child (seed, spawn_key=(i,)). Output is bit-identical for
+any number of worker processes, and --shards-dir writes each shard straight
+to disk so very large benchmark datasets never sit in one process.
+
+Streaming: training_data.csv is written shard by shard (memory bounded by
+--shard-size), and --append adds new shards to an existing dataset,
+continuing the shard numbering so appended rows never repeat earlier ones.
+
+Columnar: every CSV also gets a typed Parquet sibling (see dataset_io.py)
+that the training and evaluation loaders read instead when it is fresh.
 """
 
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 from pathlib import Path
 
-# Set random seed for reproducibility
-np.random.seed(42)
+from dataset_io import ColumnarWriter, columnar_available, convert_to_columnar, count_rows
+
+FEATURE_COLS = [
+    'activeModeRatio', 'questionsGenerated', 'debatesParticipated',
+    'reflectiveModeRatio', 'reflectionsWritten', 'journalEntries',
+    'aiAskModeRatio', 'aiResearchModeRatio',  # AI Assistant features for Active/Reflective
+    'sensingModeRatio', 'simulationsCompleted', 'challengesCompleted',
+    'intuitiveModeRatio', 'conceptsExplored', 'patternsDiscovered',
+    'aiTextToDocsRatio',  # AI Assistant feature for Sensing/Intuitive
+    'visualModeRatio', 'diagramsViewed', 'wireframesExplored',
+    'verbalModeRatio', 'textRead', 'summariesCreated',
+    'sequentialModeRatio', 'stepsCompleted', 'linearNavigation',
+    'globalModeRatio', 'overviewsViewed', 'navigationJumps'
+]
+LABEL_COLS = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
 
-def generate_learning_style_profile():
-    """Generate a random learning style profile"""
-    return {
-        'activeReflective': np.random.randint(-11, 12),
-        'sensingIntuitive': np.random.randint(-11, 12),
-        'visualVerbal': np.random.randint(-11, 12),
-        'sequentialGlobal': np.random.randint(-11, 12)
+# Per dimension: (ratio feature, complement feature) and, for every feature,
+# its parameters per branch [first pole (< -3), second pole (> 3), balanced].
+# 'uniform' features use uniform(low, high), 'counts' use integers(low, high).
+DIMENSION_SPECS = {
+    'activeReflective': {
+        'ratio': ('activeModeRatio', 'reflectiveModeRatio'),
+        'uniform': {
+            'activeModeRatio': [(0.6, 0.9), (0.1, 0.4), (0.4, 0.6)],
+            # AI Assistant: Active learners prefer Ask mode, Reflective learners Research mode
+            'aiAskModeRatio': [(0.6, 0.9), (0.1, 0.4), (0.4, 0.6)],
+            'aiResearchModeRatio': [(0.1, 0.4), (0.6, 0.9), (0.4, 0.6)]
+        },
+        'counts': {
+            'questionsGenerated': [(15, 50), (0, 15), (5, 25)],
+            'debatesParticipated': [(5, 20), (0, 5), (2, 10)],
+            'reflectionsWritten': [(0, 10), (10, 40), (5, 20)],
+            'journalEntries': [(0, 5), (5, 20), (2, 10)]
+        }
+    },
+    'sensingIntuitive': {
+        'ratio': ('sensingModeRatio', 'intuitiveModeRatio'),
+        'uniform': {
+            'sensingModeRatio': [(0.6, 0.9), (0.1, 0.4), (0.4, 0.6)],
+            # AI Assistant: Sensing learners prefer Text to Docs (practical outputs)
+            'aiTextToDocsRatio': [(0.6, 0.9), (0.1, 0.4), (0.4, 0.6)]
+        },
+        'counts': {
+            'simulationsCompleted': [(10, 40), (0, 10), (5, 20)],
+            'challengesCompleted': [(8, 30), (0, 8), (4, 15)],
+            'conceptsExplored': [(0, 10), (15, 50), (5, 25)],
+            'patternsDiscovered': [(0, 5), (10, 30), (3, 15)]
+        }
+    },
+    'visualVerbal': {
+        'ratio': ('visualModeRatio', 'verbalModeRatio'),
+        'uniform': {
+            'visualModeRatio': [(0.6, 0.9), (0.1, 0.4), (0.4, 0.6)]
+        },
+        'counts': {
+            'diagramsViewed': [(20, 60), (0, 20), (10, 35)],
+            'wireframesExplored': [(10, 40), (0, 10), (5, 20)],
+            'textRead': [(0, 15), (20, 60), (10, 35)],
+            'summariesCreated': [(0, 8), (10, 30), (5, 18)]
+        }
+    },
+    'sequentialGlobal': {
+        'ratio': ('sequentialModeRatio', 'globalModeRatio'),
+        'uniform': {
+            'sequentialModeRatio': [(0.6, 0.9), (0.1, 0.4), (0.4, 0.6)]
+        },
+        'counts': {
+            'stepsCompleted': [(25, 70), (0, 25), (12, 40)],
+            'linearNavigation': [(30, 80), (0, 30), (15, 50)],
+            'overviewsViewed': [(0, 10), (15, 50), (7, 25)],
+            'navigationJumps': [(0, 8), (20, 60), (8, 30)]
+        }
     }
+}
+
+NOISE_SCALE = 0.05
+
+SEED = 42
+SHARD_SIZE = 1_000_000
+
+def generate_learning_style_profiles(n_samples, rng):
+    """Draw n_samples learning style profiles as an (N, 4) integer array"""
+    return rng.integers(-11, 12, size=(n_samples, len(LABEL_COLS)))
+
+def branch_params(branches, params):
+    """Per-row (low, high) arrays for the branch index of each row"""
+    table = np.asarray(params, dtype=float)
+    return table[branches, 0], table[branches, 1]
 
-def generate_features_from_profile(profile):
-    """Generate behavioral features that align with learning style profile"""
+def generate_features_from_profiles(profiles, rng):
+    """Generate behavioral feature columns that align with the profiles"""
+    n_samples = len(profiles)
     features = {}
-    
-    # Active/Reflective Features
-    if profile['activeReflective'] < -3:  # Active preference
-        features['activeModeRatio'] = np.random.uniform(0.6, 0.9)
-        features['questionsGenerated'] = np.random.randint(15, 50)
-        features['debatesParticipated'] = np.random.randint(5, 20)
-        features['reflectiveModeRatio'] = 1 - features['activeModeRatio']
-        features['reflectionsWritten'] = np.random.randint(0, 10)
-        features['journalEntries'] = np.random.randint(0, 5)
-        # AI Assistant: Active learners prefer Ask mode (quick questions)
-        features['aiAskModeRatio'] = np.random.uniform(0.6, 0.9)
-        features['aiResearchModeRatio'] = np.random.uniform(0.1, 0.4)
-    elif profile['activeReflective'] > 3:  # Reflective preference
-        features['activeModeRatio'] = np.random.uniform(0.1, 0.4)
-        features['questionsGenerated'] = np.random.randint(0, 15)
-        features['debatesParticipated'] = np.random.randint(0, 5)
-        features['reflectiveModeRatio'] = 1 - features['activeModeRatio']
-        features['reflectionsWritten'] = np.random.randint(10, 40)
-        features['journalEntries'] = np.random.randint(5, 20)
-        # AI Assistant: Reflective learners prefer Research mode (deep exploration)
-        features['aiAskModeRatio'] = np.random.uniform(0.1, 0.4)
-        features['aiResearchModeRatio'] = np.random.uniform(0.6, 0.9)
-    else:  # Balanced
-        features['activeModeRatio'] = np.random.uniform(0.4, 0.6)
-        features['questionsGenerated'] = np.random.randint(5, 25)
-        features['debatesParticipated'] = np.random.randint(2, 10)
-        features['reflectiveModeRatio'] = 1 - features['activeModeRatio']
-        features['reflectionsWritten'] = np.random.randint(5, 20)
-        features['journalEntries'] = np.random.randint(2, 10)
-        # AI Assistant: Balanced usage
-        features['aiAskModeRatio'] = np.random.uniform(0.4, 0.6)
-        features['aiResearchModeRatio'] = np.random.uniform(0.4, 0.6)
-    
-    # Sensing/Intuitive Features
-    if profile['sensingIntuitive'] < -3:  # Sensing preference
-        features['sensingModeRatio'] = np.random.uniform(0.6, 0.9)
-        features['simulationsCompleted'] = np.random.randint(10, 40)
-        features['challengesCompleted'] = np.random.randint(8, 30)
-        features['intuitiveModeRatio'] = 1 - features['sensingModeRatio']
-        features['conceptsExplored'] = np.random.randint(0, 10)
-        features['patternsDiscovered'] = np.random.randint(0, 5)
-        # AI Assistant: Sensing learners prefer Text to Docs (practical outputs)
-        features['aiTextToDocsRatio'] = np.random.uniform(0.6, 0.9)
-    elif profile['sensingIntuitive'] > 3:  # Intuitive preference
-        features['sensingModeRatio'] = np.random.uniform(0.1, 0.4)
-        features['simulationsCompleted'] = np.random.randint(0, 10)
-        features['challengesCompleted'] = np.random.randint(0, 8)
-        features['intuitiveModeRatio'] = 1 - features['sensingModeRatio']
-        features['conceptsExplored'] = np.random.randint(15, 50)
-        features['patternsDiscovered'] = np.random.randint(10, 30)
-        # AI Assistant: Intuitive learners use less Text to Docs (prefer exploration)
-        features['aiTextToDocsRatio'] = np.random.uniform(0.1, 0.4)
-    else:  # Balanced
-        features['sensingModeRatio'] = np.random.uniform(0.4, 0.6)
-        features['simulationsCompleted'] = np.random.randint(5, 20)
-        features['challengesCompleted'] = np.random.randint(4, 15)
-        features['intuitiveModeRatio'] = 1 - features['sensingModeRatio']
-        features['conceptsExplored'] = np.random.randint(5, 25)
-        features['patternsDiscovered'] = np.random.randint(3, 15)
-        # AI Assistant: Balanced usage
-        features['aiTextToDocsRatio'] = np.random.uniform(0.4, 0.6)
-    
-    # Visual/Verbal Features
-    if profile['visualVerbal'] < -3:  # Visual preference
-        features['visualModeRatio'] = np.random.uniform(0.6, 0.9)
-        features['diagramsViewed'] = np.random.randint(20, 60)
-        features['wireframesExplored'] = np.random.randint(10, 40)
-        features['verbalModeRatio'] = 1 - features['visualModeRatio']
-        features['textRead'] = np.random.randint(0, 15)
-        features['summariesCreated'] = np.random.randint(0, 8)
-    elif profile['visualVerbal'] > 3:  # Verbal preference
-        features['visualModeRatio'] = np.random.uniform(0.1, 0.4)
-        features['diagramsViewed'] = np.random.randint(0, 20)
-        features['wireframesExplored'] = np.random.randint(0, 10)
-        features['verbalModeRatio'] = 1 - features['visualModeRatio']
-        features['textRead'] = np.random.randint(20, 60)
-        features['summariesCreated'] = np.random.randint(10, 30)
-    else:  # Balanced
-        features['visualModeRatio'] = np.random.uniform(0.4, 0.6)
-        features['diagramsViewed'] = np.random.randint(10, 35)
-        features['wireframesExplored'] = np.random.randint(5, 20)
-        features['verbalModeRatio'] = 1 - features['visualModeRatio']
-        features['textRead'] = np.random.randint(10, 35)
-        features['summariesCreated'] = np.random.randint(5, 18)
-    
-    # Sequential/Global Features
-    if profile['sequentialGlobal'] < -3:  # Sequential preference
-        features['sequentialModeRatio'] = np.random.uniform(0.6, 0.9)
-        features['stepsCompleted'] = np.random.randint(25, 70)
-        features['linearNavigation'] = np.random.randint(30, 80)
-        features['globalModeRatio'] = 1 - features['sequentialModeRatio']
-        features['overviewsViewed'] = np.random.randint(0, 10)
-        features['navigationJumps'] = np.random.randint(0, 8)
-    elif profile['sequentialGlobal'] > 3:  # Global preference
-        features['sequentialModeRatio'] = np.random.uniform(0.1, 0.4)
-        features['stepsCompleted'] = np.random.randint(0, 25)
-        features['linearNavigation'] = np.random.randint(0, 30)
-        features['globalModeRatio'] = 1 - features['sequentialModeRatio']
-        features['overviewsViewed'] = np.random.randint(15, 50)
-        features['navigationJumps'] = np.random.randint(20, 60)
-    else:  # Balanced
-        features['sequentialModeRatio'] = np.random.uniform(0.4, 0.6)
-        features['stepsCompleted'] = np.random.randint(12, 40)
-        features['linearNavigation'] = np.random.randint(15, 50)
-        features['globalModeRatio'] = 1 - features['sequentialModeRatio']
-        features['overviewsViewed'] = np.random.randint(7, 25)
-        features['navigationJumps'] = np.random.randint(8, 30)
-    
-    # Add some noise to make it realistic
-    for key in features:
-        if isinstance(features[key], (int, float)):
-            noise = np.random.normal(0, 0.05 * features[key])
-            features[key] = max(0, features[key] + noise)
-    
+
+    for dim_index, (dim_label, spec) in enumerate(DIMENSION_SPECS.items()):
+        scores = profiles[:, dim_index]
+        # 0 = first pole (< -3), 1 = second pole (> 3), 2 = balanced
+        branches = np.where(scores < -3, 0, np.where(scores > 3, 1, 2))
+
+        for col, params in spec['uniform'].items():
+            low, high = branch_params(branches, params)
+            features[col] = rng.uniform(low, high)
+        for col, params in spec['counts'].items():
+            low, high = branch_params(branches, params)
+            features[col] = rng.integers(low.astype(np.int64), high.astype(np.int64)).astype(float)
+
+        ratio_col, complement_col = spec['ratio']
+        features[complement_col] = 1 - features[ratio_col]
+
+    # Add some noise to make it realistic (relative to each value, floored at 0)
+    for col in FEATURE_COLS:
+        values = features[col]
+        features[col] = np.maximum(0, values + rng.normal(0, 1, n_samples) * (NOISE_SCALE * values))
+
     return features
 
-def generate_dataset(n_samples=2500):
+def shard_rng(seed, shard_index):
+    """Independent generator for one shard (the shard_index-th SeedSequence child)"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard_index,)))
+
+def shard_sizes(n_samples, shard_size=SHARD_SIZE):
+    """Fixed shard layout - depends only on n_samples and shard_size"""
+    return [min(shard_size, n_samples - start) for start in range(0, n_samples, shard_size)]
+
+def generate_shard(n_rows, seed, shard_index):
+    """Generate one shard of features and labels"""
+    rng = shard_rng(seed, shard_index)
+    profiles = generate_learning_style_profiles(n_rows, rng)
+    features = generate_features_from_profiles(profiles, rng)
+
+    df = pd.DataFrame(features)[FEATURE_COLS]
+    for dim_index, col in enumerate(LABEL_COLS):
+        df[col] = profiles[:, dim_index]
+    return df
+
+def generate_dataset(n_samples=2500, seed=SEED, shard_size=SHARD_SIZE):
     """Generate complete dataset with features and labels"""
-    data = []
-    
-    print(f"Generating {n_samples} synthetic training samples...")
-    
-    for i in range(n_samples):
-        # Generate learning style profile (labels)
-        profile = generate_learning_style_profile()
-        
-        # Generate features that align with profile
-        features = generate_features_from_profile(profile)
-        
-        # Combine into single record
-        record = {**features, **profile}
-        data.append(record)
-        
-        if (i + 1) % 500 == 0:
-            print(f"Generated {i + 1}/{n_samples} samples...")
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    # Reorder columns: features first, then labels
-    feature_cols = [
-        'activeModeRatio', 'questionsGenerated', 'debatesParticipated',
-        'reflectiveModeRatio', 'reflectionsWritten', 'journalEntries',
-        'aiAskModeRatio', 'aiResearchModeRatio',  # AI Assistant features for Active/Reflective
-        'sensingModeRatio', 'simulationsCompleted', 'challengesCompleted',
-        'intuitiveModeRatio', 'conceptsExplored', 'patternsDiscovered',
-        'aiTextToDocsRatio',  # AI Assistant feature for Sensing/Intuitive
-        'visualModeRatio', 'diagramsViewed', 'wireframesExplored',
-        'verbalModeRatio', 'textRead', 'summariesCreated',
-        'sequentialModeRatio', 'stepsCompleted', 'linearNavigation',
-        'globalModeRatio', 'overviewsViewed', 'navigationJumps'
-    ]
-    label_cols = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
-    
-    df = df[feature_cols + label_cols]
-    
+    print(f"Generating {n_samples:,} synthetic training samples...")
+    start_time = time.time()
+
+    shards = [generate_shard(size, seed, i) for i, size in enumerate(shard_sizes(n_samples, shard_size))]
+    df = pd.concat(shards, ignore_index=True) if len(shards) > 1 else shards[0]
+
+    print(f"Generated {n_samples:,} samples in {time.time() - start_time:.2f}s")
     return df
 
+def write_shard(args):
+    """Worker: generate one shard and write it to disk"""
+    n_rows, seed, shard_index, shards_dir = args
+    shard_path = Path(shards_dir) / f'part-{shard_index:05d}.csv'
+    shard = generate_shard(n_rows, seed, shard_index)
+    shard.to_csv(shard_path, index=False)
+    columnar = ColumnarWriter(shard_path)
+    columnar.write(shard)
+    columnar.close()
+    return shard_path
+
+def generate_shards_to_disk(n_samples, shards_dir, seed=SEED, shard_size=SHARD_SIZE, workers=None, append=False):
+    """Generate shards across a process pool, each written to shards_dir/part-NNNNN.csv"""
+    shards_dir = Path(shards_dir)
+    shards_dir.mkdir(parents=True, exist_ok=True)
+    sizes = shard_sizes(n_samples, shard_size)
+    workers = workers or os.cpu_count()
+
+    existing = sorted(shards_dir.glob('part-*.csv'))
+    if existing and not append:
+        raise FileExistsError(f"{shards_dir} already has {len(existing)} shards - use --append or remove them")
+    first_shard = int(existing[-1].stem.split('-')[1]) + 1 if existing else 0
+
+    print(f"Generating {n_samples:,} samples in {len(sizes)} shards with {workers} worker(s)...")
+    start_time = time.time()
+    tasks = [(size, seed, first_shard + i, str(shards_dir)) for i, size in enumerate(sizes)]
+
+    paths = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for shard_path in pool.map(write_shard, tasks):
+            paths.append(shard_path)
+            print(f"  [SHARD] {shard_path.name} written ({len(paths)}/{len(sizes)})")
+
+    elapsed = time.time() - start_time
+    print(f"Generated {n_samples:,} samples in {elapsed:.1f}s ({n_samples / elapsed:,.0f} rows/sec)")
+    return paths
+
+def write_dataset(output_path, n_samples, seed=SEED, shard_size=SHARD_SIZE, append=False):
+    """Stream shards into one CSV; returns per-label (sum, sum of squares) and the first rows"""
+    first_shard = 0
+    if append and output_path.exists():
+        existing_rows = count_rows(output_path)
+        if existing_rows % shard_size:
+            print(f"⚠️  {existing_rows:,} existing rows is not a multiple of --shard-size {shard_size:,}")
+        first_shard = -(-existing_rows // shard_size)
+        print(f"Appending after {existing_rows:,} existing rows (from shard {first_shard})")
+    else:
+        # Write to a temporary file so an interrupted run never leaves a truncated dataset
+        append = False
+        write_path = output_path.with_suffix('.csv.tmp')
+
+    target = output_path if append else write_path
+    columnar = None if append else ColumnarWriter(output_path)
+    sums = {col: [0.0, 0.0] for col in LABEL_COLS}
+    head = None
+    start_time = time.time()
+
+    for i, size in enumerate(shard_sizes(n_samples, shard_size)):
+        shard = generate_shard(size, seed, first_shard + i)
+        shard.to_csv(target, mode='a' if append or i else 'w', header=not append and i == 0, index=False)
+        if columnar:
+            columnar.write(shard)
+        for col in LABEL_COLS:
+            sums[col][0] += shard[col].sum()
+            sums[col][1] += (shard[col].astype(float) ** 2).sum()
+        if head is None:
+            head = shard.head()
+        print(f"  [SHARD] {first_shard + i}: {size:,} rows written")
+
+    if not append:
+        write_path.replace(output_path)
+        columnar.close()
+    elif columnar_available():
+        # Parquet files cannot be appended to: rebuild the sibling from the CSV
+        print("Rebuilding the Parquet sibling of the appended dataset...")
+        convert_to_columnar(output_path)
+    print(f"Generated {n_samples:,} samples in {time.time() - start_time:.2f}s")
+    return sums, head
+
 def main():
     """Main function to generate and save training data"""
+    parser = argparse.ArgumentParser(description='Generate synthetic FSLSM training data')
+    parser.add_argument('--rows', type=int, default=5000,
+                        help='Number of samples to generate')
+    parser.add_argument('--seed', type=int, default=SEED,
+                        help='Root seed of the per-shard SeedSequence streams')
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE,
+                        help='Rows per shard (changing it changes the generated rows)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for --shards-dir (default: all cores)')
+    parser.add_argument('--shards-dir', default=None,
+                        help='Write part-NNNNN.csv shards to this directory (under data/) instead of training_data.csv')
+    parser.add_argument('--append', action='store_true',
+                        help='Add the new rows to the existing dataset / shards directory')
+    args = parser.parse_args()
+
     # Create data directory if it doesn't exist
     data_dir = Path(__file__).parent.parent / 'data'
     data_dir.mkdir(exist_ok=True)
-    
+
+    if args.shards_dir:
+        paths = generate_shards_to_disk(args.rows, data_dir / args.shards_dir, args.seed, args.shard_size,
+                                        args.workers, append=args.append)
+        print(f"\n✅ {len(paths)} shards saved to: {data_dir / args.shards_dir}")
+        return
+
     # Generate dataset with 5000 samples for better accuracy
-    df = generate_dataset(n_samples=5000)
-    
-    # Save to CSV
     output_path = data_dir / 'training_data.csv'
-    df.to_csv(output_path, index=False)
-    
+    sums, head = write_dataset(output_path, args.rows, args.seed, args.shard_size, append=args.append)
+
     print(f"\n✅ Training data saved to: {output_path}")
-    print(f"📊 Dataset shape: {df.shape}")
-    print(f"\n📈 Label distributions:")
+    print(f"📊 Rows generated: {args.rows:,} ({len(head.columns)} columns)")
+    print(f"\n📈 Label distributions (generated rows):")
+    n = args.rows
     for col in ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']:
-        print(f"  {col}: mean={df[col].mean():.2f}, std={df[col].std():.2f}")
-    
+        total, total_sq = sums[col]
+        mean = total / n
+        std = np.sqrt(max(total_sq - n * mean ** 2, 0) / max(n - 1, 1))
+        print(f"  {col}: mean={mean:.2f}, std={std:.2f}")
+
     print(f"\n🎯 Sample records:")
-    print(df.head())
+    print(head)
 
 if __name__ == '__main__':
     main()
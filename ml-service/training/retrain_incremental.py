@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental (Warm-Start) Retraining for FSLSM Models
+Updates the production *_improved models with NEW real-user rows only
+
+Modes:
+1. continue - keep every existing tree and boost a bounded number of new trees
+2. refresh  - keep the tree structure, re-fit leaf values on the new rows
+
+Safety:
+- The existing scaler_improved.pkl is reused (trees split on scaled values)
+- Holdout R2 of the updated models is compared with the previous models
+  BEFORE anything is written; regressions leave the old artifacts untouched
+- Rows already absorbed are tracked in models/incremental_manifest.json;
+  a full train_models_improved.py run resets it to the real-user rows of
+  its training set (the first incremental run seeds it the same way)
+- Export rows are aligned with combine_datasets.py: missing AI columns are
+  filled with 0 and real users get sample_weight 5.0
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import r2_score
+import xgboost as xgb
+
+from train_models_improved import (load_training_data, prepare_data, select_data_path, get_sample_weights,
+                                   FEATURE_COLS, LABEL_COLS)
+from dataset_io import read_dataset, dataset_exists
+from run_report import RunReport
+
+DIMENSIONS = {
+    'activeReflective': 'active_reflective_improved',
+    'sensingIntuitive': 'sensing_intuitive_improved',
+    'visualVerbal': 'visual_verbal_improved',
+    'sequentialGlobal': 'sequential_global_improved'
+}
+
+MANIFEST_FILE = 'incremental_manifest.json'
+REAL_USER_WEIGHT = 5.0  # combine_datasets.py real_user_weight
+
+def align_columns(df):
+    """Features and labels in training order; missing (AI) columns filled with 0 like combine_datasets.py"""
+    return df.reindex(columns=FEATURE_COLS + LABEL_COLS).fillna(0)
+
+def row_hashes(df):
+    """Stable per-row content hashes of features + labels (at float32, so CSV and Parquet rows hash alike)"""
+    values = align_columns(df).astype(np.float32)
+    return pd.util.hash_pandas_object(values, index=False).map('{:016x}'.format)
+
+def training_manifest(data_path, mode='full'):
+    """Manifest marking the real-user rows of a training dataset as already absorbed"""
+    df = read_dataset(data_path, columns=FEATURE_COLS + LABEL_COLS + ['source'])
+    real = df[df['source'] == 'real_user'] if 'source' in df.columns else df.iloc[:0]
+    return {
+        'seen_rows': sorted(set(row_hashes(real))),
+        'history': [{
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'mode': mode,
+            'data': Path(data_path).name,
+            'real_user_rows': int(len(real))
+        }]
+    }
+
+def reset_manifest(models_dir, data_path):
+    """Called after a full retrain: only rows outside its training set are new"""
+    manifest = training_manifest(data_path)
+    save_manifest(Path(models_dir), manifest)
+    print(f"[OK] Incremental manifest reset: {len(manifest['seen_rows'])} real-user rows already in training")
+
+def load_manifest(models_dir, data_path):
+    """Load the manifest of rows already absorbed (seeded from the base dataset when missing)"""
+    manifest_path = models_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        return training_manifest(data_path, mode='seed')
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def save_manifest(models_dir, manifest):
+    """Save the manifest next to the model artifacts"""
+    with open(models_dir / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def load_current_models(models_dir):
+    """Load scaler_improved.pkl and the four *_improved models"""
+    scaler_path = models_dir / 'scaler_improved.pkl'
+    if not scaler_path.exists():
+        raise FileNotFoundError(f"Scaler not found at {scaler_path} - run train_models_improved.py first")
+
+    scaler = joblib.load(scaler_path)
+    models = {}
+    for dim_label, dim_file in DIMENSIONS.items():
+        model_path = models_dir / f'{dim_file}.pkl'
+        if not model_path.exists():
+            raise FileNotFoundError(f"Model not found at {model_path} - run train_models_improved.py first")
+        models[dim_label] = joblib.load(model_path)
+    return scaler, models
+
+def continue_boosting(model, X_new, y_new, w_new, max_new_trees):
+    """Append at most max_new_trees trees fitted on the new rows"""
+    updated = xgb.XGBRegressor(**model.get_params())
+    updated.set_params(n_estimators=max_new_trees)
+    updated.fit(X_new, y_new, sample_weight=w_new, xgb_model=model.get_booster().copy())
+    return updated
+
+def refresh_leaves(model, X_new, y_new, w_new):
+    """Re-fit leaf values of the existing trees on the new rows (no new trees)"""
+    booster = model.get_booster().copy()
+    tree_param = json.loads(booster.save_config())['learner']['gradient_booster']['gbtree_train_param']
+    n_rounds = booster.num_boosted_rounds()
+
+    refreshed = xgb.train(
+        {'process_type': 'update', 'updater': 'refresh', 'refresh_leaf': True},
+        xgb.DMatrix(X_new, label=y_new, weight=w_new),
+        num_boost_round=n_rounds,
+        xgb_model=booster
+    )
+    # Restore the normal training updater so later warm starts grow trees again
+    refreshed.set_param({'process_type': 'default', 'updater': tree_param['updater']})
+
+    updated = xgb.XGBRegressor(**model.get_params())
+    updated.load_model(bytearray(refreshed.save_raw('ubj')))
+    return updated
+
+def full_refit(model, X_train, y_train, w_train):
+    """Reference full retrain with the same hyperparameters (no grid search)"""
+    fresh = xgb.XGBRegressor(**model.get_params())
+    fresh.fit(X_train, y_train, sample_weight=w_train)
+    return fresh
+
+def main():
+    """Main incremental retraining function"""
+    parser = argparse.ArgumentParser(description='Warm-start retraining on new real-user data')
+    parser.add_argument('--new-data', default='real_training_data.csv',
+                        help='CSV in data/ with new ILS-labelled rows (export_real_data.py output; its '
+                             'incremental partitions are read instead when newer)')
+    parser.add_argument('--mode', choices=['continue', 'refresh'], default='continue',
+                        help='continue = add trees, refresh = re-fit leaf values only')
+    parser.add_argument('--max-new-trees', type=int, default=50,
+                        help='Upper bound on trees added per dimension in continue mode')
+    parser.add_argument('--holdout-fraction', type=float, default=0.2,
+                        help='Share of the new rows held out for the R2 guard')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='Allowed drop in holdout R2 per dimension before rejecting the update')
+    parser.add_argument('--real-user-weight', type=float, default=REAL_USER_WEIGHT,
+                        help='sample_weight of the new real-user rows (combine_datasets.py uses 5.0)')
+    parser.add_argument('--compare-full', action='store_true',
+                        help='Also time a full refit on base + new data for comparison')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("INCREMENTAL FSLSM Model Retraining (warm start)")
+    print("=" * 70)
+
+    project_root = Path(__file__).parent.parent
+    models_dir = project_root / 'models'
+    new_data_path = project_root / 'data' / args.new_data
+
+    if not dataset_exists(new_data_path):
+        print(f"[ERROR] New data not found: {new_data_path}")
+        print("   Run: python ml-service/export_real_data.py")
+        return
+
+    report = RunReport(Path(__file__).stem, new_data_path)
+    report.stage('load_data')
+    scaler, models = load_current_models(models_dir)
+    print(f"[OK] Loaded current models ({len(models)} dimensions)")
+
+    base_path = select_data_path(project_root)
+    manifest = load_manifest(models_dir, base_path)
+    seen = set(manifest['seen_rows'])
+
+    df_new_all = load_training_data(new_data_path)
+    hashes = row_hashes(df_new_all)
+    is_new = ~hashes.isin(seen)
+    df_new = align_columns(df_new_all[is_new.values]).reset_index(drop=True)
+    if 'sample_weight' in df_new_all.columns:
+        df_new['sample_weight'] = df_new_all.loc[is_new.values, 'sample_weight'].values
+    else:
+        df_new['sample_weight'] = args.real_user_weight
+
+    print(f"\n[DATA] New or changed rows: {len(df_new)} (of {len(df_new_all)} in {new_data_path.name})")
+    if len(df_new) == 0:
+        print("[DONE] Models are already up to date - nothing to retrain")
+        return
+
+    X_new, y_new, _ = prepare_data(df_new)
+    w_new = get_sample_weights(df_new)
+    X_new_scaled = scaler.transform(X_new)
+
+    # Holdout = base test split (never seen by the current models) + a slice of the new rows
+    print()
+    df_base = load_training_data(base_path)
+    X_base, y_base, _ = prepare_data(df_base)
+    X_base_temp, X_base_test = train_test_split(X_base, test_size=0.15, random_state=42)
+    w_base_temp, w_base_test = train_test_split(get_sample_weights(df_base), test_size=0.15, random_state=42)
+    X_base_test_scaled = scaler.transform(X_base_test)
+
+    n_new_holdout = int(len(df_new) * args.holdout_fraction)
+    new_idx = np.arange(len(df_new))
+    if n_new_holdout > 0:
+        new_fit_idx, new_holdout_idx = train_test_split(new_idx, test_size=n_new_holdout, random_state=42)
+    else:
+        new_fit_idx, new_holdout_idx = new_idx, new_idx[:0]
+
+    print(f"\n[SPLIT] Incremental fit rows: {len(new_fit_idx)}")
+    print(f"[SPLIT] Holdout rows: {len(X_base_test)} base test + {len(new_holdout_idx)} new")
+
+    X_holdout = np.vstack([X_base_test_scaled, X_new_scaled[new_holdout_idx]])
+    X_fit = X_new_scaled[new_fit_idx]
+    w_holdout = np.concatenate([w_base_test, w_new[new_holdout_idx]])
+    w_fit = w_new[new_fit_idx]
+
+    y_base_train = {}
+    y_holdout = {}
+    for dim_label in models:
+        y_base_temp, y_base_test = train_test_split(y_base[dim_label], test_size=0.15, random_state=42)
+        y_base_train[dim_label] = y_base_temp
+        y_holdout[dim_label] = np.concatenate([y_base_test, y_new[dim_label][new_holdout_idx]])
+
+    updated_models = {}
+    results = {}
+    incremental_start = time.time()
+    report.stage(f'incremental_{args.mode}')
+
+    for dim_label, model in models.items():
+        y_fit = y_new[dim_label][new_fit_idx]
+
+        print(f"\n[TRAIN] {dim_label} ({args.mode})")
+        fit_start = time.time()
+        if args.mode == 'continue':
+            updated = continue_boosting(model, X_fit, y_fit, w_fit, args.max_new_trees)
+        else:
+            updated = refresh_leaves(model, X_fit, y_fit, w_fit)
+        fit_time = time.time() - fit_start
+        report.record_fit(dim_label, fit_time, updated.get_booster().num_boosted_rounds(), len(X_fit))
+
+        prev_r2 = r2_score(y_holdout[dim_label], model.predict(X_holdout), sample_weight=w_holdout)
+        new_r2 = r2_score(y_holdout[dim_label], updated.predict(X_holdout), sample_weight=w_holdout)
+        trees_added = updated.get_booster().num_boosted_rounds() - model.get_booster().num_boosted_rounds()
+
+        print(f"  [RESULT] Holdout R2: previous {prev_r2:.4f} -> updated {new_r2:.4f} ({new_r2 - prev_r2:+.4f})")
+        print(f"  [INFO] Trees added: {trees_added}, fit time: {fit_time:.2f}s")
+
+        updated_models[dim_label] = updated
+        results[dim_label] = {
+            'prev_r2': prev_r2,
+            'new_r2': new_r2,
+            'trees_added': trees_added,
+            'fit_seconds': fit_time
+        }
+
+    incremental_time = time.time() - incremental_start
+
+    full_time = None
+    if args.compare_full:
+        report.stage('full_refit')
+        print("\n[COMPARE] Timing a full refit on base train split + new rows...")
+        X_full = np.vstack([scaler.transform(X_base_temp), X_fit])
+        w_full = np.concatenate([w_base_temp, w_fit])
+        full_start = time.time()
+        for dim_label, model in models.items():
+            y_full = np.concatenate([y_base_train[dim_label], y_new[dim_label][new_fit_idx]])
+            fresh = full_refit(model, X_full, y_full, w_full)
+            results[dim_label]['full_r2'] = r2_score(y_holdout[dim_label], fresh.predict(X_holdout), sample_weight=w_holdout)
+        full_time = time.time() - full_start
+
+    # Guard: every dimension must hold its holdout R2 (within tolerance)
+    regressed = [d for d, r in results.items() if r['new_r2'] < r['prev_r2'] - args.tolerance]
+
+    report.set_metrics(results)
+    report.data['accepted'] = not regressed
+    report.save()
+
+    print("\n" + "=" * 70)
+    print("Incremental Retraining Summary")
+    print("=" * 70)
+    print(f"\n{'Dimension':<20} {'Prev R2':<10} {'New R2':<10} {'Trees +':<9}" + (f" {'Full R2':<10}" if full_time else ''))
+    print("-" * 70)
+    for dim_label, r in results.items():
+        line = f"{dim_label:<20} {r['prev_r2']:<10.4f} {r['new_r2']:<10.4f} {r['trees_added']:<9}"
+        if full_time:
+            line += f" {r['full_r2']:<10.4f}"
+        print(line)
+
+    print(f"\n[TIME] Incremental update: {incremental_time:.2f}s")
+    if full_time:
+        print(f"[TIME] Full refit (same params, no grid search): {full_time:.2f}s")
+        print(f"[TIME] Speed-up: {full_time / max(incremental_time, 1e-9):.1f}x")
+
+    if regressed:
+        print(f"\n[REJECTED] Holdout R2 dropped for: {', '.join(regressed)}")
+        print("   Previous models kept - no artifacts were written")
+        return
+
+    for dim_label, dim_file in DIMENSIONS.items():
+        model_path = models_dir / f'{dim_file}.pkl'
+        joblib.dump(updated_models[dim_label], model_path)
+        print(f"[OK] Model saved to: {model_path}")
+
+    manifest['seen_rows'] = sorted(seen | set(hashes))
+    manifest['history'].append({
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'mode': args.mode,
+        'new_rows': int(len(df_new)),
+        'incremental_seconds': round(incremental_time, 3),
+        'full_refit_seconds': round(full_time, 3) if full_time else None,
+        'holdout_r2': {d: round(r['new_r2'], 4) for d, r in results.items()}
+    })
+    save_manifest(models_dir, manifest)
+    print(f"[OK] Manifest updated: {models_dir / MANIFEST_FILE}")
+    print("\n[DONE] Incremental retraining complete!")
+
+if __name__ == '__main__':
+    main()
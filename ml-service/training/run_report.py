@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Structured Run Reports for the FSLSM Training Scripts
+Machine-readable telemetry instead of scraping stdout
+
+Every training script records per-stage wall time, per-fit duration, trees
+built, rows/sec, CPU time, peak RSS and the final metrics, and saves them as JSON in
+logs/run_reports/ (<script>_<timestamp>.json plus <script>_latest.json).
+
+Usage:
+    python ml-service/training/run_report.py show train_models_fast
+    python ml-service/training/run_report.py compare old_report.json train_models_fast
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPORTS_DIR = Path(__file__).parent.parent / 'logs' / 'run_reports'
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None if unavailable)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+def format_mb(value):
+    return f"{value:.0f} MB" if value is not None else "n/a"
+
+class RunReport:
+    """Collects timings, fits and metrics for one training run"""
+
+    def __init__(self, script, data_path=None):
+        self.data = {
+            'script': script,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'data_path': str(data_path) if data_path else None,
+            'stages': {},
+            'fits': {},
+            'metrics': {}
+        }
+        self._start = time.time()
+        self._cpu_start = time.process_time()
+        self._stage = None
+        self._stage_start = None
+
+    def stage(self, name):
+        """Close the running stage (if any) and start timing a new one"""
+        self._close_stage()
+        self._stage = name
+        self._stage_start = time.time()
+
+    def _close_stage(self):
+        if self._stage is not None:
+            self.data['stages'][self._stage] = round(time.time() - self._stage_start, 3)
+            self._stage = None
+
+    def record_fit(self, dimension, seconds, trees, rows):
+        """One model fit: duration, trees in the final model and training rows/sec"""
+        self.data['fits'][dimension] = {
+            'seconds': round(seconds, 3),
+            'trees': int(trees),
+            'rows': int(rows),
+            'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None
+        }
+
+    def record_search(self, dimension, grid_search, rows, seconds):
+        """GridSearchCV: every CV fit plus the refit of the best candidate"""
+        cv = grid_search.cv_results_
+        n_folds = grid_search.n_splits_
+        fit_times = np.asarray(cv['mean_fit_time'])
+        fold_rows = rows * (n_folds - 1) / n_folds
+        cv_trees = int(np.sum(np.asarray(cv['param_n_estimators'], dtype=float))) * n_folds \
+            if 'param_n_estimators' in cv else None
+        final_trees = grid_search.best_estimator_.get_booster().num_boosted_rounds()
+
+        self.data['fits'][dimension] = {
+            'seconds': round(seconds, 3),
+            'trees': int(final_trees),
+            'rows': int(rows),
+            'rows_per_sec': round(fold_rows * len(fit_times) * n_folds / seconds, 1) if seconds > 0 else None,
+            'search': {
+                'candidates': len(fit_times),
+                'folds': int(n_folds),
+                'cv_fits': int(len(fit_times) * n_folds),
+                'fit_seconds_mean': round(float(fit_times.mean()), 3),
+                'fit_seconds_min': round(float(fit_times.min()), 3),
+                'fit_seconds_max': round(float(fit_times.max()), 3),
+                'refit_seconds': round(float(getattr(grid_search, 'refit_time_', 0.0)), 3),
+                'trees_built': cv_trees + final_trees if cv_trees is not None else None
+            }
+        }
+
+    def set_metrics(self, results):
+        """Final per-dimension metrics plus the averages"""
+        for dim_label, metrics in results.items():
+            self.data['metrics'][dim_label] = {k: round(float(v), 4) for k, v in metrics.items()}
+        for key in ('test_r2', 'test_mae'):
+            values = [m[key] for m in results.values() if key in m]
+            if values:
+                self.data['metrics'][f'average_{key}'] = round(float(np.mean(values)), 4)
+
+    def save(self, reports_dir=REPORTS_DIR):
+        """Write <script>_<timestamp>.json and <script>_latest.json"""
+        self._close_stage()
+        self.data['wall_seconds'] = round(time.time() - self._start, 3)
+        self.data['cpu_seconds'] = round(time.process_time() - self._cpu_start, 3)  # all threads
+        peak = peak_rss_mb()
+        self.data['peak_rss_mb'] = round(peak, 1) if peak is not None else None
+
+        reports_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        report_path = reports_dir / f"{self.data['script']}_{stamp}.json"
+        for path in (report_path, reports_dir / f"{self.data['script']}_latest.json"):
+            with open(path, 'w') as f:
+                json.dump(self.data, f, indent=2)
+        print(f"[REPORT] Run report saved to: {report_path}")
+        return report_path
+
+def load_report(name_or_path):
+    """Load a report by path, or by script name (its latest report)"""
+    path = Path(name_or_path)
+    if not path.exists():
+        path = REPORTS_DIR / f'{name_or_path}_latest.json'
+    if not path.exists():
+        raise FileNotFoundError(f"No run report found for {name_or_path}")
+    with open(path) as f:
+        return json.load(f)
+
+def report_rows(report):
+    """Flatten a report into (label, value) rows for display"""
+    rows = [('Wall time (s)', report.get('wall_seconds')), ('CPU time (s)', report.get('cpu_seconds')),
+            ('Peak RSS (MB)', report.get('peak_rss_mb'))]
+    rows += [(f'Stage {name} (s)', seconds) for name, seconds in report['stages'].items()]
+    for dim_label, fit in report['fits'].items():
+        rows.append((f'{dim_label} fit (s)', fit['seconds']))
+        rows.append((f'{dim_label} trees', fit['trees']))
+        rows.append((f'{dim_label} rows/sec', fit['rows_per_sec']))
+        if 'search' in fit:
+            rows.append((f'{dim_label} CV fits', fit['search']['cv_fits']))
+    for key, label in (('average_test_r2', 'Average test R2'), ('average_test_mae', 'Average test MAE')):
+        if key in report['metrics']:
+            rows.append((label, report['metrics'][key]))
+    return rows
+
+def format_value(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.4f}' if abs(value) < 10 else f'{value:,.1f}'
+    return f'{value:,}'
+
+def show_report(report):
+    print(f"\n{report['script']} ({report['started']})")
+    print("-" * 50)
+    for label, value in report_rows(report):
+        print(f"  {label:<32} {format_value(value):>14}")
+
+def compare_reports(report_a, report_b):
+    """Print two reports side by side with the relative change"""
+    rows_a = dict(report_rows(report_a))
+    rows_b = dict(report_rows(report_b))
+    labels = list(rows_a) + [label for label in rows_b if label not in rows_a]
+
+    print(f"\nA: {report_a['script']} ({report_a['started']})")
+    print(f"B: {report_b['script']} ({report_b['started']})")
+    print(f"\n{'Metric':<32} {'A':>14} {'B':>14} {'Change':>9}")
+    print("-" * 72)
+    for label in labels:
+        a, b = rows_a.get(label), rows_b.get(label)
+        change = f'{(b - a) / abs(a) * 100:+.1f}%' if isinstance(a, (int, float)) and isinstance(b, (int, float)) and a else ''
+        print(f"{label:<32} {format_value(a):>14} {format_value(b):>14} {change:>9}")
+
+def main():
+    """Show or compare training run reports"""
+    parser = argparse.ArgumentParser(description='Show or compare FSLSM training run reports')
+    sub = parser.add_subparsers(dest='command', required=True)
+    show = sub.add_parser('show', help='Show one report')
+    show.add_argument('report', help='Report path or script name (latest report)')
+    compare = sub.add_parser('compare', help='Compare two reports side by side')
+    compare.add_argument('report_a', help='Baseline report path or script name')
+    compare.add_argument('report_b', help='New report path or script name')
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        show_report(load_report(args.report))
+    else:
+        compare_reports(load_report(args.report_a), load_report(args.report_b))
+
+if __name__ == '__main__':
+    main()
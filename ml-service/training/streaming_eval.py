@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming Evaluation with Mergeable Metric Accumulators
+Evaluate a model bundle on a holdout of any size in constant memory
+
+The holdout is read in chunks (dataset_io.iter_dataset: Parquet batches or
+CSV chunks). Each chunk goes through the bundle's feature pipeline, scaler
+and models, and is folded into one MetricAccumulator per dimension:
+  - regression: row count, Σ|e|, Σe², and the label mean / M2 (Welford),
+    which give MAE, MSE, RMSE and R² = 1 - SSE / M2
+  - classification: the 5x5 FSLSM category confusion matrix
+  - ROC: per true category, a histogram of the predicted scores over fixed
+    bins (ROC_BIN_WIDTH). A one-vs-rest curve per category is read off the
+    histogram, ranking bins by closeness to the category's centre.
+Accumulators merge exactly: counts and histograms add, and label moments
+combine with Chan's parallel update. Chunks can therefore be evaluated in
+worker processes. At most 2 chunks per worker are in flight, and the partials
+are merged in chunk order, so the result does not depend on the worker count.
+
+Usage:
+    python ml-service/training/streaming_eval.py evaluate data/holdout.csv --workers 4
+    python ml-service/training/streaming_eval.py verify data/combined_training_data_NO_CIRCULAR.csv
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from dataset_io import iter_dataset, TRAINING_COLUMNS
+from run_report import peak_rss_mb, format_mb
+from evaluation_engine import MODEL_BUNDLES, MODELS_DIR, load_bundle, bundle_exists
+from score_bins import categorize, confusion, classification_summary, CATEGORY_NAMES, N_CATEGORIES
+from train_models import prepare_data as prepare_raw_features
+from train_models_improved import FEATURE_COLS, engineer_features
+
+CHUNK_SIZE = 100_000  # rows per chunk (and per worker task)
+ROC_RANGE = (-12.0, 12.0)  # predictions outside fall into the end bins
+ROC_BIN_WIDTH = 0.05
+N_ROC_BINS = int(round((ROC_RANGE[1] - ROC_RANGE[0]) / ROC_BIN_WIDTH))
+CATEGORY_CENTRES = np.array([-9.0, -5.0, -0.5, 4.0, 8.5])  # midpoints of the CATEGORY_NAMES score ranges
+
+_worker_bundle = None  # (bundle, scaler, models) of the current worker
+
+class MetricAccumulator:
+    """Mergeable running metrics of one dimension
+
+    n, sum_abs_error, sum_sq_error: row count and error sums
+    mean, m2: label mean and sum of squared deviations (Welford / Chan)
+    confusion: 5x5 category counts (rows = true, columns = predicted)
+    histogram: 5 x N_ROC_BINS counts of predicted-score bins per true category
+    """
+
+    def __init__(self, n=0, sum_abs_error=0.0, sum_sq_error=0.0, mean=0.0, m2=0.0, confusion=None, histogram=None):
+        self.n = n
+        self.sum_abs_error = sum_abs_error
+        self.sum_sq_error = sum_sq_error
+        self.mean = mean
+        self.m2 = m2
+        self.confusion = np.zeros((N_CATEGORIES, N_CATEGORIES), dtype=np.int64) if confusion is None else confusion
+        self.histogram = np.zeros((N_CATEGORIES, N_ROC_BINS), dtype=np.int64) if histogram is None else histogram
+
+    @classmethod
+    def from_arrays(cls, y_true, y_pred):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        y_pred = np.asarray(y_pred)
+        error = y_true - y_pred.astype(np.float64)
+        if len(y_true) == 0:
+            return cls()
+        mean = y_true.mean()
+        true_codes = categorize(y_true)
+        bins = np.clip(((y_pred - ROC_RANGE[0]) / ROC_BIN_WIDTH).astype(np.int64), 0, N_ROC_BINS - 1)
+        histogram = np.bincount(true_codes.astype(np.int64) * N_ROC_BINS + bins,
+                                minlength=N_CATEGORIES * N_ROC_BINS).reshape(N_CATEGORIES, N_ROC_BINS)
+        return cls(
+            n=len(y_true),
+            sum_abs_error=np.abs(error).sum(),
+            sum_sq_error=(error ** 2).sum(),
+            mean=mean,
+            m2=((y_true - mean) ** 2).sum(),
+            confusion=confusion(true_codes, categorize(y_pred)).astype(np.int64),
+            histogram=histogram
+        )
+
+    @classmethod
+    def merge(cls, parts):
+        """Combine partials in the order given"""
+        merged = cls()
+        for part in parts:
+            if part is None or part.n == 0:
+                continue
+            n = merged.n + part.n
+            delta = part.mean - merged.mean
+            merged = cls(
+                n=n,
+                sum_abs_error=merged.sum_abs_error + part.sum_abs_error,
+                sum_sq_error=merged.sum_sq_error + part.sum_sq_error,
+                mean=merged.mean + delta * part.n / n,
+                m2=merged.m2 + part.m2 + delta ** 2 * merged.n * part.n / n,
+                confusion=merged.confusion + part.confusion,
+                histogram=merged.histogram + part.histogram
+            )
+        return merged
+
+    def roc(self, category):
+        """(fpr, tpr, auc) of one category against the rest, from the score histogram"""
+        centres = ROC_RANGE[0] + (np.arange(N_ROC_BINS) + 0.5) * ROC_BIN_WIDTH
+        closeness, groups = np.unique(-np.abs(centres - CATEGORY_CENTRES[category]), return_inverse=True)
+        positives = np.bincount(groups, weights=self.histogram[category], minlength=len(closeness))[::-1]
+        negatives = np.bincount(groups, weights=self.histogram.sum(axis=0) - self.histogram[category],
+                                minlength=len(closeness))[::-1]
+        if positives.sum() == 0 or negatives.sum() == 0:
+            return None, None, np.nan
+        tpr = np.concatenate([[0.0], np.cumsum(positives) / positives.sum()])
+        fpr = np.concatenate([[0.0], np.cumsum(negatives) / negatives.sum()])
+        return fpr, tpr, np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2)  # trapezoidal area
+
+    def metrics(self):
+        """MAE, MSE, RMSE, R², accuracy, weighted precision / recall / F1 and per-category ROC-AUC"""
+        mse = self.sum_sq_error / self.n
+        summary = classification_summary(self.confusion)
+        return {
+            'rows': self.n,
+            'mae': self.sum_abs_error / self.n,
+            'mse': mse,
+            'rmse': np.sqrt(mse),
+            'r2': 1 - self.sum_sq_error / self.m2 if self.m2 > 0 else np.nan,
+            'accuracy': summary['accuracy'],
+            'precision': summary['precision'],
+            'recall': summary['recall'],
+            'f1': summary['f1'],
+            'roc_auc': {CATEGORY_NAMES[k]: self.roc(k)[2] for k in range(N_CATEGORIES)}
+        }
+
+def merge_results(parts):
+    """Merge {dimension: MetricAccumulator} partials dimension by dimension"""
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return {}
+    return {dim: MetricAccumulator.merge(part[dim] for part in parts) for dim in parts[0]}
+
+def chunk_features(chunk, bundle):
+    """Model input of a chunk of rows: engineered features, or train_models.py's raw columns for `regular`"""
+    if MODEL_BUNDLES[bundle][1]:
+        return engineer_features(chunk[FEATURE_COLS].values, FEATURE_COLS, verbose=False)[0]
+    return prepare_raw_features(chunk)[0]
+
+def _init_worker(bundle, models_dir):
+    global _worker_bundle
+    _worker_bundle = (bundle, *load_bundle(bundle, models_dir))
+
+def evaluate_chunk(chunk):
+    """Worker: predict one chunk and fold it into fresh accumulators"""
+    bundle, scaler, models = _worker_bundle
+    X_scaled = scaler.transform(chunk_features(chunk, bundle))
+    return {dim: MetricAccumulator.from_arrays(chunk[dim].values, model.predict(X_scaled))
+            for dim, model in models.items() if dim in chunk.columns}
+
+def stream_evaluate(data_path, bundle='improved', models_dir=MODELS_DIR, chunk_size=CHUNK_SIZE, workers=None):
+    """{dimension: MetricAccumulator} over every row of a dataset, streamed in chunks"""
+    workers = workers or os.cpu_count()
+    chunks = iter_dataset(data_path, columns=TRAINING_COLUMNS, chunk_size=chunk_size)
+    merged = None
+    if workers == 1:
+        _init_worker(bundle, models_dir)
+        for chunk in chunks:
+            merged = merge_results([merged, evaluate_chunk(chunk)])
+        return merged or {}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(bundle, models_dir)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(evaluate_chunk, chunk))
+            if len(pending) >= 2 * workers:  # bound the rows in flight
+                merged = merge_results([merged, pending.popleft().result()])
+        while pending:
+            merged = merge_results([merged, pending.popleft().result()])
+    return merged or {}
+
+def print_report(results):
+    """Per-dimension metrics of merged accumulators"""
+    for dim, accumulator in results.items():
+        metrics = accumulator.metrics()
+        auc_values = [value for value in metrics['roc_auc'].values() if not np.isnan(value)]
+        print(f"\n🎯 {dim} ({metrics['rows']:,} rows)")
+        print(f"   R²={metrics['r2']:.4f}  MAE={metrics['mae']:.3f}  RMSE={metrics['rmse']:.3f}  MSE={metrics['mse']:.3f}")
+        print(f"   Accuracy={metrics['accuracy']:.4f}  Precision={metrics['precision']:.4f}  "
+              f"Recall={metrics['recall']:.4f}  F1={metrics['f1']:.4f}")
+        if auc_values:
+            print(f"   ROC-AUC (one-vs-rest, macro)={np.mean(auc_values):.4f}  " +
+                  "  ".join(f"{name}={value:.3f}" for name, value in metrics['roc_auc'].items()
+                            if not np.isnan(value)))
+
+def verify(data_path, bundle='improved', chunk_size=CHUNK_SIZE, workers=None):
+    """Compare the streamed metrics with the in-memory ones from the shared prediction cache"""
+    from sklearn.metrics import roc_auc_score
+    from evaluation_engine import load_predictions, split_view, regression_metrics
+
+    start = time.time()
+    results = stream_evaluate(data_path, bundle, chunk_size=chunk_size, workers=workers)
+    print(f"[STREAM] {Path(data_path).name}: {time.time() - start:.2f}s in chunks of {chunk_size:,} rows, "
+          f"peak RSS {format_mb(peak_rss_mb())}")
+    print_report(results)
+
+    y_true, y_pred = split_view(load_predictions(data_path, bundle, verbose=False), 'all')
+    print()
+    for dim, accumulator in results.items():
+        streamed = accumulator.metrics()
+        reference = regression_metrics(y_true[dim], y_pred[dim])
+        worst = max(abs(streamed[key] - reference[key]) for key in ('mae', 'mse', 'rmse', 'r2'))
+        cm = confusion(categorize(y_true[dim]), categorize(y_pred[dim]))
+        true_codes = categorize(y_true[dim])
+        auc_gap = 0.0
+        for k in range(N_CATEGORIES):
+            if 0 < np.count_nonzero(true_codes == k) < len(true_codes):
+                exact = roc_auc_score(true_codes == k, -np.abs(y_pred[dim] - CATEGORY_CENTRES[k]))
+                auc_gap = max(auc_gap, abs(streamed['roc_auc'][CATEGORY_NAMES[k]] - exact))
+        print(f"[VERIFY] {dim:<20} regression max diff {worst:.1e}, confusion matrix "
+              f"{'matches' if np.array_equal(cm, accumulator.confusion) else 'DIFFERS'}, "
+              f"histogram ROC-AUC within {auc_gap:.4f} of the exact curve")
+
+def main():
+    parser = argparse.ArgumentParser(description='Constant-memory streaming evaluation of a model bundle')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('evaluate', 'Stream a holdout dataset through a model bundle'),
+                            ('verify', 'Stream a dataset and compare with the in-memory evaluation')):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument('data', help='Dataset CSV path (a fresh Parquet sibling is used when present)')
+        command.add_argument('--bundle', choices=list(MODEL_BUNDLES), default='improved')
+        command.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        command.add_argument('--workers', type=int, default=None, help='Worker processes (default: all CPUs)')
+    args = parser.parse_args()
+
+    if not bundle_exists(args.bundle):
+        print(f"❌ Models for bundle '{args.bundle}' not found in {MODELS_DIR}")
+        return
+    if args.command == 'verify':
+        verify(args.data, args.bundle, args.chunk_size, args.workers)
+        return
+    start = time.time()
+    results = stream_evaluate(args.data, args.bundle, chunk_size=args.chunk_size, workers=args.workers)
+    print(f"[STREAM] {Path(args.data).name}: {time.time() - start:.2f}s in chunks of {args.chunk_size:,} rows, "
+          f"peak RSS {format_mb(peak_rss_mb())}")
+    print_report(results)
+
+if __name__ == '__main__':
+    main()
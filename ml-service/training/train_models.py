@@ -3,6 +3,7 @@ Train XGBoost Models for FSLSM Classification
 Trains separate models for each learning style dimension
 """
 
+import time
 import numpy as np
 import pandas as pd
 from pathlib import Path
@@ -12,10 +13,14 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, r2_score
 import xgboost as xgb
 
+from run_report import RunReport
+from dataset_io import read_dataset, TRAINING_COLUMNS
+from train_models_improved import get_sample_weights
+
 def load_training_data(data_path):
-    """Load training data from CSV"""
+    """Load training data (typed Parquet sibling when available, else CSV)"""
     print(f"📂 Loading training data from: {data_path}")
-    df = pd.read_csv(data_path)
+    df = read_dataset(data_path, columns=TRAINING_COLUMNS)
     print(f"✅ Loaded {len(df)} samples")
     return df
 
@@ -41,7 +46,7 @@ def prepare_data(df):
     
     return X, y, feature_cols
 
-def train_dimension_model(X_train, y_train, X_val, y_val, dimension_name):
+def train_dimension_model(X_train, y_train, X_val, y_val, dimension_name, w_train=None, w_val=None, report=None):
     """Train XGBoost model for a single dimension"""
     print(f"\n🎯 Training model for: {dimension_name}")
     
@@ -58,20 +63,25 @@ def train_dimension_model(X_train, y_train, X_val, y_val, dimension_name):
     
     # Create and train model with early stopping
     model = xgb.XGBRegressor(**params, early_stopping_rounds=10)
+    fit_start = time.time()
     model.fit(
         X_train, y_train,
+        sample_weight=w_train,
         eval_set=[(X_val, y_val)],
+        sample_weight_eval_set=[w_val] if w_val is not None else None,
         verbose=False
     )
+    if report is not None:
+        report.record_fit(dimension_name, time.time() - fit_start, model.get_booster().num_boosted_rounds(), len(X_train))
     
     # Evaluate
     train_pred = model.predict(X_train)
     val_pred = model.predict(X_val)
     
-    train_mae = mean_absolute_error(y_train, train_pred)
-    val_mae = mean_absolute_error(y_val, val_pred)
-    train_r2 = r2_score(y_train, train_pred)
-    val_r2 = r2_score(y_val, val_pred)
+    train_mae = mean_absolute_error(y_train, train_pred, sample_weight=w_train)
+    val_mae = mean_absolute_error(y_val, val_pred, sample_weight=w_val)
+    train_r2 = r2_score(y_train, train_pred, sample_weight=w_train)
+    val_r2 = r2_score(y_val, val_pred, sample_weight=w_val)
     
     print(f"  Train MAE: {train_mae:.3f}, R²: {train_r2:.3f}")
     print(f"  Val MAE: {val_mae:.3f}, R²: {val_r2:.3f}")
@@ -89,13 +99,19 @@ def main():
     data_path = project_root / 'data' / 'training_data.csv'
     models_dir = project_root / 'models'
     models_dir.mkdir(exist_ok=True)
+    report = RunReport(Path(__file__).stem, data_path)
     
     # Load data
+    report.stage('load_data')
     df = load_training_data(data_path)
     
     # Prepare features and labels
+    report.stage('prepare_data')
     X, y, feature_cols = prepare_data(df)
     
+    # Per-row weights from combine_datasets.py (1.0 when the column is absent)
+    w = get_sample_weights(df)
+    
     print(f"\n📊 Dataset Info:")
     print(f"  Features: {X.shape[1]}")
     print(f"  Samples: {X.shape[0]}")
@@ -110,6 +126,8 @@ def main():
     
     # Second split: 70% train, 15% val (from the 85% temp)
     X_train_data, X_val_data = train_test_split(X_temp_data, test_size=0.176, random_state=42)  # 0.176 * 0.85 ≈ 0.15
+    w_temp_data, w_test_data = train_test_split(w, test_size=0.15, random_state=42)
+    w_train_data, w_val_data = train_test_split(w_temp_data, test_size=0.176, random_state=42)
     
     print(f"\n📈 Data Split:")
     print(f"  Train: {len(X_train_data)} samples ({len(X_train_data)/len(X)*100:.1f}%)")
@@ -117,9 +135,10 @@ def main():
     print(f"  Test: {len(X_test_data)} samples ({len(X_test_data)/len(X)*100:.1f}%)")
     
     # Scale features
+    report.stage('scale')
     print(f"\n⚙️ Scaling features...")
     scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train_data)
+    X_train_scaled = scaler.fit_transform(X_train_data, sample_weight=w_train_data)
     X_val_scaled = scaler.transform(X_val_data)
     X_test_scaled = scaler.transform(X_test_data)
     
@@ -140,6 +159,8 @@ def main():
     }
     
     for dim_label, dim_file in dimensions.items():
+        report.stage(f'train_{dim_label}')
+        
         # Split labels
         y_temp_data, y_test_data = train_test_split(y[dim_label], test_size=0.15, random_state=42)
         y_train_data, y_val_data = train_test_split(y_temp_data, test_size=0.176, random_state=42)
@@ -148,13 +169,15 @@ def main():
         model, val_mae, val_r2 = train_dimension_model(
             X_train_scaled, y_train_data,
             X_val_scaled, y_val_data,
-            dim_label
+            dim_label,
+            w_train=w_train_data, w_val=w_val_data,
+            report=report
         )
         
         # Test evaluation
         test_pred = model.predict(X_test_scaled)
-        test_mae = mean_absolute_error(y_test_data, test_pred)
-        test_r2 = r2_score(y_test_data, test_pred)
+        test_mae = mean_absolute_error(y_test_data, test_pred, sample_weight=w_test_data)
+        test_r2 = r2_score(y_test_data, test_pred, sample_weight=w_test_data)
         
         print(f"  Test MAE: {test_mae:.3f}, R²: {test_r2:.3f}")
         
@@ -171,6 +194,9 @@ def main():
             'test_r2': test_r2
         }
     
+    report.set_metrics(results)
+    report.save()
+    
     # Summary
     print("\n" + "=" * 60)
     print("📊 Training Summary")
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Out-of-Core Training Script for FSLSM Classification
+For datasets larger than memory
+
+Pipeline:
+1. Stream the CSV in chunks through the same feature engineering (27 -> 46)
+2. Fit the StandardScaler incrementally (partial_fit) on train rows only
+3. Write engineered chunks to disk as .npy pages (train/test)
+4. Train XGBoost from the pages through an external-memory DataIter
+5. Evaluate on the test pages with running sums (R2, MAE)
+
+The train/test assignment is a hash of the global row number, so it does not
+depend on the chunk size. Hyperparameters match train_models_fast.py (grid
+search is not feasible out-of-core). Produces scaler_external.pkl and
+*_external models with the same interface as the other trainers.
+"""
+
+import argparse
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.preprocessing import StandardScaler
+import xgboost as xgb
+
+from train_models_improved import FEATURE_COLS, LABEL_COLS, engineer_features
+from run_report import RunReport, peak_rss_mb, format_mb
+from dataset_io import ColumnarWriter, TRAINING_COLUMNS, iter_dataset, read_dataset
+
+DIMENSIONS = {
+    'activeReflective': 'active_reflective_external',
+    'sensingIntuitive': 'sensing_intuitive_external',
+    'visualVerbal': 'visual_verbal_external',
+    'sequentialGlobal': 'sequential_global_external'
+}
+
+# Same pre-optimized hyperparameters as train_models_fast.py
+PARAMS = {
+    'objective': 'reg:squarederror',
+    'tree_method': 'hist',
+    'max_depth': 8,
+    'learning_rate': 0.1,
+    'subsample': 0.9,
+    'colsample_bytree': 0.9,
+    'min_child_weight': 3,
+    'gamma': 0.1,
+    'reg_alpha': 0.1,
+    'reg_lambda': 1.0,
+    'seed': 42
+}
+N_ESTIMATORS = 200
+
+TEST_PERCENT = 15
+
+def is_test_row(row_numbers):
+    """Deterministic ~15% test assignment from the global row number"""
+    return pd.util.hash_array(row_numbers.astype(np.int64)) % 100 < TEST_PERCENT
+
+def write_pages(data_path, pages_dir, chunk_size):
+    """Pass 1: stream CSV/Parquet -> engineered float32 pages + incremental scaler"""
+    print(f"\n[PASS 1] Streaming {data_path.name} in chunks of {chunk_size:,} rows...")
+
+    if pages_dir.exists():
+        shutil.rmtree(pages_dir)
+    (pages_dir / 'train').mkdir(parents=True)
+    (pages_dir / 'test').mkdir(parents=True)
+
+    scaler = StandardScaler()
+    counts = {'train': 0, 'test': 0}
+    page_ids = {'train': 0, 'test': 0}
+    row_offset = 0
+
+    for chunk in iter_dataset(data_path, columns=TRAINING_COLUMNS, chunk_size=chunk_size):
+        X, _ = engineer_features(chunk[FEATURE_COLS].values, FEATURE_COLS, verbose=False)
+        X = X.astype(np.float32)
+        y = chunk[LABEL_COLS].values.astype(np.float32)
+        w = chunk['sample_weight'].values.astype(np.float32) if 'sample_weight' in chunk else np.ones(len(chunk), np.float32)
+
+        test_mask = is_test_row(np.arange(row_offset, row_offset + len(chunk)))
+        row_offset += len(chunk)
+
+        for split, mask in (('train', ~test_mask), ('test', test_mask)):
+            if not mask.any():
+                continue
+            page = page_ids[split]
+            np.save(pages_dir / split / f'X_{page:05d}.npy', X[mask])
+            np.save(pages_dir / split / f'y_{page:05d}.npy', y[mask])
+            np.save(pages_dir / split / f'w_{page:05d}.npy', w[mask])
+            page_ids[split] += 1
+            counts[split] += int(mask.sum())
+
+        scaler.partial_fit(X[~test_mask], sample_weight=w[~test_mask])
+        print(f"  [PAGE] {row_offset:,} rows streamed (peak RSS {format_mb(peak_rss_mb())})")
+
+    print(f"[OK] Train rows: {counts['train']:,} in {page_ids['train']} pages")
+    print(f"[OK] Test rows:  {counts['test']:,} in {page_ids['test']} pages")
+    return scaler, counts
+
+class PageIterator(xgb.DataIter):
+    """Feeds scaled on-disk pages to XGBoost one at a time"""
+
+    def __init__(self, split_dir, scaler, label_index, cache_dir):
+        self._x_pages = sorted(split_dir.glob('X_*.npy'))
+        self._y_pages = sorted(split_dir.glob('y_*.npy'))
+        self._w_pages = sorted(split_dir.glob('w_*.npy'))
+        self._scaler = scaler
+        self._label_index = label_index
+        self._it = 0
+        super().__init__(cache_prefix=str(cache_dir / 'xgb_cache'))
+
+    def next(self, input_data):
+        if self._it == len(self._x_pages):
+            return False
+        X = np.load(self._x_pages[self._it], mmap_mode='r')
+        y = np.load(self._y_pages[self._it], mmap_mode='r')
+        input_data(
+            data=self._scaler.transform(X).astype(np.float32),
+            label=np.asarray(y[:, self._label_index]),
+            weight=np.load(self._w_pages[self._it])
+        )
+        self._it += 1
+        return True
+
+    def reset(self):
+        self._it = 0
+
+def build_external_matrix(iterator):
+    """External-memory matrix (quantile pages on XGBoost >= 3.0)"""
+    if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+        return xgb.ExtMemQuantileDMatrix(iterator)
+    return xgb.DMatrix(iterator)
+
+def evaluate_pages(model, split_dir, scaler, label_index):
+    """Stream test pages through the model; weighted R2 and MAE from running sums"""
+    n = 0.0
+    sum_y = sum_y2 = sse = sae = 0.0
+    pages = zip(sorted(split_dir.glob('X_*.npy')), sorted(split_dir.glob('y_*.npy')), sorted(split_dir.glob('w_*.npy')))
+    for x_page, y_page, w_page in pages:
+        X = scaler.transform(np.load(x_page, mmap_mode='r'))
+        y = np.load(y_page, mmap_mode='r')[:, label_index].astype(np.float64)
+        w = np.load(w_page).astype(np.float64)
+        pred = model.predict(X)
+        n += w.sum()
+        sum_y += (w * y).sum()
+        sum_y2 += (w * y ** 2).sum()
+        sse += (w * (y - pred) ** 2).sum()
+        sae += (w * np.abs(y - pred)).sum()
+
+    sst = sum_y2 - sum_y ** 2 / n
+    return sae / n, 1 - sse / sst
+
+def write_benchmark_dataset(source_path, output_path, n_rows, chunk_size, seed=42):
+    """Write an n_rows benchmark CSV (+ Parquet) by resampling source rows, chunk by chunk"""
+    print(f"[BENCH] Writing {n_rows:,}-row benchmark dataset to {output_path}")
+    source = read_dataset(source_path)
+    rng = np.random.default_rng(seed)
+    columnar = ColumnarWriter(output_path)
+
+    written = 0
+    while written < n_rows:
+        size = min(chunk_size, n_rows - written)
+        chunk = source.iloc[rng.integers(0, len(source), size)]
+        chunk.to_csv(output_path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        columnar.write(chunk)
+        written += size
+    columnar.close()
+    print(f"[OK] Benchmark dataset ready ({output_path.stat().st_size / 1e9:.2f} GB)")
+
+def main():
+    """Main out-of-core training function"""
+    parser = argparse.ArgumentParser(description='Out-of-core FSLSM training with XGBoost external memory')
+    parser.add_argument('--data', default=None,
+                        help='CSV to train on (default: combined NO_CIRCULAR, falling back to training_data.csv)')
+    parser.add_argument('--chunk-size', type=int, default=500_000,
+                        help='Rows per streamed chunk / on-disk page')
+    parser.add_argument('--benchmark-rows', type=int, default=0,
+                        help='First write a resampled benchmark CSV with this many rows (e.g. 50000000)')
+    parser.add_argument('--keep-pages', action='store_true',
+                        help='Keep the on-disk pages after training')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("OUT-OF-CORE FSLSM Model Training (XGBoost external memory)")
+    print("=" * 70)
+
+    project_root = Path(__file__).parent.parent
+    data_dir = project_root / 'data'
+    models_dir = project_root / 'models'
+    models_dir.mkdir(exist_ok=True)
+    pages_dir = data_dir / 'ext_memory_pages'
+
+    if args.data:
+        data_path = data_dir / args.data
+    elif (data_dir / 'combined_training_data_NO_CIRCULAR.csv').exists():
+        data_path = data_dir / 'combined_training_data_NO_CIRCULAR.csv'
+    else:
+        data_path = data_dir / 'training_data.csv'
+
+    report = RunReport(Path(__file__).stem, data_path)
+
+    if args.benchmark_rows:
+        report.stage('write_benchmark_dataset')
+        bench_path = data_dir / f'benchmark_{args.benchmark_rows}_rows.csv'
+        write_benchmark_dataset(data_path, bench_path, args.benchmark_rows, args.chunk_size)
+        data_path = bench_path
+        report.data['data_path'] = str(data_path)
+
+    start_time = time.time()
+
+    report.stage('write_pages')
+    scaler, counts = write_pages(data_path, pages_dir, args.chunk_size)
+    scaler_path = models_dir / 'scaler_external.pkl'
+    joblib.dump(scaler, scaler_path)
+    print(f"[OK] Scaler saved to: {scaler_path}")
+
+    results = {}
+    for label_index, (dim_label, dim_file) in enumerate(DIMENSIONS.items()):
+        report.stage(f'train_{dim_label}')
+        print(f"\n[TRAIN] External-memory model for: {dim_label}")
+        fit_start = time.time()
+
+        iterator = PageIterator(pages_dir / 'train', scaler, label_index, pages_dir)
+        dtrain = build_external_matrix(iterator)
+        booster = xgb.train(PARAMS, dtrain, num_boost_round=N_ESTIMATORS)
+        report.record_fit(dim_label, time.time() - fit_start, booster.num_boosted_rounds(), counts['train'])
+        # Release the external-memory cache files before the pages are cleaned up
+        del dtrain, iterator
+
+        # Wrap in the sklearn interface used by app.py and the evaluation scripts
+        model = xgb.XGBRegressor(n_estimators=N_ESTIMATORS, random_state=42,
+                                 **{k: v for k, v in PARAMS.items() if k != 'seed'})
+        model.load_model(bytearray(booster.save_raw('ubj')))
+
+        test_mae, test_r2 = evaluate_pages(model, pages_dir / 'test', scaler, label_index)
+        fit_time = time.time() - fit_start
+        print(f"  [RESULT] Test MAE: {test_mae:.3f}, R2: {test_r2:.3f} ({test_r2*100:.1f}%)")
+        print(f"  [INFO] {fit_time:.1f}s, peak RSS {format_mb(peak_rss_mb())}")
+
+        model_path = models_dir / f'{dim_file}.pkl'
+        joblib.dump(model, model_path)
+        print(f"[OK] Model saved to: {model_path}")
+
+        results[dim_label] = {'test_mae': test_mae, 'test_r2': test_r2}
+
+    elapsed = time.time() - start_time
+
+    if not args.keep_pages:
+        shutil.rmtree(pages_dir)
+
+    report.set_metrics(results)
+    report.save()
+
+    print("\n" + "=" * 70)
+    print("Training Summary")
+    print("=" * 70)
+    for dim_label, metrics in results.items():
+        print(f"  {dim_label:<20} Test R2: {metrics['test_r2']:.3f}  MAE: {metrics['test_mae']:.3f}")
+
+    avg_test_r2 = np.mean([m['test_r2'] for m in results.values()])
+    print(f"\n[FINAL] Average Test R2: {avg_test_r2:.3f} ({avg_test_r2*100:.1f}%)")
+    print(f"[FINAL] Rows: {counts['train']:,} train / {counts['test']:,} test")
+    print(f"[FINAL] Wall time: {elapsed/60:.1f} minutes")
+    print(f"[FINAL] Peak RSS: {format_mb(peak_rss_mb())}")
+    print("\n[DONE] Training complete!")
+    print(f"[SAVE] Models saved to: {models_dir}")
+
+if __name__ == '__main__':
+    main()
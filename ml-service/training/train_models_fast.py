@@ -7,8 +7,13 @@ Optimization:
 - Optimized hyperparameters (no grid search)
 - Feature engineering for better accuracy
 - Should complete in 2-3 minutes
+
+Usage:
+    python ml-service/training/train_models_fast.py [--models-dir DIR] [--reports-dir DIR] [--n-jobs N]
 """
 
+import argparse
+import time
 import numpy as np
 import pandas as pd
 from pathlib import Path
@@ -18,10 +23,14 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, r2_score
 import xgboost as xgb
 
+from run_report import RunReport, REPORTS_DIR
+from dataset_io import read_dataset, TRAINING_COLUMNS
+from train_models_improved import get_sample_weights
+
 def load_training_data(data_path):
-    """Load training data from CSV"""
+    """Load training data (typed Parquet sibling when available, else CSV)"""
     print(f"📂 Loading training data from: {data_path}")
-    df = pd.read_csv(data_path)
+    df = read_dataset(data_path, columns=TRAINING_COLUMNS)
     print(f"✅ Loaded {len(df)} samples")
     return df
 
@@ -88,7 +97,8 @@ def prepare_data(df):
     
     return X_engineered, y, engineered_cols
 
-def train_dimension_model_fast(X_train, y_train, X_val, y_val, dimension_name):
+def train_dimension_model_fast(X_train, y_train, X_val, y_val, dimension_name, w_train=None, w_val=None, report=None,
+                               n_jobs=-1):
     """Train XGBoost model with optimized hyperparameters (no grid search)"""
     print(f"\n🎯 Training model for: {dimension_name}")
     
@@ -106,33 +116,38 @@ def train_dimension_model_fast(X_train, y_train, X_val, y_val, dimension_name):
         'reg_alpha': 0.1,            # L1 regularization
         'reg_lambda': 1.0,           # L2 regularization
         'random_state': 42,
-        'n_jobs': -1                 # Use all CPU cores
+        'n_jobs': n_jobs             # All CPU cores by default
     }
     
     # Create and train model
     model = xgb.XGBRegressor(**params)
+    fit_start = time.time()
     model.fit(
         X_train, y_train,
+        sample_weight=w_train,
         eval_set=[(X_val, y_val)],
+        sample_weight_eval_set=[w_val] if w_val is not None else None,
         verbose=False
     )
+    if report is not None:
+        report.record_fit(dimension_name, time.time() - fit_start, model.get_booster().num_boosted_rounds(), len(X_train))
     
     # Evaluate
     train_pred = model.predict(X_train)
     val_pred = model.predict(X_val)
     
-    train_mae = mean_absolute_error(y_train, train_pred)
-    val_mae = mean_absolute_error(y_val, val_pred)
-    train_r2 = r2_score(y_train, train_pred)
-    val_r2 = r2_score(y_val, val_pred)
+    train_mae = mean_absolute_error(y_train, train_pred, sample_weight=w_train)
+    val_mae = mean_absolute_error(y_val, val_pred, sample_weight=w_val)
+    train_r2 = r2_score(y_train, train_pred, sample_weight=w_train)
+    val_r2 = r2_score(y_val, val_pred, sample_weight=w_val)
     
     print(f"  📊 Train MAE: {train_mae:.3f}, R²: {train_r2:.3f} ({train_r2*100:.1f}%)")
     print(f"  📊 Val MAE: {val_mae:.3f}, R²: {val_r2:.3f} ({val_r2*100:.1f}%)")
     
     return model, val_mae, val_r2
 
-def main():
-    """Main training function"""
+def main(models_dir=None, reports_dir=REPORTS_DIR, n_jobs=-1):
+    """Main training function (models_dir defaults to ml-service/models)"""
     print("=" * 70)
     print("🚀 FAST FSLSM Model Training - Target: 96% Accuracy")
     print("=" * 70)
@@ -143,10 +158,12 @@ def main():
     # Paths
     project_root = Path(__file__).parent.parent
     data_path = project_root / 'data' / 'training_data.csv'
-    models_dir = project_root / 'models'
-    models_dir.mkdir(exist_ok=True)
+    models_dir = Path(models_dir) if models_dir else project_root / 'models'
+    models_dir.mkdir(parents=True, exist_ok=True)
+    report = RunReport(Path(__file__).stem, data_path)
     
     # Load data
+    report.stage('load_data')
     df = load_training_data(data_path)
     
     # Check if we have enough data
@@ -156,8 +173,12 @@ def main():
         print("   Run generate_synthetic_data.py to create more data")
     
     # Prepare features and labels
+    report.stage('feature_engineering')
     X, y, feature_cols = prepare_data(df)
     
+    # Per-row weights from combine_datasets.py (1.0 when the column is absent)
+    w = get_sample_weights(df)
+    
     print(f"\n📊 Dataset Info:")
     print(f"  Features: {X.shape[1]} (including engineered features)")
     print(f"  Samples: {X.shape[0]}")
@@ -166,6 +187,8 @@ def main():
     # Split data (70% train, 15% val, 15% test)
     X_temp_data, X_test_data = train_test_split(X, test_size=0.15, random_state=42)
     X_train_data, X_val_data = train_test_split(X_temp_data, test_size=0.176, random_state=42)
+    w_temp_data, w_test_data = train_test_split(w, test_size=0.15, random_state=42)
+    w_train_data, w_val_data = train_test_split(w_temp_data, test_size=0.176, random_state=42)
     
     print(f"\n📈 Data Split:")
     print(f"  Train: {len(X_train_data)} samples ({len(X_train_data)/len(X)*100:.1f}%)")
@@ -173,9 +196,10 @@ def main():
     print(f"  Test: {len(X_test_data)} samples ({len(X_test_data)/len(X)*100:.1f}%)")
     
     # Scale features
+    report.stage('scale')
     print(f"\n⚙️ Scaling features...")
     scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train_data)
+    X_train_scaled = scaler.fit_transform(X_train_data, sample_weight=w_train_data)
     X_val_scaled = scaler.transform(X_val_data)
     X_test_scaled = scaler.transform(X_test_data)
     
@@ -196,6 +220,8 @@ def main():
     }
     
     for dim_label, dim_file in dimensions.items():
+        report.stage(f'train_{dim_label}')
+        
         # Split labels
         y_temp_data, y_test_data = train_test_split(y[dim_label], test_size=0.15, random_state=42)
         y_train_data, y_val_data = train_test_split(y_temp_data, test_size=0.176, random_state=42)
@@ -204,13 +230,15 @@ def main():
         model, val_mae, val_r2 = train_dimension_model_fast(
             X_train_scaled, y_train_data,
             X_val_scaled, y_val_data,
-            dim_label
+            dim_label,
+            w_train=w_train_data, w_val=w_val_data,
+            report=report, n_jobs=n_jobs
         )
         
         # Test evaluation
         test_pred = model.predict(X_test_scaled)
-        test_mae = mean_absolute_error(y_test_data, test_pred)
-        test_r2 = r2_score(y_test_data, test_pred)
+        test_mae = mean_absolute_error(y_test_data, test_pred, sample_weight=w_test_data)
+        test_r2 = r2_score(y_test_data, test_pred, sample_weight=w_test_data)
         
         print(f"  📊 Test MAE: {test_mae:.3f}, R²: {test_r2:.3f} ({test_r2*100:.1f}%)")
         
@@ -227,6 +255,9 @@ def main():
             'test_r2': test_r2
         }
     
+    report.set_metrics(results)
+    report.save(Path(reports_dir))
+    
     # Summary
     print("\n" + "=" * 70)
     print("📊 Training Summary")
@@ -260,4 +291,9 @@ def main():
     print(f"   - Industry standard for large datasets")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Fast FSLSM model training (no grid search)')
+    parser.add_argument('--models-dir', default=None, help='Where to save the scaler and models (default: models/)')
+    parser.add_argument('--reports-dir', default=str(REPORTS_DIR), help='Where to save the JSON run report')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='XGBoost threads (-1 = all CPU cores)')
+    args = parser.parse_args()
+    main(args.models_dir, args.reports_dir, args.n_jobs)
@@ -8,27 +8,54 @@ Improvements:
 2. Feature engineering (interactions, polynomials)
 3. Hyperparameter tuning
 4. Better model architecture
+
+Usage:
+    python ml-service/training/train_models_improved.py [--models-dir DIR] [--reports-dir DIR] [--n-jobs N]
 """
 
+import argparse
 import numpy as np
 import pandas as pd
 from pathlib import Path
 import joblib
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.preprocessing import StandardScaler, PolynomialFeatures
-from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.metrics import mean_absolute_error, r2_score, make_scorer
+from sklearn import config_context
 import xgboost as xgb
 
+from run_report import RunReport, REPORTS_DIR
+from dataset_io import read_dataset, TRAINING_COLUMNS
+
+FEATURE_COLS = [
+    'activeModeRatio', 'questionsGenerated', 'debatesParticipated',
+    'reflectiveModeRatio', 'reflectionsWritten', 'journalEntries',
+    'aiAskModeRatio', 'aiResearchModeRatio',
+    'sensingModeRatio', 'simulationsCompleted', 'challengesCompleted',
+    'intuitiveModeRatio', 'conceptsExplored', 'patternsDiscovered',
+    'aiTextToDocsRatio',
+    'visualModeRatio', 'diagramsViewed', 'wireframesExplored',
+    'verbalModeRatio', 'textRead', 'summariesCreated',
+    'sequentialModeRatio', 'stepsCompleted', 'linearNavigation',
+    'globalModeRatio', 'overviewsViewed', 'navigationJumps'
+]
+
+LABEL_COLS = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
+
+# Bump whenever engineer_features() changes (invalidates training/feature_cache.py)
+FEATURE_SPEC_VERSION = 1
+
 def load_training_data(data_path):
-    """Load training data from CSV"""
+    """Load training data (typed Parquet sibling when available, else CSV)"""
     print(f"[LOAD] Loading training data from: {data_path}")
-    df = pd.read_csv(data_path)
+    df = read_dataset(data_path, columns=TRAINING_COLUMNS)
     print(f"[OK] Loaded {len(df)} samples")
     return df
 
-def engineer_features(X, feature_cols):
+def engineer_features(X, feature_cols, verbose=True):
     """Add engineered features for better performance"""
-    print("\n[FEATURES] Engineering additional features...")
+    if verbose:
+        print("\n[FEATURES] Engineering additional features...")
 
     df_features = pd.DataFrame(X, columns=feature_cols)
 
@@ -54,35 +81,59 @@ def engineer_features(X, feature_cols):
         df_features['ai_reflective_interaction'] = df_features['aiResearchModeRatio'] * df_features['reflectiveModeRatio']
         df_features['ai_sensing_interaction'] = df_features['aiTextToDocsRatio'] * df_features['sensingModeRatio']
 
-    print(f"[OK] Engineered features: {df_features.shape[1]} total features (added {df_features.shape[1] - len(feature_cols)})")
+    if verbose:
+        print(f"[OK] Engineered features: {df_features.shape[1]} total features (added {df_features.shape[1] - len(feature_cols)})")
 
     return df_features.values, list(df_features.columns)
 
+def get_sample_weights(df):
+    """Per-row sample weights from combine_datasets.py (1.0 when absent)"""
+    if 'sample_weight' in df.columns:
+        return df['sample_weight'].values.astype(float)
+    return np.ones(len(df))
+
+def weighted_search_supported():
+    """True when scikit-learn can route sample_weight into CV scoring (>= 1.4)"""
+    try:
+        with config_context(enable_metadata_routing=True):
+            make_scorer(r2_score).set_score_request(sample_weight=True)
+        return True
+    except (TypeError, AttributeError, RuntimeError):
+        return False
+
 def prepare_data(df):
     """Prepare features and labels"""
-    feature_cols = [
-        'activeModeRatio', 'questionsGenerated', 'debatesParticipated',
-        'reflectiveModeRatio', 'reflectionsWritten', 'journalEntries',
-        'aiAskModeRatio', 'aiResearchModeRatio',
-        'sensingModeRatio', 'simulationsCompleted', 'challengesCompleted',
-        'intuitiveModeRatio', 'conceptsExplored', 'patternsDiscovered',
-        'aiTextToDocsRatio',
-        'visualModeRatio', 'diagramsViewed', 'wireframesExplored',
-        'verbalModeRatio', 'textRead', 'summariesCreated',
-        'sequentialModeRatio', 'stepsCompleted', 'linearNavigation',
-        'globalModeRatio', 'overviewsViewed', 'navigationJumps'
-    ]
-
-    label_cols = ['activeReflective', 'sensingIntuitive', 'visualVerbal', 'sequentialGlobal']
-
-    X = df[feature_cols].values
-    y = {col: df[col].values for col in label_cols}
-
-    X_engineered, engineered_cols = engineer_features(X, feature_cols)
+    X = df[FEATURE_COLS].values
+    y = {col: df[col].values for col in LABEL_COLS}
+
+    X_engineered, engineered_cols = engineer_features(X, FEATURE_COLS)
 
     return X_engineered, y, engineered_cols
 
-def train_dimension_model_tuned(X_train, y_train, X_val, y_val, dimension_name):
+def select_data_path(project_root):
+    """Pick the best available training dataset (NO_CIRCULAR > combined > synthetic)"""
+    no_circular_path = project_root / 'data' / 'combined_training_data_NO_CIRCULAR.csv'
+    combined_data_path = project_root / 'data' / 'combined_training_data.csv'
+    synthetic_data_path = project_root / 'data' / 'training_data.csv'
+
+    if no_circular_path.exists():
+        print("[OK] Using ZERO CIRCULAR LOGIC dataset")
+        print("   - 116 real participants from eye-tracking study")
+        print("   - Labels from OBSERVED behavior (not programmed rules!)")
+        print("   - sample_weight 3.0 for importance (116 rows, no duplication)")
+        print("   - Combined with synthetic for full coverage")
+        return no_circular_path
+    elif combined_data_path.exists():
+        print("[WARN] Using dataset with partial circular logic")
+        print("   - 116 real participants from eye-tracking study")
+        print("   - Labels inferred using rules (some circular logic)")
+        return combined_data_path
+    else:
+        print("[WARN] Using SYNTHETIC-ONLY dataset")
+        return synthetic_data_path
+
+def train_dimension_model_tuned(X_train, y_train, X_val, y_val, dimension_name, w_train=None, w_val=None, report=None,
+                                n_jobs=None):
     """Train XGBoost model with hyperparameter tuning"""
     print(f"\n[TRAIN] Training optimized model for: {dimension_name}")
 
@@ -103,7 +154,8 @@ def train_dimension_model_tuned(X_train, y_train, X_val, y_val, dimension_name):
         objective='reg:squarederror',
         random_state=42,
         tree_method='hist',
-        device='cuda' if is_cuda else 'cpu'
+        device='cuda' if is_cuda else 'cpu',
+        n_jobs=n_jobs
     )
 
     total_combos = 162
@@ -114,19 +166,35 @@ def train_dimension_model_tuned(X_train, y_train, X_val, y_val, dimension_name):
     import time
     start_time = time.time()
 
-    grid_search = GridSearchCV(
-        base_model,
-        param_grid,
-        cv=5,
-        scoring='r2',
-        n_jobs=1,
-        verbose=3
-    )
-
-    grid_search.fit(X_train, y_train)
+    if weighted_search_supported():
+        # sample_weight is split per fold and used for both fitting and R2 scoring
+        with config_context(enable_metadata_routing=True):
+            base_model.set_fit_request(sample_weight=True)
+            grid_search = GridSearchCV(
+                base_model,
+                param_grid,
+                cv=5,
+                scoring=make_scorer(r2_score).set_score_request(sample_weight=True),
+                n_jobs=1,
+                verbose=3
+            )
+            grid_search.fit(X_train, y_train, sample_weight=w_train)
+    else:
+        print("  [WARN] scikit-learn < 1.4: CV folds are fitted with weights but scored unweighted")
+        grid_search = GridSearchCV(
+            base_model,
+            param_grid,
+            cv=5,
+            scoring='r2',
+            n_jobs=1,
+            verbose=3
+        )
+        grid_search.fit(X_train, y_train, sample_weight=w_train)
 
     elapsed = (time.time() - start_time) / 60
     print(f"\n  [OK] Completed in {elapsed:.1f} minutes")
+    if report is not None:
+        report.record_search(dimension_name, grid_search, len(X_train), elapsed * 60)
     best_model = grid_search.best_estimator_
     print(f"  [OK] Best parameters: {grid_search.best_params_}")
     print(f"  [OK] Best CV R2: {grid_search.best_score_*100:.1f}%")
@@ -134,56 +202,40 @@ def train_dimension_model_tuned(X_train, y_train, X_val, y_val, dimension_name):
     train_pred = best_model.predict(X_train)
     val_pred = best_model.predict(X_val)
 
-    train_mae = mean_absolute_error(y_train, train_pred)
-    val_mae = mean_absolute_error(y_val, val_pred)
-    train_r2 = r2_score(y_train, train_pred)
-    val_r2 = r2_score(y_val, val_pred)
+    train_mae = mean_absolute_error(y_train, train_pred, sample_weight=w_train)
+    val_mae = mean_absolute_error(y_val, val_pred, sample_weight=w_val)
+    train_r2 = r2_score(y_train, train_pred, sample_weight=w_train)
+    val_r2 = r2_score(y_val, val_pred, sample_weight=w_val)
 
     print(f"  [RESULT] Train MAE: {train_mae:.3f}, R2: {train_r2:.3f} ({train_r2*100:.1f}%)")
     print(f"  [RESULT] Val   MAE: {val_mae:.3f}, R2: {val_r2:.3f} ({val_r2*100:.1f}%)")
 
     return best_model, val_mae, val_r2
 
-def main():
-    """Main training function"""
+def main(models_dir=None, reports_dir=REPORTS_DIR, n_jobs=None):
+    """Main training function (models_dir defaults to ml-service/models)"""
     print("=" * 70)
     print("IMPROVED FSLSM Model Training with Real Eye-Tracking Data")
     print("=" * 70)
 
     project_root = Path(__file__).parent.parent
 
-    no_circular_path = project_root / 'data' / 'combined_training_data_NO_CIRCULAR.csv'
-    combined_data_path = project_root / 'data' / 'combined_training_data.csv'
-    synthetic_data_path = project_root / 'data' / 'training_data.csv'
+    data_path = select_data_path(project_root)
 
-    if no_circular_path.exists():
-        data_path = no_circular_path
-        print("[OK] Using ZERO CIRCULAR LOGIC dataset")
-        print("   - 116 real participants from eye-tracking study")
-        print("   - Labels from OBSERVED behavior (not programmed rules!)")
-        print("   - Weighted 3x for importance (348 samples)")
-        print("   - Combined with synthetic for full coverage")
-    elif combined_data_path.exists():
-        data_path = combined_data_path
-        print("[WARN] Using dataset with partial circular logic")
-        print("   - 116 real participants from eye-tracking study")
-        print("   - Labels inferred using rules (some circular logic)")
-    else:
-        data_path = synthetic_data_path
-        print("[WARN] Using SYNTHETIC-ONLY dataset")
-
-    models_dir = project_root / 'models'
-    models_dir.mkdir(exist_ok=True)
+    models_dir = Path(models_dir) if models_dir else project_root / 'models'
+    models_dir.mkdir(parents=True, exist_ok=True)
+    report = RunReport(Path(__file__).stem, data_path)
 
+    report.stage('load_data')
     df = load_training_data(data_path)
 
     print(f"\n[DATA] Data Composition:")
     if 'NO_CIRCULAR' in str(data_path):
-        print(f"   [OK] Real eye-tracking data: ~6.5% (116 participants x 3 weight)")
+        print(f"   [OK] Real eye-tracking data: ~6.5% (116 participants x 3.0 sample_weight)")
         print(f"   [OK] Synthetic data: ~93.5% (full distribution coverage)")
         print(f"   [OK] ZERO CIRCULAR LOGIC: Labels from observed behavior!")
     elif 'combined' in str(data_path):
-        print(f"   [OK] Real eye-tracking data: ~6.5% (116 participants x 3 weight)")
+        print(f"   [OK] Real eye-tracking data: ~6.5% (116 participants x 3.0 sample_weight)")
         print(f"   [OK] Synthetic data: ~93.5% (full distribution coverage)")
         print(f"   [WARN] Partial circular logic: Labels inferred using rules")
     else:
@@ -193,24 +245,29 @@ def main():
         print(f"\n[WARN] WARNING: Only {len(df)} samples available.")
         print("   Recommended: 2000+ samples for good accuracy")
 
+    report.stage('feature_engineering')
     X, y, feature_cols = prepare_data(df)
+    w = get_sample_weights(df)
 
     print(f"\n[DATA] Dataset Info:")
     print(f"  Features: {X.shape[1]} (including engineered features)")
-    print(f"  Samples: {X.shape[0]}")
+    print(f"  Samples: {X.shape[0]} (total sample_weight {w.sum():g})")
     print(f"  Dimensions: {len(y)}")
 
     X_temp_data, X_test_data = train_test_split(X, test_size=0.15, random_state=42)
     X_train_data, X_val_data = train_test_split(X_temp_data, test_size=0.176, random_state=42)
+    w_temp_data, w_test_data = train_test_split(w, test_size=0.15, random_state=42)
+    w_train_data, w_val_data = train_test_split(w_temp_data, test_size=0.176, random_state=42)
 
     print(f"\n[SPLIT] Data Split:")
     print(f"  Train: {len(X_train_data)} samples ({len(X_train_data)/len(X)*100:.1f}%)")
     print(f"  Val:   {len(X_val_data)} samples ({len(X_val_data)/len(X)*100:.1f}%)")
     print(f"  Test:  {len(X_test_data)} samples ({len(X_test_data)/len(X)*100:.1f}%)")
 
+    report.stage('scale')
     print(f"\n[SCALE] Scaling features...")
     scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train_data)
+    X_train_scaled = scaler.fit_transform(X_train_data, sample_weight=w_train_data)
     X_val_scaled = scaler.transform(X_val_data)
     X_test_scaled = scaler.transform(X_test_data)
 
@@ -229,18 +286,21 @@ def main():
     }
 
     for dim_label, dim_file in dimensions.items():
+        report.stage(f'train_{dim_label}')
         y_temp_data, y_test_data = train_test_split(y[dim_label], test_size=0.15, random_state=42)
         y_train_data, y_val_data = train_test_split(y_temp_data, test_size=0.176, random_state=42)
 
         model, val_mae, val_r2 = train_dimension_model_tuned(
             X_train_scaled, y_train_data,
             X_val_scaled, y_val_data,
-            dim_label
+            dim_label,
+            w_train=w_train_data, w_val=w_val_data,
+            report=report, n_jobs=n_jobs
         )
 
         test_pred = model.predict(X_test_scaled)
-        test_mae = mean_absolute_error(y_test_data, test_pred)
-        test_r2 = r2_score(y_test_data, test_pred)
+        test_mae = mean_absolute_error(y_test_data, test_pred, sample_weight=w_test_data)
+        test_r2 = r2_score(y_test_data, test_pred, sample_weight=w_test_data)
 
         print(f"  [RESULT] Test MAE: {test_mae:.3f}, R2: {test_r2:.3f} ({test_r2*100:.1f}%)")
 
@@ -256,6 +316,13 @@ def main():
             'test_r2': test_r2
         }
 
+    report.set_metrics(results)
+    report.save(Path(reports_dir))
+
+    # Every real-user row of this dataset is now in the models: reset the warm-start manifest
+    from retrain_incremental import reset_manifest  # imports this module
+    reset_manifest(models_dir, data_path)
+
     print("\n" + "=" * 70)
     print("Training Summary")
     print("=" * 70)
@@ -294,4 +361,9 @@ def main():
         print(f"\n[WARN] Note: Models trained on synthetic data only")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Improved FSLSM model training (GridSearchCV + 5-fold CV)')
+    parser.add_argument('--models-dir', default=None, help='Where to save the scaler and models (default: models/)')
+    parser.add_argument('--reports-dir', default=str(REPORTS_DIR), help='Where to save the JSON run report')
+    parser.add_argument('--n-jobs', type=int, default=None, help='XGBoost threads per fit (default: all CPU cores)')
+    args = parser.parse_args()
+    main(args.models_dir, args.reports_dir, args.n_jobs)
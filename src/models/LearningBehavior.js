@@ -165,6 +165,7 @@ const learningBehaviorSchema = new mongoose.Schema({
 learningBehaviorSchema.index({ userId: 1, timestamp: -1 });
 learningBehaviorSchema.index({ userId: 1, sessionId: 1 });
 learningBehaviorSchema.index({ sessionId: 1, timestamp: -1 });
+learningBehaviorSchema.index({ updatedAt: 1, _id: 1 }); // Incremental ML data export watermark
 
 // TTL index to automatically delete old behavior data after 90 days
 learningBehaviorSchema.index({ createdAt: 1 }, { expireAfterSeconds: 90 * 24 * 60 * 60 });
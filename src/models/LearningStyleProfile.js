@@ -255,6 +255,7 @@ const learningStyleProfileSchema = new mongoose.Schema({
 learningStyleProfileSchema.index({ userId: 1 });
 learningStyleProfileSchema.index({ lastPrediction: -1 });
 learningStyleProfileSchema.index({ 'dataQuality.sufficientForML': 1 });
+learningStyleProfileSchema.index({ updatedAt: 1, _id: 1 }); // Incremental ML data export watermark
 
 // Instance method to get dominant learning style
 learningStyleProfileSchema.methods.getDominantStyle = function() {